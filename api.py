@@ -0,0 +1,235 @@
+import json
+import time
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import numpy as np
+
+import kernels
+from clustering import cluster_trades
+from datastore import PriceStore
+from metrics import METRICS, count, stage
+from parallel import DEFAULT_WORKERS
+from scanner import data_fingerprint, indicator_panel, last_changes, persist_states, restore_states, scan_all
+from strategies import ANALYZERS, strong_buy_mask
+from trades import backtest_trades, trade_summary
+from universe import ALL_TICKERS, load_universe
+
+HOST = "127.0.0.1"
+PORT = 8765
+REFRESH_MINUTES = 15
+MAX_BARS = 500
+
+# -----------------------------------------------------------------------------
+# 1. SCAN SERVICE (SAME SCANNER + ANALYZERS AS app.py)
+# -----------------------------------------------------------------------------
+# Holds the universe loaded through the shared store and reloads it once it is
+# older than `refresh` seconds. Responses are cached per data version: a route
+# is computed once per version, later requests are answered from the cache and
+# everything from older versions is dropped when the version changes. The
+# scanner's own cache and dirty tracking sit underneath, so a new version only
+# re-scans the tickers that got new bars.
+
+class ScanService:
+    def __init__(self, symbols=ALL_TICKERS, period="2y", workers=DEFAULT_WORKERS, refresh=REFRESH_MINUTES * 60, store=None):
+        self.symbols = symbols
+        self.period = period
+        self.workers = workers
+        self.refresh = refresh
+        self.store = store or PriceStore()
+        self.lock = threading.Lock()
+        self.data = None
+        self.version = None
+        self.rows = 0
+        self.modified = 0.0
+        self.loaded = 0.0
+        self.cache = {}
+
+    def current(self):
+        with self.lock:
+            if self.data is None or time.time() - self.loaded > self.refresh:
+                with stage("api.reload"): data = load_universe(self.symbols, period=self.period, store=self.store)
+                version = data_fingerprint(data)
+                if version != self.version:
+                    self.data, self.version, self.modified = data, version, time.time()
+                    self.rows = history_rows(data)
+                    self.cache = {}
+                self.loaded = time.time()
+            return self.data, self.version
+
+    # (etag, body) for `route`, computed at most once per data version
+    def get(self, route, fn):
+        self.current()
+        hit = self.cache.get(route)
+        if hit is not None:
+            count("api.cache_hits")
+            return hit
+        with self.lock:
+            if route not in self.cache:
+                with stage(f"api[{route[0]}]"): body = json.dumps(_jsonable(fn(self.data)), allow_nan=False).encode()
+                etag = '"' + hashlib.sha1(f"{self.version}|{route}".encode()).hexdigest()[:20] + '"'
+                self.cache[route] = (etag, body)
+            return self.cache[route]
+
+    def info(self, data):
+        return {"data_version": self.version, "data_as_of": data.index[-1].strftime("%Y-%m-%d") if len(data) else None,
+                "modified": formatdate(self.modified, usegmt=True)}
+
+    def scan(self, data, names):
+        results = scan_all(data, self.symbols, self.workers, names)
+        persist_states()
+        return {**self.info(data), "failed": self.store.failed,
+                "results": results, "changes": {n: last_changes(n) for n in names}}
+
+    # Latest `bars` rows of OHLCV + indicators for one ticker
+    def ticker(self, data, ticker, style="app", bars=1):
+        panel = indicator_panel(data, self.symbols, style)
+        if ticker not in panel['Close'].columns: return None
+        n = min(int(panel['Bars'][ticker]), bars)
+        columns = [k for k, v in panel.items() if isinstance(v, pd.DataFrame)]
+        frame = pd.DataFrame({c: panel[c][ticker].to_numpy()[len(panel[c]) - n:] for c in columns})
+        frame['Date'] = frame['Date'].dt.strftime("%Y-%m-%d")
+        return {**self.info(data), "ticker": ticker, "style": style, "bars": int(panel['Bars'][ticker]),
+                "rows": frame.to_dict("records")}
+
+    # STRONG BUY backtest over the last `lookback` bars (0 = full history)
+    def backtest(self, data, lookback=10, trades=False):
+        panel = indicator_panel(data, self.symbols, "backtest")
+        first_row = len(panel['Close']) - lookback if lookback else 0
+        table = cluster_trades(panel, backtest_trades(panel, strong_buy_mask(panel), first_row))
+        out = {**self.info(data), "lookback": lookback, "summary": trade_summary(table)}
+        if trades: out["trades"] = table.astype({"Entry Date": str}).to_dict("records")
+        return out
+
+# Rows of the packed panel built from `data` (its longest complete-bar history),
+# the largest /backtest lookback. Kept with the data version, under the lock.
+def history_rows(data):
+    if not len(data.columns): return 0
+    return int(data.notna().T.groupby(level=0).all().sum(axis=1).max())
+
+# NaN/inf -> null and NumPy scalars -> Python, so the output is strict JSON
+def _jsonable(value):
+    if isinstance(value, dict): return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)): return [_jsonable(v) for v in value]
+    if isinstance(value, np.generic): value = value.item()
+    if isinstance(value, float) and not np.isfinite(value): return None
+    return value
+
+# -----------------------------------------------------------------------------
+# 2. HTTP HANDLER
+# -----------------------------------------------------------------------------
+# GET /health | /scan | /scan/<analyzer> | /ticker/<symbol>?style=&bars= |
+# /backtest?lookback=&trades=1. Every JSON response carries an ETag and a
+# Last-Modified (the time its data version first appeared). If-None-Match,
+# If-Modified-Since or ?since=<ISO time or epoch seconds> get a bodyless 304
+# while the data is unchanged.
+
+def _since(value):
+    try: return float(value)
+    except ValueError: return pd.Timestamp(value).timestamp()
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+        try:
+            route, fn = self._route(parts, query)
+            since = _since(query["since"]) if "since" in query else None
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        if route is None: return self._send(404, {"error": f"Unknown path: {url.path}"})
+        if fn is None: return self._send(200, route)
+
+        try:
+            etag, body = self.service.get(route, fn)
+        except Exception as e:
+            count("api.errors")
+            return self._send(500, {"error": f"{type(e).__name__}: {e}"})
+        if body == b"null": return self._send(404, {"error": f"No data for {'/'.join(parts)}"})
+        if self._not_modified(etag, since):
+            count("api.not_modified")
+            return self._send(304, None, etag)
+        self._send(200, body, etag)
+
+    def _route(self, parts, query):
+        svc = self.service
+        if parts == ["health"]:
+            data, version = svc.current()
+            return {"status": "ok", **svc.info(data), "tickers": len(data.columns.get_level_values(0).unique()),
+                    "analyzers": list(ANALYZERS), "metrics": METRICS.to_dict()}, None
+        if parts and parts[0] == "scan" and len(parts) <= 2:
+            names = tuple(parts[1:] or ANALYZERS)
+            unknown = [n for n in names if n not in ANALYZERS]
+            if unknown: raise ValueError(f"Unknown analyzer: {unknown[0]}")
+            return ("scan", names), lambda data: svc.scan(data, list(names))
+        # Every distinct parameter value is a cache entry, so out-of-range values
+        # are refused rather than clamped
+        if len(parts) == 2 and parts[0] == "ticker":
+            style, bars = query.get("style", "app"), int(query.get("bars", 1))
+            if style not in ("app", "backtest"): raise ValueError(f"Unknown indicator style: {style}")
+            if not 1 <= bars <= MAX_BARS: raise ValueError(f"bars must be between 1 and {MAX_BARS}")
+            return ("ticker", parts[1].upper(), style, bars), lambda data: svc.ticker(data, parts[1].upper(), style, bars)
+        if parts == ["backtest"]:
+            lookback, trades = int(query.get("lookback", 10)), query.get("trades") == "1"
+            svc.current()
+            rows = svc.rows
+            if not 0 <= lookback <= rows: raise ValueError(f"lookback must be between 0 and {rows}")
+            return ("backtest", lookback, trades), lambda data: svc.backtest(data, lookback, trades)
+        return None, None
+
+    def _not_modified(self, etag, since=None):
+        match = self.headers.get("If-None-Match")
+        if match: return etag in [m.strip() for m in match.split(",")] or match.strip() == "*"
+        if since is None and self.headers.get("If-Modified-Since"):
+            since = parsedate_to_datetime(self.headers["If-Modified-Since"]).timestamp()
+        return since is not None and int(self.service.modified) <= since
+
+    def _send(self, status, payload, etag=None):
+        body = payload if isinstance(payload, bytes) or payload is None else json.dumps(_jsonable(payload)).encode()
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", formatdate(self.service.modified, usegmt=True))
+            self.send_header("Cache-Control", "no-cache")
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None: self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(service, host=HOST, port=PORT):
+    handler = type("BoundHandler", (Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving scans on http://{host}:{server.server_address[1]}", flush=True)
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve scan results, indicators and backtest summaries as JSON.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--refresh", type=float, default=REFRESH_MINUTES, metavar="MINUTES",
+                        help="reload the store (fetching new bars) at most this often")
+    args = parser.parse_args()
+
+    kernels.warm_up()
+    restore_states()
+    service = ScanService(period=args.period, workers=args.workers, refresh=args.refresh * 60)
+    service.current()
+    server = serve(service, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -1,9 +1,19 @@
+import os
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import datetime
+
+import kernels
+import compact
+import datacache
+from charts import cached_figure
+from parallel import DEFAULT_WORKERS
+from ranking import top_k
+from metrics import METRICS, profiled, stage
+from scanner import clear_cache, last_changes, scan_all
+from snapshots import latest_path, load_snapshot, take_snapshot
+from datastore import FIELDS, PriceStore
+from indicators import calculate_indicators
+from universe import ALL_TICKERS, load_universe
 
 # -----------------------------------------------------------------------------
 # 1. APP CONFIGURATION
@@ -30,206 +40,246 @@ st.title("⚡ UniAlgo: Scanner")
 st.caption("Daily Swing (High Frequency) | Deep Value (TSX/V)")
 
 # -----------------------------------------------------------------------------
-# 2. TICKER UNIVERSE (S&P 500 + TSX 60 + EXPANDED TSX VENTURE)
+# 2. DATA & INDICATORS
 # -----------------------------------------------------------------------------
 
-TSX_TICKERS = [
-    "RY.TO", "TD.TO", "CNR.TO", "CP.TO", "ENB.TO", "BNS.TO", "CNQ.TO", "BMO.TO",
-    "ATD.TO", "TRI.TO", "CSU.TO", "TRP.TO", "SHOP.TO", "BCE.TO", "CM.TO", "NTR.TO",
-    "SU.TO", "MG.TO", "MFC.TO", "WCN.TO", "QSR.TO", "IMO.TO", "FNV.TO", "POW.TO",
-    "DOL.TO", "T.TO", "RCI-B.TO", "GIB-A.TO", "WCP.TO", "SLF.TO", "AEM.TO", "NA.TO",
-    "FM.TO", "FTS.TO", "CVE.TO", "K.TO", "WPM.TO", "MRU.TO", "OTEX.TO", "EMA.TO",
-    "PPL.TO", "TECK-B.TO", "CAR-UN.TO", "CCO.TO", "SAP.TO", "WN.TO", "CL.TO",
-    "IFC.TO", "CTC-A.TO", "AQN.TO", "GRT-UN.TO", "KEY.TO", "CAE.TO", "GIL.TO",
-    "L.TO", "BIP-UN.TO", "BEP-UN.TO", "H.TO", "FSV.TO"
-]
-
-# EXPANDED TSX VENTURE LIST (Liquid Junior Miners, Tech, Energy)
-TSXV_TICKERS = [
-    # Tech / Crypto / Growth
-    "TOI.V", "HIVE.V", "BITF.V", "DMGI.V", "VPT.V", "FD.V", "QYOU.V", "DOC.V",
-    "CTS.V", "PYR.V", "FLT.V", "XBC.V", "GRN.V", "HITI.V", "BABY.V",
-    
-    # Mining & Critical Minerals (The bulk of TSX.V)
-    "NFG.V", "PMET.V", "VZLA.V", "ISO.V", "LI.V", "EU.V", "RECO.V", "DSV.V",
-    "GMIN.V", "SKE.V", "FOM.V", "GLA.V", "VGCX.V", "PGM.V", "SGD.V", "NVO.V",
-    "ABRA.V", "ARTG.V", "KNT.V", "LIO.V", "AMX.V", "MAI.V", "ORE.V", "PRYM.V",
-    "SCOT.V", "TIG.V", "WM.V", "UGD.V", "RCK.V", "GBR.V", "DEF.V", "CRE.V",
-    "BTR.V", "CNC.V", "EPL.V", "GWO.V", "III.V", "KNB.V", "MKO.V", "NOB.V",
-    
-    # Energy / Uranium / Lithium
-    "CVV.V", "SYH.V", "FCU.V", "GLO.V", "GXU.V", "LAM.V", "CUR.V", "FUU.V",
-    "UEX.V", "PTU.V", "AZM.V", "BRW.V", "DME.V", "ELBM.V", "LKE.V", "NILI.V"
-]
-
-US_TICKERS = [
-    "AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "META", "GOOG", "TSLA", "BRK-B", "UNH", 
-    "JNJ", "XOM", "V", "PG", "MA", "JPM", "HD", "CVX", "MRK", "ABBV", "PEP", "KO", 
-    "LLY", "BAC", "AVGO", "COST", "TMO", "MCD", "CSCO", "CRM", "PFE", "ACN", "DHR", 
-    "LIN", "NFLX", "ABT", "AMD", "DIS", "WMT", "TXN", "NEE", "PM", "BMY", "ADBE", 
-    "CMCSA", "NKE", "VZ", "RTX", "UPS", "MS", "HON", "AMGN", "INTC", "UNP", "LOW", 
-    "QCOM", "IBM", "SPGI", "INTU", "CAT", "GS", "DE", "GE", "LMT", "PLD", "BLK", 
-    "EL", "SCHW", "BKNG", "AMAT", "ADI", "MDLZ", "TJX", "ADP", "MMC", "GILD", "C", 
-    "ISRG", "SYK", "VRTX", "TMUS", "NOW", "ZTS", "BA", "PGR", "T", "CB", "REGN", 
-    "SO", "MO", "CI", "BDX", "LRCX", "FISV", "EOG", "BSX", "SLB", "ITW", "CL", 
-    "APD", "ATVI", "CSX", "CCI", "ETN", "HUM", "WM", "NOC", "TGT", "FDX", "NSC", 
-    "GD", "ICE", "SHW", "MCO", "USB", "GM", "KLAC", "MCK", "PNC", "EMR", "ORCL", 
-    "F", "AON", "ECL", "MDT", "HCA", "FCX", "NXPI", "MAR", "ROP", "PSX", "APH", 
-    "PCAR", "COF", "VLO", "MNST", "SNPS", "MSI", "AIG", "OXY", "ROST", "DXCM", 
-    "AZO", "MET", "AEP", "TRV", "SRE", "TEL", "D", "PSA", "IDXX", "PH", "KMB", 
-    "JCI", "CHTR", "ALL", "CTAS", "WMB", "AFL", "ADSK", "PAYX", "EXC", "DLR", 
-    "BIIB", "O", "STZ", "FIS", "EW", "EA", "GPN", "HLT", "CMG", "XEL", "ELV", 
-    "CTVA", "KR", "YUM", "KMI", "WBA", "PRU", "SYY", "DVN", "LHX", "CNC", "NEM", 
-    "CMI", "OTIS", "VRSK", "DD", "HPQ", "FAST", "CSGP", "WEC", "SBAC", "HES", 
-    "ANET", "KEYS", "DLTR", "CPRT", "ROK", "PEG", "AMP", "BKR", "PPG", "ES", 
-    "ED", "AWK", "APTV", "GLW", "MTD", "ULTA", "EFX", "TROW", "HSY", "EIX", 
-    "CBRE", "ARE", "VRSN", "EBAY", "ZBH", "ALB", "TSCO", "DFS", "HIG", "WBD", 
-    "FE", "AME", "MTB", "OKE", "IFF", "WY", "KHC", "RMD", "BAX", "STT", "CDW", 
-    "HAL", "ETR", "GWW", "AJG", "RJF", "DAL", "IR", "FANG", "ON", "MCHP", 
-    "LYB", "VTR", "LUV", "NVR", "WTW", "IT", "DHI", "TSN", "HBAN", "XYL", 
-    "FSLR", "GPC", "VICI", "WAB", "CINF", "DOV", "MLM", "GRMN", "EXR", "OMC", 
-    "BBY", "HPE", "TTWO", "CNP", "VMC", "CAG", "TER", "INGR", "KEY", "RF", 
-    "CMS", "PFG", "STE", "WAT", "CF", "NTAP", "AES", "FMC", "TYL", "DGX", 
-    "PKI", "EXPD", "IEX", "AVY", "CBOE", "DRI", "MKC", "ATO", "TXT", "SJM", 
-    "BWA", "HOLX", "ABMD", "COO", "JBHT", "ESS", "WST", "LNT", "MAA", "NDSN", 
-    "AKAM", "DG", "POOL", "TRMB", "ALGN", "CE", "MAS", "SNA", "SWK", "UDR", 
-    "HST", "K", "INCY", "MGM", "O", "PHM", "PKG", "RL", "ROL", "SWKS", "UHS", 
-    "URI", "VFC", "WHR", "WRB", "XRAY", "ZION", "A", "AAL", "AAP", "AES", 
-    "ALK", "APA", "BXP", "CPB", "CRL", "DISH", "DVA", "EMN", "EVRG", "FFIV", 
-    "FRT", "GNRC", "HAS", "HSIC", "IP", "IPG", "IVZ", "JNPR", "KMX", "LKQ", 
-    "LNC", "LVS", "MHK", "MOH", "MOS", "NCLH", "NI", "NRG", "NWS", "NWSA", 
-    "OGN", "PARA", "PEAK", "PNR", "PNW", "PVH", "QRVO", "RCL", "REG", "RHI", 
-    "SEE", "SIVB", "SPG", "TPR", "UAA", "UA", "UAL", "UDR", "UHS", "ULTA", 
-    "UNM", "URI", "USB", "VFC", "VICI", "VNO", "VRSK", "VTRS", "WAB", "WAT", 
-    "WBA", "WBD", "WDC", "WEC", "WELL", "WFC", "WHR", "WMB", "WRB", "WRK", 
-    "WST", "WY", "WYNN", "XEL", "XYL", "YUM", "ZBRA", "ZBH", "ZION", "ZTS"
-]
-
-ALL_TICKERS = TSX_TICKERS + TSXV_TICKERS + US_TICKERS
+# Compile (or load from the on-disk cache) the indicator/exit kernels once per
+# server process instead of on the first scan
+@st.cache_resource
+def warm_kernels():
+    with stage("kernels.warm_up"): return kernels.warm_up()
 
-# -----------------------------------------------------------------------------
-# 3. DATA & INDICATORS
-# -----------------------------------------------------------------------------
+warm_kernels()
 
-@st.cache_data(ttl=3600)
+# Local OHLCV store shared with backtest.py: only bars after the last stored
+# date are downloaded and dead/illiquid symbols are dropped before the panel is
+# built. The result is published to the memory-mapped cache of datacache.py
+# once per hour per server process (or by a snapshot run), and every session
+# reads that one read-only copy instead of unpickling its own. A version
+# published by another process is picked up on the next call.
+# UNIALGO_COMPACT=1 keeps the universe as float32 arrays (compact.py) instead.
+@st.cache_resource(ttl=3600)
+def refresh_data():
+    store = PriceStore()
+    data = load_universe(ALL_TICKERS, period="2y", store=store, compact=compact.ENABLED)
+    if compact.ENABLED: return data, store.failed
+    datacache.publish(data, ALL_TICKERS, failed=store.failed)
+
+# (data, {symbol: reason} for the symbols whose download failed after retries)
+# The cached refresh may outlive its published version (deleted by a clean-up
+# or pruned after other publishes), in which case it runs again
 def fetch_data():
-    return yf.download(ALL_TICKERS, period="2y", group_by='ticker', auto_adjust=True, threads=True)
+    cached = refresh_data()
+    if cached is not None: return cached
+    shared = datacache.current()
+    if shared is None:
+        refresh_data.clear()
+        cached = refresh_data()
+        if cached is not None: return cached
+        shared = datacache.current()
+    if shared is None:
+        st.error("No published market data is available; try again shortly.")
+        st.stop()
+    return shared, shared.failed
 
-def calculate_indicators(df):
-    if df.empty or len(df) < 205: return df
-    df = df.copy()
-    
-    # Moving Averages
-    df['SMA_200'] = df['Close'].rolling(window=200).mean()
-    df['EMA_20'] = df['Close'].ewm(span=20, adjust=False).mean()
-    
-    # 52 Week High (For Deep Value Logic)
-    df['52W_High'] = df['Close'].rolling(window=252).max()
-    
-    # RSI
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    
-    # ATR & ADX
-    high_low = df['High'] - df['Low']
-    true_range = np.maximum(high_low, np.abs(df['High'] - df['Close'].shift()))
-    df['ATR'] = true_range.rolling(window=14).mean()
-    df['ADX'] = df['ATR'].rolling(14).mean() 
-    return df
+# Latest snapshot written by snapshots.py (the scheduler or "Refresh now"),
+# re-read only when a newer one appears
+@st.cache_data
+def cached_snapshot(path):
+    return load_snapshot(path)
+
+def current_snapshot():
+    path = latest_path()
+    return cached_snapshot(path) if path else None
+
+def warn_failed(failed):
+    if failed:
+        st.warning(f"⚠️ {len(failed)} symbols failed to download: {', '.join(sorted(failed))}")
+
+# Signals come from the latest snapshot when there is one (its time is in the
+# sidebar), otherwise from a live scan; only that case downloads. With
+# profiling on, the scan cache is dropped so the profile covers real work.
+def scan_results(name, workers, profile=False):
+    snapshot = current_snapshot()
+    if snapshot is not None and name in snapshot["results"]:
+        warn_failed(snapshot["failed"])
+        return snapshot["results"][name]
+    with st.spinner("Downloading..."): data, failed = fetch_data()
+    warn_failed(failed)
+    if profile: clear_cache()
+    with profiled(profile) as prof:
+        results = scan_all(data, ALL_TICKERS, workers)[name]
+    if prof.text: st.session_state["profile_text"] = prof.text
+    return results
+
+# What changed since the previous snapshot (or the previous live scan): only
+# tickers with new bars were re-scanned to get there
+def scan_changes(name):
+    snapshot = current_snapshot()
+    if snapshot is not None and name in snapshot["results"]: return snapshot.get("changes", {}).get(name, [])
+    return last_changes(name)
 
 # -----------------------------------------------------------------------------
-# 4. LOGIC ENGINES
+# 3. RESULT VIEWS
 # -----------------------------------------------------------------------------
+# Default view is one dataframe grid: st.dataframe only draws the rows in view,
+# filtering/sorting happen on the frame and the grid shows PAGE_SIZE rows per
+# page. Selecting a row loads that ticker's detail. The original cards remain
+# available when there are at most MAX_CARDS signals.
 
-# DAILY SWING LOGIC (ORIGINAL 50% / HIGH FREQUENCY MODE)
-def analyze_daily_original(ticker, df):
-    if df.empty or len(df) < 205: return None
-    curr = df.iloc[-1]
-    prev = df.iloc[-2]
-    
-    # 1. Trend Filter
-    is_uptrend = (curr['Close'] > curr['SMA_200']) and (curr['ADX'] > 15)
-    
-    # 2. Pullback Filter
-    dist = (curr['Close'] - curr['EMA_20']) / curr['EMA_20']
-    is_pullback = (abs(dist) < 0.03) and (curr['RSI'] < 60)
-    
-    if not (is_uptrend and is_pullback): return None
+PAGE_SIZE = 50
+MAX_CARDS = 30
+CHART_WINDOWS = {"6M": 126, "1Y": 252, "2Y": 504, "All": None}
 
-    # 3. Trigger
-    avg_vol = df['Volume'].rolling(20).mean().iloc[-1]
-    if pd.isna(avg_vol) or avg_vol == 0: avg_vol = 1
-    
-    is_trigger = (curr['Close'] > prev['High']) or (curr['Close'] > curr['Open'])
-    vol_ok = curr['Volume'] > (avg_vol * 0.7)
-    vol_strong = curr['Volume'] > avg_vol
-    
-    status = "WATCH"
-    reason = "Setup Valid"
-    
-    if is_trigger and vol_ok:
-        status = "BUY"
-        reason = "Standard Swing Setup"
-        if (curr['ADX'] > 20) and vol_strong and (curr['Close'] > prev['High']):
-            status = "STRONG BUY"
-            reason = "🔥 High Conviction"
-            
-    if status != "WATCH":
-        stop = curr['Close'] - (2 * curr['ATR'])
-        target = curr['Close'] + (3 * curr['ATR'])
-        return {
-            "Ticker": ticker, "Status": status, "Price": curr['Close'],
-            "Stop": stop, "Target": target, "RSI": curr['RSI'], "Reason": reason
-        }
-    return None
-
-# DEEP VALUE / BOTTOM FISHING LOGIC
-def analyze_deep_value(ticker, df):
-    if df.empty or len(df) < 205: return None
-    curr = df.iloc[-1]
-    
-    # 1. OVERALL WEAKNESS: RSI < 45
-    if curr['RSI'] >= 45: return None
-    
-    # 2. LIQUIDITY (Approx > $500k volume traded today)
-    # Important for TSX.V to avoid 0 volume stocks
-    if (curr['Close'] * curr['Volume']) < 500000: return None
-    
-    # 3. MOMENTUM
-    avg_vol = df['Volume'].rolling(20).mean().iloc[-1]
-    is_green = curr['Close'] > curr['Open']
-    has_momentum = (curr['Volume'] > avg_vol) and is_green
-    
-    if not has_momentum: return None
-    
-    # 4. ROCKET FLAG (>30% discount from 52W High)
-    high_52 = curr['52W_High']
-    discount = (high_52 - curr['Close']) / high_52
-    is_deep_value = discount >= 0.30 
-    
-    status = "REVERSAL"
-    reason = "RSI < 45 + Vol Buy"
-    
-    if is_deep_value:
-        status = "ROCKET REVERSAL"
-        reason = "🚀 Deep Discount (>30% off High)"
-        
-    stop = curr['Low'] - (1 * curr['ATR'])
-    target = curr['Close'] + (3 * curr['ATR'])
-    
-    return {
-        "Ticker": ticker, "Status": status, "Price": curr['Close'],
-        "Stop": stop, "Target": target, "RSI": curr['RSI'], "Reason": reason,
-        "Discount": discount * 100
-    }
+COLUMN_CONFIG = {
+    "Price": st.column_config.NumberColumn(format="$%.2f"),
+    "Stop": st.column_config.NumberColumn(format="$%.2f"),
+    "Target": st.column_config.NumberColumn(format="$%.2f"),
+    "RSI": st.column_config.NumberColumn(format="%.1f"),
+    "Discount": st.column_config.NumberColumn("Discount %", format="%.0f"),
+    "W ADX": st.column_config.NumberColumn(format="%.1f"),
+    "Score": st.column_config.NumberColumn(help="Percentile rank against the whole universe (ranking.py)", format="%.0f"),
+    "Representative": st.column_config.CheckboxColumn(help="Best-scored signal of its correlation cluster (clustering.py)"),
+}
+
+def daily_cards(results):
+    c1, c2 = st.columns(2)
+    for i, res in enumerate(results):
+        bd = "#00E676" if res['Status']=="STRONG BUY" else "#4CAF50"
+        icon = "🔥" if res['Status']=="STRONG BUY" else "🟢"
+        html = f"""<div style="background-color:#262730; padding:10px; border-left:5px solid {bd}; margin-bottom:10px;">
+        <b style="color:white;">{icon} {res['Ticker']}</b><br><span style="color:#ccc">${res['Price']:.2f}</span><br><b style="color:{bd}">{res['Status']}</b></div>"""
+        with (c1 if i%2==0 else c2):
+            st.markdown(html, unsafe_allow_html=True)
+            with st.expander("Plan"):
+                st.write(f"Stop: ${res['Stop']:.2f}")
+                st.write(f"Target: ${res['Target']:.2f}")
+                st.write(f"RSI: {res['RSI']:.1f}")
+
+def value_cards(results):
+    c1, c2 = st.columns(2)
+    for i, res in enumerate(results):
+        if res['Status'] == "ROCKET REVERSAL":
+            bd, icon, bg = "#E91E63", "🚀", "#381E28"
+        else:
+            bd, icon, bg = "#9C27B0", "💎", "#262730"
+
+        html = f"""<div style="background-color:{bg}; padding:10px; border-left:5px solid {bd}; margin-bottom:10px;">
+        <b style="color:white;">{icon} {res['Ticker']}</b><br><span style="color:#ccc">${res['Price']:.2f}</span><br>
+        <b style="color:{bd}">{res['Status']}</b><br>
+        <span style="font-size:0.8em; color:#bbb">Discount: {res['Discount']:.0f}%</span>
+        </div>"""
+
+        with (c1 if i%2==0 else c2):
+            st.markdown(html, unsafe_allow_html=True)
+            with st.expander("Catch the Knife"):
+                st.write(f"Stop: ${res['Stop']:.2f}")
+                st.write(f"Target: ${res['Target']:.2f}")
+                st.write(f"RSI: {res['RSI']:.1f}")
+
+# Only built for the selected row: plan numbers plus the chart (candles,
+# averages, stop/target, RSI/ADX), downsampled and cached in charts.py
+def ticker_detail(res):
+    st.subheader(f"{res['Ticker']} · {res['Status']}")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Price", f"${res['Price']:.2f}")
+    m2.metric("Stop", f"${res['Stop']:.2f}")
+    m3.metric("Target", f"${res['Target']:.2f}")
+    m4.metric("RSI", f"{res['RSI']:.1f}")
+    st.caption(res['Reason'])
+
+    history = ticker_history(res['Ticker'])
+    if history is None or history.empty: return
+    window = st.radio("Window", list(CHART_WINDOWS), index=1, horizontal=True, key=f"chart_{res['Ticker']}")
+    with stage("render[chart]"):
+        fig = cached_figure(history, res['Ticker'], res['Stop'], res['Target'], CHART_WINDOWS[window])
+        st.plotly_chart(fig, width="stretch")
+
+# Read straight from the local store (everything it holds), so it works from a
+# snapshot too. Backtest-style indicators, so the ADX pane is the DMI ADX its
+# trend threshold refers to (the app style's "ADX" is a smoothed ATR)
+@st.cache_data(ttl=3600)
+def ticker_history(ticker):
+    records = PriceStore().read(ticker)
+    if records is None: return None
+    df = pd.DataFrame({f: records[f] for f in FIELDS}, index=pd.DatetimeIndex(records["Date"]))
+    return calculate_indicators(df.dropna(), style="backtest")
+
+def results_table(results, key, order):
+    frame = pd.DataFrame(results)
+    f1, f2, f3, f4 = st.columns([3, 2, 2, 1])
+    statuses = f1.multiselect("Status", sorted(frame['Status'].unique()), key=f"{key}_status")
+    query = f2.text_input("Ticker contains", key=f"{key}_query").strip().upper()
+    sort_by = f3.selectbox("Sort by", ["Signal"] + [c for c in frame.columns if c not in ("Status", "Reason")],
+                           key=f"{key}_sort")
+    descending = f4.checkbox("Desc", key=f"{key}_desc")
+
+    if statuses: frame = frame[frame['Status'].isin(statuses)]
+    if query: frame = frame[frame['Ticker'].str.contains(query, regex=False)]
+    if sort_by == "Signal":
+        frame = frame.assign(_rank=frame['Status'].map(order)).sort_values(["_rank", "Ticker"], ascending=not descending)
+        frame = frame.drop(columns="_rank")
+    else:
+        frame = frame.sort_values(sort_by, ascending=not descending, kind="stable")
+
+    pages = max(1, -(-len(frame) // PAGE_SIZE))
+    if st.session_state.get(f"{key}_page", 1) > pages: st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=f"{key}_page")
+    view = frame.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE].reset_index(drop=True)
+    st.caption(f"{len(frame)} of {len(results)} signals · select a row for details")
+
+    event = st.dataframe(view, hide_index=True, width="stretch", column_config=COLUMN_CONFIG,
+                         on_select="rerun", selection_mode="single-row", key=f"{key}_grid")
+    rows = event.selection.rows
+    if rows and rows[0] < len(view): ticker_detail(view.iloc[rows[0]])
+
+CHANGE_ICONS = {"NEW": "🆕", "UPGRADE": "⬆️", "DOWNGRADE": "⬇️", "DROPPED": "❌"}
+
+def show_changes(changes, key):
+    if not changes: return
+    counts = ", ".join(f"{CHANGE_ICONS[c]} {n}" for c, n in pd.Series([x["Change"] for x in changes]).value_counts().items())
+    with st.expander(f"Changes since last scan: {counts}"):
+        frame = pd.DataFrame(changes)
+        frame["Change"] = frame["Change"].map(lambda c: f"{CHANGE_ICONS[c]} {c}")
+        st.dataframe(frame, hide_index=True, width="stretch", key=f"{key}_changes")
+
+# "Top N" keeps the N best-scored signals, "One per cluster" drops signals
+# that move with a better-scored one (snapshots from before the ranking and
+# clustering stages have neither)
+def show_results(results, key, order, cards):
+    results = sorted(results, key=lambda x: (order[x['Status']], x['Ticker']))
+    if "Representative" in results[0] and st.checkbox("One per correlated cluster", key=f"{key}_reps"):
+        results = [r for r in results if r['Representative']]
+    if "Score" in results[0]:
+        top = st.number_input("Top N by score (0 = all)", min_value=0, value=0, key=f"{key}_top")
+        if top: results = [results[i] for i in top_k([r['Score'] for r in results], top)]
+    view = "Table"
+    if len(results) <= MAX_CARDS:
+        view = st.radio("View", ["Table", "Cards"], horizontal=True, key=f"{key}_view")
+    with stage(f"render[{key}]"):
+        if view == "Cards": cards(results)
+        else: results_table(results, key, order)
 
 # -----------------------------------------------------------------------------
-# 5. UI TABS
+# 4. UI TABS
 # -----------------------------------------------------------------------------
 
+# Scans split the universe across this many processes (1 = in-process)
+workers = st.sidebar.number_input("Worker processes", min_value=1, max_value=os.cpu_count() or 1,
+                                  value=min(DEFAULT_WORKERS, os.cpu_count() or 1))
+profile = st.sidebar.checkbox("Profile next scan (cProfile)")
+
+# Results load instantly from the latest snapshot; fresh data only on request
+snapshot = current_snapshot()
+if st.sidebar.button("🔄 Refresh now", key="refresh"):
+    with st.spinner("Downloading and scanning..."):
+        take_snapshot(ALL_TICKERS, workers=workers)
+        refresh_data.clear()
+    snapshot = current_snapshot()
+if snapshot is not None:
+    created = pd.Timestamp(snapshot["created"]).tz_convert(None)
+    st.sidebar.caption(f"Snapshot {created:%Y-%m-%d %H:%M} UTC · data as of {snapshot['data_as_of']}")
+
 tab1, tab2 = st.tabs(["🚀 DAILY SWING", "💎 BOTTOM FISHING"])
 
 # === TAB 1: DAILY SCANNER ===
@@ -237,39 +287,18 @@ with tab1:
     st.header("Daily Swing Scanner")
     st.write("Original High-Frequency Mode (Targets 3x ATR).")
     
-    if st.button("RUN DAILY SCAN", key="scan_d"):
-        st.write("⏳ Downloading...")
-        data = fetch_data()
-        results = []
-        prog = st.progress(0)
-        
-        for i, ticker in enumerate(ALL_TICKERS):
-            try:
-                if len(ALL_TICKERS)==1: df=data.dropna()
-                else: df=data[ticker].dropna()
-                df = calculate_indicators(df)
-                sig = analyze_daily_original(ticker, df)
-                if sig: results.append(sig)
-            except: pass
-            if i % 25 == 0: prog.progress((i+1)/len(ALL_TICKERS))
-            
-        prog.empty()
+    if st.button("RUN DAILY SCAN", key="scan_d"): st.session_state["show_daily"] = True
+
+    # One pass fills both tabs; reruns reuse the cached results for this data
+    if st.session_state.get("show_daily") or snapshot is not None:
+        # Same setups, kept only where last week's bar closed above its EMA_20 with ADX > 20
+        weekly = st.checkbox("Require weekly uptrend", key="daily_weekly")
+        name = "daily_weekly" if weekly else "daily"
+        results = scan_results(name, workers, profile)
+        show_changes(scan_changes(name), "daily")
         
         if not results: st.info("No Daily Setups.")
-        else:
-            results.sort(key=lambda x: (0 if x['Status']=="STRONG BUY" else 1, x['Ticker']))
-            c1, c2 = st.columns(2)
-            for i, res in enumerate(results):
-                bd = "#00E676" if res['Status']=="STRONG BUY" else "#4CAF50"
-                icon = "🔥" if res['Status']=="STRONG BUY" else "🟢"
-                html = f"""<div style="background-color:#262730; padding:10px; border-left:5px solid {bd}; margin-bottom:10px;">
-                <b style="color:white;">{icon} {res['Ticker']}</b><br><span style="color:#ccc">${res['Price']:.2f}</span><br><b style="color:{bd}">{res['Status']}</b></div>"""
-                with (c1 if i%2==0 else c2):
-                    st.markdown(html, unsafe_allow_html=True)
-                    with st.expander("Plan"):
-                        st.write(f"Stop: ${res['Stop']:.2f}")
-                        st.write(f"Target: ${res['Target']:.2f}")
-                        st.write(f"RSI: {res['RSI']:.1f}")
+        else: show_results(results, "daily", {"STRONG BUY": 0, "BUY": 1}, daily_cards)
 
 # === TAB 2: BOTTOM FISHING ===
 with tab2:
@@ -277,44 +306,30 @@ with tab2:
     st.write("Looks for oversold stocks (RSI < 45) with **Volume Momentum**.")
     st.info("ℹ️ ROCKET 🚀 = Trading at >30% discount from 52-Week High.")
     
-    if st.button("RUN VALUE SCAN", key="scan_v"):
-        st.write("⏳ Scanning...")
-        data = fetch_data()
-        results = []
-        prog = st.progress(0)
-        
-        for i, ticker in enumerate(ALL_TICKERS):
-            try:
-                if len(ALL_TICKERS)==1: df=data.dropna()
-                else: df=data[ticker].dropna()
-                
-                df = calculate_indicators(df)
-                sig = analyze_deep_value(ticker, df)
-                if sig: results.append(sig)
-            except: pass
-            if i % 25 == 0: prog.progress((i+1)/len(ALL_TICKERS))
-            
-        prog.empty()
+    if st.button("RUN VALUE SCAN", key="scan_v"): st.session_state["show_value"] = True
+
+    if st.session_state.get("show_value") or snapshot is not None:
+        results = scan_results("value", workers, profile)
+        show_changes(scan_changes("value"), "value")
         
         if not results: st.info("No Deep Value plays found.")
-        else:
-            results.sort(key=lambda x: (0 if x['Status']=="ROCKET REVERSAL" else 1, x['Ticker']))
-            c1, c2 = st.columns(2)
-            for i, res in enumerate(results):
-                if res['Status'] == "ROCKET REVERSAL":
-                    bd, icon, bg = "#E91E63", "🚀", "#381E28"
-                else:
-                    bd, icon, bg = "#9C27B0", "💎", "#262730"
-                
-                html = f"""<div style="background-color:{bg}; padding:10px; border-left:5px solid {bd}; margin-bottom:10px;">
-                <b style="color:white;">{icon} {res['Ticker']}</b><br><span style="color:#ccc">${res['Price']:.2f}</span><br>
-                <b style="color:{bd}">{res['Status']}</b><br>
-                <span style="font-size:0.8em; color:#bbb">Discount: {res['Discount']:.0f}%</span>
-                </div>"""
-                
-                with (c1 if i%2==0 else c2):
-                    st.markdown(html, unsafe_allow_html=True)
-                    with st.expander("Catch the Knife"):
-                        st.write(f"Stop: ${res['Stop']:.2f}")
-                        st.write(f"Target: ${res['Target']:.2f}")
-                        st.write(f"RSI: {res['RSI']:.1f}")
+        else: show_results(results, "value", {"ROCKET REVERSAL": 0, "REVERSAL": 1}, value_cards)
+
+# -----------------------------------------------------------------------------
+# 5. RUN METRICS (SIDEBAR)
+# -----------------------------------------------------------------------------
+# Drawn last so it includes the scan and card rendering of this run
+with st.sidebar.expander("⏱ Performance"):
+    if st.button("Reset metrics"): METRICS.reset()
+    metrics = METRICS.to_dict()
+    if metrics["stages"]:
+        st.dataframe(pd.DataFrame(metrics["stages"]).T.round(3), width="stretch")
+    for name, value in sorted(metrics["counters"].items()):
+        st.write(f"{name}: {value}")
+    for name, h in metrics["histograms"].items():
+        if h["count"]:
+            st.caption(f"{name} (n={h['count']}, p50 {h['p50'] * 1000:.1f} ms, p90 {h['p90'] * 1000:.1f} ms)")
+            st.bar_chart(pd.Series(h["buckets"]))
+    st.download_button("Export JSON", METRICS.to_json(), file_name="unialgo_metrics.json", mime="application/json")
+    if st.session_state.get("profile_text"):
+        st.code(st.session_state["profile_text"])
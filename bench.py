@@ -0,0 +1,251 @@
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+import pandas as pd
+import numpy as np
+
+import kernels
+from clustering import CorrelationCache
+from compact import CompactPanel
+from datastore import FIELDS, split_download
+from indicators import build_panel, calculate_indicators, compute_indicators
+from parallel import run_parallel
+from ranking import rank_panel
+from scanner import clear_cache, scan_all
+from strategies import ANALYZER_TIMEFRAMES, ANALYZERS, analyze_daily_original, analyze_deep_value, strong_buy_mask
+from timeframes import add_timeframes
+from trades import backtest_trades
+
+DEFAULT_SIZES = ["100x500", "1000x500", "1000x2500"]
+BASELINE_FILE = os.environ.get("UNIALGO_BENCH_BASELINE", "bench_baseline.json")
+TOLERANCE = 0.25
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.01
+# Modules whose cold import is timed, and the heavy dependencies they must not
+# pull in at import time
+ENTRY_POINTS = ["backtest", "snapshots", "api", "datastore", "charts"]
+HEAVY_MODULES = ["yfinance", "requests", "plotly", "numba"]
+
+# -----------------------------------------------------------------------------
+# 1. SYNTHETIC OHLCV
+# -----------------------------------------------------------------------------
+# Same shape as yf.download(group_by='ticker'), fully determined by the seed.
+# Geometric random walks with a realistic spread of prices and volumes, ~10% of
+# tickers listed part-way through and a sprinkle of missing bars, so the panel
+# packing and the short-history gates get exercised too. One in four symbols
+# gets a .TO suffix like the TSX part of the universe.
+def synthetic_ohlcv(n_tickers=100, n_bars=500, seed=0, gap_frac=0.02):
+    rng = np.random.default_rng(seed)
+    shape = (n_bars, n_tickers)
+    close = rng.uniform(2, 500, n_tickers) * np.exp(np.cumsum(rng.normal(0.0003, 0.02, shape), axis=0))
+    open_ = close * (1 + rng.normal(0, 0.006, shape))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, shape)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, shape)))
+    volume = np.round(rng.lognormal(11, 1.2, shape))
+
+    listed = np.where(rng.random(n_tickers) < 0.1, rng.integers(0, n_bars, n_tickers), 0)
+    missing = (np.arange(n_bars)[:, None] < listed) | (rng.random(shape) < gap_frac)
+    block = np.stack([open_, high, low, close, volume], axis=2)
+    block[missing] = np.nan
+
+    names = [f"SYN{k:05d}" + (".TO" if k % 4 == 3 else "") for k in range(n_tickers)]
+    columns = pd.MultiIndex.from_product([names, FIELDS], names=["Ticker", "Price"])
+    dates = pd.bdate_range(end="2024-12-31", periods=n_bars, name="Date")
+    return pd.DataFrame(block.reshape(n_bars, -1), index=dates, columns=columns)
+
+# -----------------------------------------------------------------------------
+# 2. STAGES
+# -----------------------------------------------------------------------------
+# Each stage is timed on its own, with its inputs prepared up front: building
+# the packed panel, indicators per style, weekly + monthly timeframes, each
+# registered analyzer, the STRONG BUY mask, per-date cross-sectional ranks,
+# the universe correlation matrix, trade resolution, and the two end-to-end
+# paths (scan from raw data with a cold cache, full-history backtest), plus the
+# float32 compact panel (build, indicators into its buffers, scan) for the
+# memory comparison.
+
+def _reference_indicators(frames):
+    return {t: calculate_indicators(df) for t, df in frames.items()}
+
+def _reference_analyzers(frames):
+    return [r for t, df in frames.items() for r in (analyze_daily_original(t, df), analyze_deep_value(t, df)) if r]
+
+def _cold_scan(data, tickers, workers):
+    clear_cache()
+    return scan_all(data, tickers, workers)
+
+def build_stages(data, workers=1, reference=False):
+    tickers = list(data.columns.get_level_values(0).unique())
+    panel = build_panel(data, tickers)
+    computed = {style: compute_indicators(panel, style) for style in ("app", "backtest")}
+    signals = strong_buy_mask(computed["backtest"])
+
+    stages = {
+        "build_panel": lambda: build_panel(data, tickers),
+        "indicators[app]": lambda: compute_indicators(panel, "app"),
+        "indicators[backtest]": lambda: compute_indicators(panel, "backtest"),
+    }
+    stages["timeframes[WM]"] = lambda: add_timeframes(computed["app"], ("W", "M"))
+    for name, (fn, style) in ANALYZERS.items():
+        timeframes = ANALYZER_TIMEFRAMES.get(name)
+        source = add_timeframes(computed[style], timeframes) if timeframes else computed[style]
+        stages[f"analyzer[{name}]"] = lambda fn=fn, source=source: fn(source)
+    stages["signals[strong_buy]"] = lambda: strong_buy_mask(computed["backtest"])
+    stages["ranking"] = lambda: rank_panel(computed["backtest"])
+    stages["clustering"] = lambda: CorrelationCache().update(panel)
+    stages["trades"] = lambda: backtest_trades(computed["backtest"], signals)
+    stages["full_scan"] = lambda: _cold_scan(data, tickers, workers)
+    stages["backtest"] = lambda: run_parallel(panel, "backtest", workers)
+    compact = CompactPanel.from_frame(data, tickers)
+    stages["compact[build]"] = lambda: CompactPanel.from_frame(data, tickers)
+    stages["compact[indicators]"] = lambda: compact.compute("app")
+    stages["compact[scan]"] = lambda: CompactPanel.from_frame(data, tickers).scan()
+
+    # The original per-ticker loop, for comparison (slow on big panels)
+    if reference:
+        raw = split_download(data, tickers)
+        frames = {t: calculate_indicators(df) for t, df in raw.items()}
+        stages["reference[indicators]"] = lambda: _reference_indicators(raw)
+        stages["reference[analyzers]"] = lambda: _reference_analyzers(frames)
+    return stages
+
+# -----------------------------------------------------------------------------
+# 3. MEASUREMENT
+# -----------------------------------------------------------------------------
+# Best of `repeat` wall-clock runs, then one extra run under tracemalloc for the
+# peak memory the stage allocates on top of its inputs (NumPy and pandas
+# buffers are traced too).
+
+def measure(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+def parse_size(size):
+    n_tickers, n_bars = size.lower().split("x")
+    return int(n_tickers), int(n_bars)
+
+# -----------------------------------------------------------------------------
+# 4. STARTUP
+# -----------------------------------------------------------------------------
+# Each entry point imported in a fresh interpreter (best of `repeat`), stored
+# under the "startup" size as import[<module>] so the baseline check catches a
+# slow import creeping back in. Also lists the HEAVY_MODULES it loaded.
+
+def import_time(module):
+    code = (f"import sys, time; t = time.perf_counter(); import {module}; s = time.perf_counter() - t; "
+            f"print(s, *[m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    seconds, *loaded = out.stdout.split()
+    return float(seconds), loaded
+
+def run_startup(repeat=3, stages=None):
+    results = {}
+    for module in ENTRY_POINTS:
+        name = f"import[{module}]"
+        if stages and name not in stages: continue
+        runs = [import_time(module) for _ in range(repeat)]
+        seconds, loaded = min(runs)
+        results[name] = {"seconds": seconds, "loaded": loaded}
+        print(f"{'startup':>11} {name:<24} {seconds * 1000:10.1f} ms  loads: {', '.join(loaded) or '-'}", flush=True)
+    return {"startup": results} if results else {}
+
+def run_bench(sizes=DEFAULT_SIZES, repeat=3, seed=0, workers=1, reference=False, stages=None):
+    results = {}
+    for size in sizes:
+        n_tickers, n_bars = parse_size(size)
+        data = synthetic_ohlcv(n_tickers, n_bars, seed)
+        results[size] = {}
+        for name, fn in build_stages(data, workers, reference).items():
+            if stages and name not in stages: continue
+            seconds, peak = measure(fn, repeat)
+            results[size][name] = {"seconds": seconds, "ticker_bars_per_s": n_tickers * n_bars / seconds,
+                                   "peak_mb": peak / 2**20}
+            print(f"{size:>11} {name:<24} {seconds * 1000:10.1f} ms {n_tickers * n_bars / seconds:14,.0f} tb/s "
+                  f"{peak / 2**20:9.1f} MB", flush=True)
+    return results
+
+# -----------------------------------------------------------------------------
+# 5. BASELINES
+# -----------------------------------------------------------------------------
+# The baseline file maps size -> stage -> seconds. A stage regresses when it is
+# more than `tolerance` slower than its baseline (and by more than timer noise).
+# Timings only compare on the same machine, so the file is not committed
+# (.gitignore): run `python bench.py --save-baseline` once on a known-good
+# checkout, then plain `python bench.py` checks a change against it. Sizes and
+# stages are merged into an existing baseline.
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path): return {}
+    with open(path) as fh: return json.load(fh)
+
+def save_baseline(results, path=BASELINE_FILE):
+    baseline = load_baseline(path)
+    for size, stages in results.items():
+        baseline.setdefault(size, {}).update({name: r["seconds"] for name, r in stages.items()})
+    with open(path + ".tmp", "w") as fh: json.dump(baseline, fh, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    out = []
+    for size, stages in results.items():
+        for name, r in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None: continue
+            if r["seconds"] > base * (1 + tolerance) and r["seconds"] - base > MIN_REGRESSION_SECONDS:
+                out.append((size, name, base, r["seconds"]))
+    return out
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every scan/backtest stage on synthetic OHLCV panels.")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, metavar="TICKERSxBARS",
+                        help="panel sizes, e.g. 100x500 1000x2500 5000x2500")
+    parser.add_argument("--stages", nargs="+", help="only run these stages")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="processes for full_scan and backtest")
+    parser.add_argument("--reference", action="store_true", help="also time the original per-ticker functions")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="merge these timings into the baseline file (per machine, not committed)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--json", help="write the full results to this file")
+    args = parser.parse_args()
+
+    kernels.warm_up()
+    print(f"python {platform.python_version()} | numpy {np.__version__} | pandas {pd.__version__} | "
+          f"{platform.machine()} x{os.cpu_count()} | kernels {kernels.backend()}")
+    results = run_startup(args.repeat, args.stages)
+    results.update(run_bench(args.sizes, args.repeat, args.seed, args.workers, args.reference, args.stages))
+
+    if args.json:
+        with open(args.json, "w") as fh: json.dump(results, fh, indent=2)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    if not baseline: print(f"No baseline at {args.baseline}; run with --save-baseline on a known-good checkout first")
+    slow = regressions(results, baseline, args.tolerance)
+    for size, name, base, seconds in slow:
+        print(f"REGRESSION {size} {name}: {base * 1000:.1f} ms -> {seconds * 1000:.1f} ms")
+    sys.exit(1 if slow else 0)
@@ -0,0 +1,103 @@
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+# Bars sent to the browser per trace; longer histories are downsampled
+MAX_POINTS = 1000
+FIGURE_CACHE = 32
+
+# -----------------------------------------------------------------------------
+# 1. DOWNSAMPLING (LARGEST-TRIANGLE-THREE-BUCKETS)
+# -----------------------------------------------------------------------------
+# lttb() picks `threshold` indices that keep the visual shape of y: first and
+# last point, then per bucket the point spanning the largest triangle with the
+# previous pick and the next bucket's mean. Candles are aggregated over the
+# same buckets (first open, max high, min low, last close), so no wick is lost.
+
+def lttb(x, y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3: return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(hi, edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area)) if hi > lo else lo
+        keep[i + 1] = a
+    return np.unique(keep)
+
+def downsample(df, max_points=MAX_POINTS):
+    if len(df) <= max_points: return df
+    close = df['Close'].to_numpy(dtype=float)
+    keep = lttb(np.arange(len(close), dtype=float), close, max_points)
+    out = df.iloc[keep].copy()
+    out['Open'] = df['Open'].to_numpy()[keep]
+    out['High'] = np.maximum.reduceat(df['High'].to_numpy(dtype=float), keep)
+    out['Low'] = np.minimum.reduceat(df['Low'].to_numpy(dtype=float), keep)
+    out['Close'] = close[np.append(keep[1:] - 1, len(close) - 1)]
+    return out
+
+# -----------------------------------------------------------------------------
+# 2. TICKER FIGURE
+# -----------------------------------------------------------------------------
+# Candles with SMA_200 / EMA_20 and the plan's stop/target lines, RSI (30/70)
+# and ADX (20 = trend threshold) below. df is one ticker's
+# indicators.calculate_indicators(df, style="backtest") frame: only that style's
+# ADX is the DMI ADX the threshold applies to. Indicator columns it lacks
+# (short histories) are skipped. Plotly is imported on the first figure.
+
+def ticker_figure(df, ticker, stop=None, target=None, max_points=MAX_POINTS):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    df = downsample(df, max_points)
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.03, row_heights=[0.6, 0.2, 0.2])
+    fig.add_trace(go.Candlestick(x=df.index, open=df['Open'], high=df['High'], low=df['Low'], close=df['Close'],
+                                 name=ticker), row=1, col=1)
+    for col, color in (("SMA_200", "#FFA726"), ("EMA_20", "#29B6F6")):
+        if col in df: fig.add_trace(go.Scatter(x=df.index, y=df[col], name=col, line=dict(color=color, width=1.5)), row=1, col=1)
+    if stop is not None and np.isfinite(stop):
+        fig.add_hline(y=stop, line=dict(color="#EF5350", dash="dash"), annotation_text=f"Stop {stop:.2f}", row=1, col=1)
+    if target is not None and np.isfinite(target):
+        fig.add_hline(y=target, line=dict(color="#66BB6A", dash="dash"), annotation_text=f"Target {target:.2f}", row=1, col=1)
+
+    if "RSI" in df:
+        fig.add_trace(go.Scatter(x=df.index, y=df['RSI'], name="RSI", line=dict(color="#AB47BC", width=1.2)), row=2, col=1)
+        for level in (30, 70): fig.add_hline(y=level, line=dict(color="#777", width=1, dash="dot"), row=2, col=1)
+    if "ADX" in df:
+        fig.add_trace(go.Scatter(x=df.index, y=df['ADX'], name="ADX", line=dict(color="#FFEE58", width=1.2)), row=3, col=1)
+        fig.add_hline(y=20, line=dict(color="#777", width=1, dash="dot"), row=3, col=1)
+
+    fig.update_layout(template="plotly_dark", height=650, margin=dict(l=10, r=10, t=30, b=10),
+                      xaxis_rangeslider_visible=False, legend=dict(orientation="h", y=1.02, x=0))
+    fig.update_xaxes(rangebreaks=[dict(bounds=["sat", "mon"])])
+    fig.update_yaxes(title_text="RSI", row=2, col=1)
+    fig.update_yaxes(title_text="ADX", row=3, col=1)
+    return fig
+
+# -----------------------------------------------------------------------------
+# 3. FIGURE CACHE
+# -----------------------------------------------------------------------------
+# Process-wide LRU keyed by ticker, data version (bar count, last date, last
+# close), the window shown and the plan levels, so flipping between tickers
+# reuses finished figures and new bars rebuild only the tickers looked at.
+
+_FIGURES = OrderedDict()
+
+def data_version(df):
+    if df.empty: return (0,)
+    return (len(df), str(df.index[-1]), float(df['Close'].iloc[-1]))
+
+def cached_figure(df, ticker, stop=None, target=None, bars=None, max_points=MAX_POINTS):
+    window = df.tail(bars) if bars else df
+    key = (ticker, data_version(df), bars, stop, target, max_points)
+    if key in _FIGURES:
+        _FIGURES.move_to_end(key)
+        return _FIGURES[key]
+    fig = _FIGURES[key] = ticker_figure(window, ticker, stop, target, max_points)
+    while len(_FIGURES) > FIGURE_CACHE: _FIGURES.popitem(last=False)
+    return fig
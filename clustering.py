@@ -0,0 +1,176 @@
+import pandas as pd
+import numpy as np
+
+from metrics import count, stage
+
+# Daily returns per correlation window, and the correlation that puts two
+# signals in one cluster
+CORR_BARS = 60
+CORR_THRESHOLD = 0.7
+# Tickers per side of one block of the co-moment matrix
+BLOCK = 256
+
+# -----------------------------------------------------------------------------
+# 1. RETURNS ON A SHARED DATE AXIS
+# -----------------------------------------------------------------------------
+# Log close-to-close returns on the universe's calendar. A ticker without a bar
+# on a date (halted, not yet listed) carries its last close forward, so that
+# day's return is 0, and every column has the same length. Correlations then
+# need no pairwise NaN handling and reduce to matrix products.
+
+def _returns(dates, close, axis):
+    rows, cols = np.nonzero(~np.isnat(dates) & ~np.isnan(close))
+    keep = dates[rows, cols] >= axis[0]
+    rows, cols = rows[keep], cols[keep]
+    grid = np.full((len(axis), dates.shape[1]), np.nan)
+    grid[np.searchsorted(axis, dates[rows, cols]), cols] = np.log(close[rows, cols])
+    filled = np.where(np.isnan(grid), 0, np.arange(len(axis))[:, None])
+    grid = np.take_along_axis(grid, np.maximum.accumulate(filled, axis=0), axis=0)
+    return np.asfortranarray(np.nan_to_num(np.diff(grid, axis=0)))
+
+# The universe's last `bars` trading dates and the returns on them (bars x
+# tickers). Only the trailing bars + 1 rows of the packed panel can hold them.
+def return_window(panel, bars=CORR_BARS):
+    dates = panel['Date'].to_numpy(dtype="datetime64[ns]")[-(bars + 1):]
+    close = panel['Close'].to_numpy(dtype=float)[-(bars + 1):]
+    axis = np.unique(dates[~np.isnat(dates)])[-(bars + 1):]
+    if len(axis) < 2: return axis[:0], np.zeros((0, dates.shape[1]), order="F")
+    return axis[1:], _returns(dates, close, axis)
+
+# Every date of the panel: (dates, returns), returns[i] ending on dates[i]
+def return_grid(panel):
+    dates = panel['Date'].to_numpy(dtype="datetime64[ns]")
+    axis = np.unique(dates[~np.isnat(dates)])
+    if len(axis) < 2: return axis[:0], np.zeros((0, dates.shape[1]), order="F")
+    return axis[1:], _returns(dates, panel['Close'].to_numpy(dtype=float), axis)
+
+# -----------------------------------------------------------------------------
+# 2. BLOCKED CO-MOMENTS AND THE CACHED UNIVERSE MATRIX
+# -----------------------------------------------------------------------------
+# Correlations come from the co-moment matrix X'X plus the column sums of the
+# returns window X. X'X is filled BLOCK x BLOCK tickers at a time (upper
+# triangle, mirrored), so each product works on column slices that stay in
+# cache. CorrelationCache keeps X'X for the whole universe between scans.
+# When the window moves forward (or its last bars are revised) only the rows
+# that left and the rows that arrived are applied, as X'X += A'A - R'R. A new
+# ticker set, a jump of more than half a window, or a window's worth of
+# updates (rounding drift) rebuilds the matrix.
+
+def _blocks(m, size=BLOCK):
+    return [(lo, min(lo + size, m)) for lo in range(0, m, max(size, 1))]
+
+def comoments(X, block=BLOCK):
+    m = X.shape[1]
+    out = np.empty((m, m))
+    blocks = _blocks(m, block)
+    for i, (lo, hi) in enumerate(blocks):
+        for lo2, hi2 in blocks[i:]:
+            out[lo:hi, lo2:hi2] = X[:, lo:hi].T @ X[:, lo2:hi2]
+            out[lo2:hi2, lo:hi] = out[lo:hi, lo2:hi2].T
+    return out
+
+def _correlation(products, sums, n):
+    if n < 2: return np.full(products.shape, np.nan)
+    cov = products - np.outer(sums, sums) / n
+    var = np.diag(cov).copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = np.where(var > 1e-18, 1 / np.sqrt(var), np.nan)
+    return cov * scale[:, None] * scale[None, :]
+
+# Pearson correlations between the columns of a small returns window
+def window_correlation(X):
+    return _correlation(X.T @ X, X.sum(axis=0), len(X))
+
+class CorrelationCache:
+    def __init__(self, bars=CORR_BARS, block=BLOCK):
+        self.bars = bars
+        self.block = block
+        self.tickers = None
+        self.ids = {}
+        self.dates = None
+        self.returns = None
+        self.products = None
+        self.sums = None
+        self.updates = 0
+
+    def update(self, panel):
+        tickers = list(panel['Close'].columns)
+        dates, returns = return_window(panel, self.bars)
+        if tickers != self.tickers or self.returns is None or self.updates >= self.bars:
+            return self._rebuild(tickers, dates, returns)
+        old = {d: k for k, d in enumerate(self.dates)}
+        same = np.array([d in old and np.array_equal(returns[k], self.returns[old[d]]) for k, d in enumerate(dates)], dtype=bool)
+        kept = {old[d] for d, s in zip(dates, same) if s}
+        removed = [k for k in range(len(self.dates)) if k not in kept]
+        if len(removed) + (~same).sum() > self.bars // 2: return self._rebuild(tickers, dates, returns)
+        if removed or not same.all():
+            with stage("clustering.update"):
+                added, gone = returns[~same], self.returns[removed]
+                self.products += added.T @ added - gone.T @ gone
+                self.sums += added.sum(axis=0) - gone.sum(axis=0)
+            self.updates += 1
+            count("clustering.rows_updated", len(added) + len(gone))
+        self.dates, self.returns = dates, returns
+
+    def _rebuild(self, tickers, dates, returns):
+        with stage("clustering.rebuild"):
+            self.tickers, self.ids = tickers, {t: k for k, t in enumerate(tickers)}
+            self.dates, self.returns = dates, returns
+            self.products = comoments(returns, self.block)
+            self.sums = returns.sum(axis=0)
+            self.updates = 0
+
+    # Correlation matrix among `tickers` (all present in the cache)
+    def correlation(self, tickers):
+        idx = [self.ids[t] for t in tickers]
+        return _correlation(self.products[np.ix_(idx, idx)], self.sums[idx], len(self.dates))
+
+# -----------------------------------------------------------------------------
+# 3. CLUSTERS OF SIGNALS
+# -----------------------------------------------------------------------------
+# Greedy leader clustering: in priority order, each signal not yet taken opens
+# a cluster and takes every untaken signal correlated with it at `threshold`
+# or more. The leader (best priority) is the cluster's representative.
+
+def leader_clusters(corr, priority, threshold=CORR_THRESHOLD):
+    priority = np.nan_to_num(np.asarray(priority, dtype=float), nan=-np.inf)
+    labels = np.full(len(priority), -1)
+    for i in np.argsort(-priority, kind="stable"):
+        if labels[i] >= 0: continue
+        labels[i] = i
+        labels[(labels < 0) & (corr[i] >= threshold)] = i
+    return labels
+
+# {ticker: (representative ticker, is representative)} for one day's signals
+def signal_clusters(cache, tickers, priority, threshold=CORR_THRESHOLD):
+    keep = [k for k, t in enumerate(tickers) if t in cache.ids]
+    if not keep: return {}
+    tickers = [tickers[k] for k in keep]
+    labels = leader_clusters(cache.correlation(tickers), np.asarray(priority, dtype=float)[keep], threshold)
+    return {t: (tickers[lead], bool(lead == k)) for k, (t, lead) in enumerate(zip(tickers, labels))}
+
+# Trade list (trades.backtest_trades) with "Cluster" (the representative's
+# ticker) and "Representative" per entry date. Each day's correlations use
+# only the `bars` returns up to and including the entry bar; the
+# representative is the entry with the strongest return over that window.
+def cluster_trades(panel, trades, bars=CORR_BARS, threshold=CORR_THRESHOLD):
+    trades = trades.copy()
+    trades["Cluster"], trades["Representative"] = trades["Ticker"], True
+    axis, returns = return_grid(panel)
+    if trades.empty or not len(axis): return trades
+    ids = {t: k for k, t in enumerate(panel['Close'].columns)}
+    entry = pd.DatetimeIndex(pd.to_datetime(trades["Entry Date"])).to_numpy(dtype="datetime64[ns]")
+    day = np.minimum(np.searchsorted(axis, entry), len(axis) - 1)
+    day[axis[day] != entry] = -1  # entry on the first bar: no return yet
+    cols = trades["Ticker"].map(ids).to_numpy()
+    cluster, lead = trades["Cluster"].to_numpy(dtype=object), np.ones(len(trades), dtype=bool)
+    with stage("clustering.trades"):
+        for d in np.unique(day):
+            members = np.flatnonzero(day == d)
+            if len(members) < 2 or d < 0: continue
+            X = returns[max(d - bars + 1, 0):d + 1, cols[members]]
+            labels = leader_clusters(window_correlation(X), X.sum(axis=0), threshold)
+            cluster[members] = trades["Ticker"].to_numpy()[members[labels]]
+            lead[members] = labels == np.arange(len(members))
+    trades["Cluster"], trades["Representative"] = cluster, lead
+    return trades
@@ -0,0 +1,219 @@
+import os
+import hashlib
+
+import pandas as pd
+import numpy as np
+
+from datastore import FIELDS, period_start
+from indicators import STYLES, compute_indicators
+from metrics import count, stage
+from strategies import ANALYZER_TIMEFRAMES, ANALYZERS, MIN_BARS
+from timeframes import add_timeframes, timeframe_columns
+
+# UNIALGO_COMPACT=1 makes the app keep its universe in this format
+ENABLED = os.environ.get("UNIALGO_COMPACT", "0") == "1"
+DTYPE = np.float32
+# Tickers per indicator pass: bounds the float64 scratch memory
+BLOCK_TICKERS = int(os.environ.get("UNIALGO_COMPACT_BLOCK", "256"))
+INDICATORS = ["SMA_200", "EMA_20", "52W_High", "VOL_20", "RSI", "ATR", "ADX"]
+# Bars per ticker the registered analyzers look at (latest bar + previous High)
+ANALYZER_ROWS = 2
+TAIL_ROWS = 5
+
+# -----------------------------------------------------------------------------
+# 1. PACKING HELPERS
+# -----------------------------------------------------------------------------
+# Where each valid cell of a dates x tickers mask lands in the packed layout of
+# indicators.build_panel (valid bars pushed to the bottom of the column). With
+# `last`, only each ticker's `last` most recent bars are kept.
+
+def _positions(valid, last=None):
+    counts = valid.sum(axis=0)
+    n = int(counts.max()) if valid.size else 0
+    if last is not None: n = min(n, last)
+    rows, cols = np.nonzero(valid)
+    dest = n - counts[cols] + np.cumsum(valid, axis=0)[rows, cols] - 1
+    keep = dest >= 0
+    return rows[keep], cols[keep], dest[keep], n
+
+def _blocks(m, size=BLOCK_TICKERS):
+    return [(lo, min(lo + size, m)) for lo in range(0, m, max(size, 1))]
+
+def _empty(shape):
+    return np.full(shape, np.nan, dtype=DTYPE, order="F")
+
+# -----------------------------------------------------------------------------
+# 2. COMPACT PANEL
+# -----------------------------------------------------------------------------
+# One float32 array per field on a shared date axis (dates x tickers, Fortran
+# order so every ticker's history is contiguous), an integer ticker index and a
+# validity mask marking the bars data[ticker].dropna() would keep. No per-ticker
+# frames are made. Indicators are computed BLOCK_TICKERS columns at a time:
+# the block is packed to float64, run through indicators.compute_indicators and
+# written back into float32 buffers allocated once per style. The analyzers
+# only see packed copies of the last ANALYZER_ROWS bars.
+# Prices keep about 7 significant digits, so a signal sitting exactly on a
+# threshold can differ from the float64 panel.
+
+class CompactPanel:
+    def __init__(self, tickers, dates, fields, valid):
+        self.tickers = list(tickers)
+        self.ids = {t: k for k, t in enumerate(self.tickers)}
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.fields = fields
+        self.valid = valid
+        self.bars = valid.sum(axis=0)
+        self.indicators = {}
+
+    @classmethod
+    def from_frame(cls, data, tickers):
+        tickers = list(dict.fromkeys(tickers))
+        if not isinstance(data.columns, pd.MultiIndex):
+            data = pd.concat({tickers[0]: data}, axis=1)
+        present = set(data.columns.get_level_values(0))
+        tickers = [t for t in tickers if t in present]
+        fields = {}
+        valid = np.ones((len(data), len(tickers)), dtype=bool, order="F")
+        for f in FIELDS:
+            values = np.asfortranarray(data.xs(f, axis=1, level=1).reindex(columns=tickers).to_numpy(dtype=DTYPE))
+            valid &= ~np.isnan(values)
+            fields[f] = values
+        return cls(tickers, data.index.values, fields, valid)
+
+    # Straight from the store's memory-mapped records, without going through
+    # the float64 dates x (ticker, field) frame
+    @classmethod
+    def from_store(cls, store, tickers, period=None):
+        start = np.datetime64(period_start(period)) if period else None
+        arrays = {}
+        for ticker in dict.fromkeys(tickers):
+            records = store.read(ticker)
+            if records is None: continue
+            if start is not None: records = records[records["Date"] >= start]
+            if len(records): arrays[ticker] = records
+
+        dates = np.unique(np.concatenate([r["Date"] for r in arrays.values()])) if arrays else np.array([], "datetime64[ns]")
+        shape = (len(dates), len(arrays))
+        fields = {f: _empty(shape) for f in FIELDS}
+        valid = np.zeros(shape, dtype=bool, order="F")
+        for k, records in enumerate(arrays.values()):
+            rows = np.searchsorted(dates, records["Date"])
+            ok = np.ones(len(records), dtype=bool)
+            for f in FIELDS:
+                fields[f][rows, k] = records[f]
+                ok &= ~np.isnan(records[f])
+            valid[rows[ok], k] = True
+        return cls(list(arrays), dates, fields, valid)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self):
+        arrays = list(self.fields.values()) + [b for bufs in self.indicators.values() for b in bufs.values()]
+        return sum(a.nbytes for a in arrays) + self.valid.nbytes + self.dates.nbytes
+
+    def column(self, ticker):
+        return self.ids[ticker]
+
+    # Same tickers in `tickers` order (unknown symbols dropped); shares the
+    # arrays when nothing changes
+    def select(self, tickers):
+        names = [t for t in dict.fromkeys(tickers) if t in self.ids]
+        if names == self.tickers: return self
+        cols = [self.ids[t] for t in names]
+        fields = {f: np.asfortranarray(v[:, cols]) for f, v in self.fields.items()}
+        return CompactPanel(names, self.dates, fields, np.asfortranarray(self.valid[:, cols]))
+
+    # Identifies a data version like scanner.data_fingerprint: shape, tickers,
+    # the ends of the date axis and the last few rows
+    def fingerprint(self):
+        digest = hashlib.sha1()
+        digest.update(repr((self.valid.shape, tuple(self.tickers), self.dates[:1].tolist(),
+                            self.dates[-TAIL_ROWS:].tolist())).encode())
+        for f in FIELDS: digest.update(np.ascontiguousarray(self.fields[f][-TAIL_ROWS:]).tobytes())
+        digest.update(np.ascontiguousarray(self.valid[-TAIL_ROWS:]).tobytes())
+        return digest.hexdigest()
+
+    # ----- indicators -----
+
+    # `timeframes` also fills the "<tf>_<column>" buffers of timeframes.py
+    def compute(self, style="app", timeframes=()):
+        if style not in STYLES: raise ValueError(f"Unknown indicator style: {style}")
+        shape = self.valid.shape
+        buffers = self.indicators.get(style)
+        if buffers is None or next(iter(buffers.values())).shape != shape:
+            buffers = self.indicators[style] = {}
+        # Only this call's columns are written; buffers of other timeframes
+        # from earlier calls stay as they are
+        names = INDICATORS + timeframe_columns(timeframes)
+        for name in names:
+            if name not in buffers: buffers[name] = _empty(shape)
+        with stage(f"indicators[{style}]"):
+            for lo, hi in _blocks(shape[1]):
+                panel, (rows, cols, dest) = self._packed(lo, hi)
+                computed = compute_indicators(panel, style)
+                if timeframes: computed = add_timeframes(computed, timeframes)
+                for name in names:
+                    buffers[name][:, lo:hi][rows, cols] = computed[name].to_numpy()[dest, cols]
+        return buffers
+
+    def _packed(self, lo, hi, last=None, extra=None, start=0):
+        rows, cols, dest, n = _positions(self.valid[start:, lo:hi], last)
+        rows = rows + start
+        names = self.tickers[lo:hi]
+        panel = {}
+        for name, values in {**self.fields, **(extra or {})}.items():
+            packed = np.full((n, hi - lo), np.nan)
+            packed[dest, cols] = values[:, lo:hi][rows, cols]
+            panel[name] = pd.DataFrame(packed, columns=names)
+        dates = np.full((n, hi - lo), np.datetime64("NaT"), dtype="datetime64[ns]")
+        dates[dest, cols] = self.dates[rows]
+        panel['Date'] = pd.DataFrame(dates, columns=names)
+        panel['Bars'] = pd.Series(self.bars[lo:hi], index=names)
+        return panel, (rows, cols, dest)
+
+    # Packed float64 panel (the indicators.build_panel layout) of each ticker's
+    # last `rows` bars plus the `style` indicators, for the panel analyzers.
+    # Only the trailing dates that hold those bars are looked at, widening the
+    # window for tickers whose latest bars are older.
+    def tail_panel(self, style=None, rows=ANALYZER_ROWS):
+        extra = None
+        if style is not None:
+            extra = self.indicators.get(style) or self.compute(style)
+        need, span = np.minimum(self.bars, rows), 8 * rows
+        while True:
+            start = max(len(self.dates) - span, 0)
+            if start == 0 or (self.valid[start:].sum(axis=0) >= need).all(): break
+            span *= 2
+        panel, _ = self._packed(0, len(self.tickers), rows, extra, start)
+        return panel
+
+    # One ticker's valid bars (and indicators if computed) as a regular frame
+    def frame(self, ticker, style=None):
+        k = self.ids[ticker]
+        keep = self.valid[:, k]
+        columns = {**self.fields, **(self.indicators.get(style, {}) if style else {})}
+        return pd.DataFrame({name: values[keep, k].astype(float) for name, values in columns.items()},
+                            index=pd.DatetimeIndex(self.dates[keep], name="Date"))
+
+    # ----- scanning -----
+
+    # {analyzer name: results}, one indicator pass per style like
+    # strategies.run_analyzers
+    def scan(self, names=None):
+        count("tickers.short_history", int((self.bars < MIN_BARS).sum()))
+        names = list(names or ANALYZERS)
+        timeframes = {}
+        for name in names:
+            style = ANALYZERS[name][1]
+            timeframes[style] = tuple(dict.fromkeys(timeframes.get(style, ()) + ANALYZER_TIMEFRAMES.get(name, ())))
+        results, tails = {}, {}
+        for name in names:
+            fn, style = ANALYZERS[name]
+            if style not in tails:
+                wanted = INDICATORS + timeframe_columns(timeframes[style])
+                if any(c not in self.indicators.get(style, {}) for c in wanted): self.compute(style, timeframes[style])
+                tails[style] = self.tail_panel(style)
+            with stage(f"analyzer[{name}]"): results[name] = fn(tails[style])
+        return results
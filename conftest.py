@@ -0,0 +1,17 @@
+import warnings
+
+import pytest
+
+from bench import synthetic_ohlcv
+
+# Small seeded universe (bench.synthetic_ohlcv): long enough for the 252-bar
+# windows, with late listings and missing bars
+@pytest.fixture(scope="session")
+def data():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return synthetic_ohlcv(40, 400, seed=1)
+
+@pytest.fixture(scope="session")
+def tickers(data):
+    return list(data.columns.get_level_values(0).unique())
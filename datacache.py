@@ -0,0 +1,123 @@
+import os
+import json
+import shutil
+import datetime
+
+import pandas as pd
+import numpy as np
+
+from datastore import DATA_DIR
+from indicators import build_panel, compute_indicators
+from metrics import stage
+from strategies import ANALYZER_TIMEFRAMES, ANALYZERS
+from timeframes import add_timeframes
+
+CACHE_DIR = os.environ.get("UNIALGO_CACHE_DIR", os.path.join(DATA_DIR, "cache"))
+CURRENT = "CURRENT"
+KEEP_VERSIONS = 2
+
+# -----------------------------------------------------------------------------
+# 1. PUBLISHING A DATA VERSION
+# -----------------------------------------------------------------------------
+# <root>/<version>/ holds one .npy file per array: the packed panel of
+# indicators.build_panel (panel.<key>.npy) and, for every indicator style the
+# registered analyzers use, the indicator and timeframe columns they need
+# (<style>.<column>.npy). meta.json lists the tickers and columns. The version
+# is scanner.data_fingerprint of the source frame. The directory is built under
+# a temporary name and renamed into place, then CURRENT is switched to it, so
+# readers only ever see complete versions. Publishing an existing version just
+# moves CURRENT. Old versions are deleted; processes that still have them
+# mapped keep reading them until they switch.
+
+def _styles():
+    styles = {}
+    for name, (_, style) in ANALYZERS.items():
+        styles[style] = tuple(dict.fromkeys(styles.get(style, ()) + ANALYZER_TIMEFRAMES.get(name, ())))
+    return styles
+
+def publish(data, symbols, root=CACHE_DIR, failed=None):
+    from scanner import data_fingerprint
+    version = data_fingerprint(data)
+    path = os.path.join(root, version)
+    if not os.path.exists(path):
+        with stage("datacache.publish"):
+            tmp = os.path.join(root, f".tmp-{version}-{os.getpid()}")
+            os.makedirs(tmp, exist_ok=True)
+            panel = build_panel(data, symbols)
+            for key, value in panel.items():
+                np.save(os.path.join(tmp, f"panel.{key}.npy"), value.to_numpy())
+            columns = {}
+            for style, timeframes in _styles().items():
+                computed = add_timeframes(compute_indicators(panel, style), timeframes)
+                columns[style] = [k for k in computed if k not in panel]
+                for key in columns[style]:
+                    np.save(os.path.join(tmp, f"{style}.{key}.npy"), computed[key].to_numpy())
+            meta = {"version": version, "tickers": list(panel['Close'].columns), "fields": list(panel),
+                    "columns": columns, "failed": failed or {},
+                    "data_as_of": data.index[-1].strftime("%Y-%m-%d") if len(data) else None,
+                    "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")}
+            with open(os.path.join(tmp, "meta.json"), "w") as fh: json.dump(meta, fh)
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)  # another process published it first
+    os.utime(path)  # newest for prune()
+    with open(os.path.join(root, CURRENT + ".tmp"), "w") as fh: fh.write(version)
+    os.replace(os.path.join(root, CURRENT + ".tmp"), os.path.join(root, CURRENT))
+    prune(root)
+    return current(root)
+
+def prune(root=CACHE_DIR, keep=KEEP_VERSIONS):
+    names = [n for n in os.listdir(root) if os.path.isdir(os.path.join(root, n)) and not n.startswith(".")]
+    names.sort(key=lambda n: os.path.getmtime(os.path.join(root, n)))
+    for name in names[:-keep]: shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+# -----------------------------------------------------------------------------
+# 2. READ-ONLY SHARED PANELS
+# -----------------------------------------------------------------------------
+# Every array is opened with mmap_mode="r" and wrapped in DataFrames without a
+# copy, so all sessions of a process share one object and all processes share
+# the OS page cache. current() re-reads the CURRENT pointer on each call (one
+# tiny file) and reopens only when the version changed; it returns None when
+# nothing is published or the version it points to is already gone. Nothing
+# here is writable: scanner.py uses the stored indicators (cut to the tickers
+# it rescans) instead of recomputing them.
+
+class SharedPanel:
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as fh: meta = json.load(fh)
+        self.path = path
+        self.version = meta["version"]
+        self.tickers = meta["tickers"]
+        self.ids = {t: k for k, t in enumerate(self.tickers)}
+        self.failed = meta["failed"]
+        self.data_as_of = meta["data_as_of"]
+        self.created = meta["created"]
+        self.panel = {key: self._load(f"panel.{key}") for key in meta["fields"]}
+        self.indicators = {style: {**self.panel, **{key: self._load(f"{style}.{key}") for key in keys}}
+                           for style, keys in meta["columns"].items()}
+
+    def _load(self, name):
+        values = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        if values.ndim == 1: return pd.Series(values, index=self.tickers, copy=False)
+        return pd.DataFrame(values, columns=self.tickers, copy=False)
+
+    def __len__(self):
+        return len(self.panel['Close'])
+
+    @property
+    def nbytes(self):
+        return sum(os.path.getsize(os.path.join(self.path, n)) for n in os.listdir(self.path))
+
+_OPEN = {}
+
+def current(root=CACHE_DIR):
+    pointer = os.path.join(root, CURRENT)
+    if not os.path.exists(pointer): return None
+    with open(pointer) as fh: version = fh.read().strip()
+    shared = _OPEN.get(root)
+    if shared is None or shared.version != version:
+        path = os.path.join(root, version)
+        if not os.path.exists(path): return None  # pruned before we got to it
+        with stage("datacache.open"): shared = _OPEN[root] = SharedPanel(path)
+    return shared
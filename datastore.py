@@ -0,0 +1,287 @@
+import os
+import io
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+
+from metrics import count, observe, stage
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+RECORD = np.dtype([("Date", "datetime64[ns]")] + [(f, "f8") for f in FIELDS])
+DATA_DIR = os.environ.get("UNIALGO_DATA_DIR", "data")
+
+# Fetch layer knobs: symbols per request, concurrent requests, requests/second
+# (0 = unlimited), retries per chunk and the first backoff delay in seconds
+FETCH_CHUNK = int(os.environ.get("UNIALGO_FETCH_CHUNK", "50"))
+FETCH_WORKERS = int(os.environ.get("UNIALGO_FETCH_WORKERS", "4"))
+FETCH_RATE = float(os.environ.get("UNIALGO_FETCH_RATE", "2"))
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 1.0
+# Local files don't show up by waiting: fixture retries go straight out
+FIXTURE_BACKOFF = 0.0
+
+PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+def period_start(period, now=None):
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match: raise ValueError(f"Unsupported period: {period}")
+    now = pd.Timestamp.now().normalize() if now is None else now
+    return now - pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+# yf.download(group_by='ticker') frame -> {ticker: OHLCV frame of complete bars}
+def split_download(data, tickers):
+    tickers = list(dict.fromkeys(tickers))
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({tickers[0]: data}, axis=1)
+    present = set(data.columns.get_level_values(0))
+    out = {}
+    for ticker in tickers:
+        if ticker not in present: continue
+        df = data[ticker].reindex(columns=FIELDS).dropna()
+        if not df.empty: out[ticker] = df
+    return out
+
+# -----------------------------------------------------------------------------
+# 1. PROVIDERS
+# -----------------------------------------------------------------------------
+# A provider only needs fetch(tickers, start) -> {ticker: OHLCV frame} holding
+# the bars dated on/after `start`. Missing tickers are simply left out.
+
+# Chunks already run concurrently in ChunkedFetcher, so yfinance's own threads
+# are off. Every call goes through one session (yfinance's shared one unless
+# `session` is given), so connections are reused across chunks. yfinance (and
+# requests below) are imported on the first download, not with the module, so
+# runs that only read the store never load them.
+class YahooProvider:
+    def __init__(self, session=None):
+        self.session = session
+
+    def fetch(self, tickers, start):
+        import yfinance as yf
+        data = yf.download(list(tickers), start=start.strftime("%Y-%m-%d"), group_by='ticker',
+                           auto_adjust=True, threads=False, progress=False, session=self.session)
+        return split_download(data, tickers)
+
+# Offline stand-in: one <TICKER>.csv per symbol (Date,Open,High,Low,Close,Volume)
+class FixtureProvider:
+    def __init__(self, root):
+        self.root = root
+
+    def fetch(self, tickers, start):
+        out = {}
+        for ticker in dict.fromkeys(tickers):
+            path = os.path.join(self.root, f"{ticker}.csv")
+            if not os.path.exists(path): continue
+            df = pd.read_csv(path, index_col=0, parse_dates=True).reindex(columns=FIELDS).dropna()
+            df = df[df.index >= start]
+            if not df.empty: out[ticker] = df
+        return out
+
+# Local stand-in server: GET <base_url>/<TICKER>.csv in the fixture format. A
+# 404 means "no such symbol"; other errors skip just that symbol (kept in
+# .errors) so ChunkedFetcher retries it. One keep-alive session per thread.
+class HttpProvider:
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.errors = {}
+        self._local = threading.local()
+
+    def _session(self):
+        import requests
+        if not hasattr(self._local, "session"): self._local.session = requests.Session()
+        return self._local.session
+
+    def fetch(self, tickers, start):
+        import requests
+        out = {}
+        for ticker in dict.fromkeys(tickers):
+            try:
+                resp = self._session().get(f"{self.base_url}/{ticker}.csv",
+                                           params={"start": start.strftime("%Y-%m-%d")}, timeout=self.timeout)
+                if resp.status_code == 404: continue
+                resp.raise_for_status()
+            except requests.RequestException as e:
+                self.errors[ticker] = f"{type(e).__name__}: {e}"
+                continue
+            self.errors.pop(ticker, None)
+            df = pd.read_csv(io.StringIO(resp.text), index_col=0, parse_dates=True).reindex(columns=FIELDS).dropna()
+            df = df[df.index >= start]
+            if not df.empty: out[ticker] = df
+        return out
+
+# -----------------------------------------------------------------------------
+# 2. CHUNKED, RATE-LIMITED FETCHING
+# -----------------------------------------------------------------------------
+
+# Spaces request starts at least 1/rate seconds apart across all threads
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval: return
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now: time.sleep(at - now)
+
+# Wraps any provider: splits the symbols into chunks fetched on a thread pool.
+# A chunk that raises, or comes back with symbols missing, is re-requested for
+# the missing symbols after backoff, 2x backoff, ... Whatever is still missing
+# ends up in .failed as {ticker: reason} (the provider's .errors entry when it
+# keeps one); .stats counts chunks and retries.
+class ChunkedFetcher:
+    def __init__(self, provider, chunk_size=FETCH_CHUNK, workers=FETCH_WORKERS, rate=FETCH_RATE,
+                 retries=FETCH_RETRIES, backoff=FETCH_BACKOFF):
+        self.provider = provider
+        self.chunk_size = max(int(chunk_size), 1)
+        self.workers = max(int(workers), 1)
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.failed = {}
+        self.stats = {}
+
+    def _fetch_chunk(self, chunk, start):
+        began = time.perf_counter()
+        out, pending, error, retries = {}, list(chunk), None, 0
+        for attempt in range(self.retries + 1):
+            if attempt:
+                retries += 1
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            self.limiter.wait()
+            try:
+                got, error = self.provider.fetch(pending, start), None
+            except Exception as e:
+                got, error = {}, f"{type(e).__name__}: {e}"
+            out.update(got)
+            pending = [t for t in pending if t not in got]
+            if not pending: break
+        observe("fetch.chunk", time.perf_counter() - began)
+        count("fetch.retries", retries)
+        errors = getattr(self.provider, "errors", {})
+        return out, {t: error or errors.get(t, "no data returned") for t in pending}, retries
+
+    def fetch(self, tickers, start):
+        tickers = list(dict.fromkeys(tickers))
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        out, self.failed = {}, {}
+        self.stats = {"requested": len(tickers), "chunks": len(chunks), "retries": 0}
+        with ThreadPoolExecutor(min(self.workers, len(chunks) or 1)) as pool:
+            for got, failed, retries in pool.map(lambda chunk: self._fetch_chunk(chunk, start), chunks):
+                out.update(got)
+                self.failed.update(failed)
+                self.stats["retries"] += retries
+        return out
+
+# UNIALGO_FETCH_URL points at a stand-in server, UNIALGO_FIXTURES at a folder of
+# CSVs; otherwise Yahoo. Either way requests go through ChunkedFetcher (local
+# files need no rate limit and no backoff).
+def default_provider():
+    url, fixtures = os.environ.get("UNIALGO_FETCH_URL"), os.environ.get("UNIALGO_FIXTURES")
+    if url: return ChunkedFetcher(HttpProvider(url))
+    if fixtures: return ChunkedFetcher(FixtureProvider(fixtures), rate=0, backoff=FIXTURE_BACKOFF)
+    return ChunkedFetcher(YahooProvider())
+
+# -----------------------------------------------------------------------------
+# 3. ON-DISK STORE (ONE MEMORY-MAPPED RECORD ARRAY PER TICKER)
+# -----------------------------------------------------------------------------
+# <root>/<TICKER>.npy holds date-sorted OHLCV records; meta.json remembers how
+# far back each ticker has been fetched so a longer period triggers a backfill.
+# Updates re-request from the last stored bar (inclusive) so a partial intraday
+# bar gets overwritten once the session closes.
+
+class PriceStore:
+    def __init__(self, root=DATA_DIR, provider=None):
+        self.root = root
+        self.provider = provider or default_provider()
+        os.makedirs(root, exist_ok=True)
+        self._meta_path = os.path.join(root, "meta.json")
+        self.meta = {}
+        self.failed = {}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as fh: self.meta = json.load(fh)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, f"{ticker}.npy")
+
+    def read(self, ticker):
+        path = self._path(ticker)
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def last_date(self, ticker):
+        records = self.read(ticker)
+        return None if records is None else pd.Timestamp(records["Date"][-1])
+
+    def update(self, tickers, period="2y"):
+        start = period_start(period)
+        groups = {}
+        for ticker in dict.fromkeys(tickers):
+            since = self.meta.get(ticker)
+            last = self.last_date(ticker)
+            if last is None or since is None or pd.Timestamp(since) > start:
+                groups.setdefault(start, []).append(ticker)
+            else:
+                groups.setdefault(last, []).append(ticker)
+
+        updated, self.failed = [], {}
+        for begin, names in groups.items():
+            with stage("fetch"): got = self.provider.fetch(names, begin)
+            for ticker, df in got.items():
+                self._write(ticker, df, begin)
+                if begin == start: self.meta[ticker] = start.strftime("%Y-%m-%d")
+                updated.append(ticker)
+            reasons = getattr(self.provider, "failed", {})
+            self.failed.update({t: reasons.get(t, "no data returned") for t in names if t not in got})
+        count("tickers.failed", len(self.failed))
+        self._save_meta()
+        return updated
+
+    def _write(self, ticker, df, begin):
+        began = time.perf_counter()
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None: index = index.tz_localize(None)
+        new = np.empty(len(df), dtype=RECORD)
+        new["Date"] = index.values
+        for f in FIELDS: new[f] = df[f].to_numpy(dtype=float)
+
+        old = self.read(ticker)
+        if old is not None:
+            new = np.concatenate([old[old["Date"] < np.datetime64(begin)], new])
+            del old
+        path = self._path(ticker)
+        with open(path + ".tmp", "wb") as fh: np.save(fh, new)
+        os.replace(path + ".tmp", path)
+        observe("store.write", time.perf_counter() - began)
+
+    def _save_meta(self):
+        with open(self._meta_path + ".tmp", "w") as fh: json.dump(self.meta, fh)
+        os.replace(self._meta_path + ".tmp", self._meta_path)
+
+    # Same shape as yf.download(group_by='ticker'): dates x (ticker, field)
+    def load(self, tickers, period=None):
+        start = np.datetime64(period_start(period)) if period else None
+        arrays = {}
+        for ticker in dict.fromkeys(tickers):
+            records = self.read(ticker)
+            if records is None: continue
+            if start is not None: records = records[records["Date"] >= start]
+            if len(records): arrays[ticker] = records
+
+        columns = pd.MultiIndex.from_product([list(arrays), FIELDS], names=["Ticker", "Price"])
+        if not arrays: return pd.DataFrame(columns=columns, dtype=float)
+        dates = np.unique(np.concatenate([records["Date"] for records in arrays.values()]))
+        block = np.full((len(dates), len(columns)), np.nan)
+        for k, records in enumerate(arrays.values()):
+            rows = np.searchsorted(dates, records["Date"])
+            for j, f in enumerate(FIELDS):
+                block[rows, k * len(FIELDS) + j] = records[f]
+        return pd.DataFrame(block, index=pd.DatetimeIndex(dates, name="Date"), columns=columns)
@@ -0,0 +1,347 @@
+import os
+import json
+import math
+from collections import deque
+
+import pandas as pd
+import numpy as np
+
+from datastore import FIELDS
+from indicators import STYLES, compute_indicators, subset_panel
+from timeframes import COLUMNS as TF_COLUMNS, STYLE as TF_STYLE, period_keys, resample_panel, timeframe_columns
+
+NAN = float("nan")
+INDICATORS = ["SMA_200", "EMA_20", "52W_High", "VOL_20", "RSI", "ATR", "ADX"]
+COLUMNS = FIELDS + INDICATORS
+# Newest bars per ticker searched for a state's last bar; states further behind
+# are re-seeded
+FOLD_ROWS = 10
+
+# -----------------------------------------------------------------------------
+# 1. O(1) BUILDING BLOCKS (SAME RECURRENCES AS THE PANDAS WINDOW KERNELS)
+# -----------------------------------------------------------------------------
+
+# rolling(window).mean() with min_periods=window: ring buffer + compensated sum
+class RollingMean:
+    def __init__(self, window):
+        self.window = window
+        self.buf = []
+        self.pos = 0
+        self.total = 0.0
+        self.comp = 0.0
+        self.nobs = 0
+
+    def _add(self, x):
+        y = x - self.comp
+        t = self.total + y
+        self.comp = (t - self.total) - y
+        self.total = t
+
+    def push(self, x):
+        if len(self.buf) == self.window:
+            old = self.buf[self.pos]
+            if old == old:
+                self.nobs -= 1
+                self._add(-old)
+            self.buf[self.pos] = x
+            self.pos = (self.pos + 1) % self.window
+        else:
+            self.buf.append(x)
+        if x == x:
+            self.nobs += 1
+            self._add(x)
+        return self.total / self.nobs if self.nobs == self.window else NAN
+
+# ewm(alpha=..., adjust=...).mean(); leading NaNs are skipped like pandas does
+class Ewm:
+    def __init__(self, alpha, adjust):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.value = NAN
+        self.old_wt = 1.0
+
+    def push(self, x):
+        if self.value != self.value:
+            if x == x: self.value, self.old_wt = x, 1.0
+            return self.value
+        if x == x:
+            self.old_wt *= 1 - self.alpha
+            new_wt = 1.0 if self.adjust else self.alpha
+            self.value = (self.old_wt * self.value + new_wt * x) / (self.old_wt + new_wt)
+            self.old_wt = self.old_wt + new_wt if self.adjust else 1.0
+        return self.value
+
+# rolling(window).max(): monotonic deque of (bar number, value)
+class RollingMax:
+    def __init__(self, window):
+        self.window = window
+        self.count = 0
+        self.items = deque()
+
+    def push(self, x):
+        while self.items and self.items[-1][1] <= x: self.items.pop()
+        self.items.append((self.count, x))
+        if self.items[0][0] <= self.count - self.window: self.items.popleft()
+        self.count += 1
+        return self.items[0][1] if self.count >= self.window else NAN
+
+def _div(a, b):
+    if b == 0: return NAN if a == 0 or a != a else math.copysign(math.inf, a)
+    return a / b
+
+# -----------------------------------------------------------------------------
+# 2. PER-TICKER STATE
+# -----------------------------------------------------------------------------
+# update() appends one bar and returns that bar's indicator row, matching
+# indicators.calculate_indicators(df, style) on the full history. With
+# `timeframes` (e.g. ("W",)) the state also aggregates the current week or
+# month and keeps a timeframes.STYLE state of the completed ones, so each row
+# carries the "<tf>_<column>" values timeframes.add_timeframes aligns onto it.
+
+class IndicatorState:
+    def __init__(self, style="app", timeframes=()):
+        if style not in STYLES: raise ValueError(f"Unknown indicator style: {style}")
+        self.style = style
+        self.bars = 0
+        self.last_date = None
+        self.prev_bar = None
+        self.row = None
+        self.prev_row = None
+        self.sma_200 = RollingMean(200)
+        self.ema_20 = Ewm(2.0 / (20 + 1), adjust=False)
+        self.high_252 = RollingMax(252)
+        self.vol_20 = RollingMean(20)
+        self.gain_14 = RollingMean(14)
+        self.loss_14 = RollingMean(14)
+        self.atr_14 = RollingMean(14)
+        self.adx_14 = RollingMean(14)
+        self.plus_dm = Ewm(1/14, adjust=True)
+        self.minus_dm = Ewm(1/14, adjust=True)
+        self.periods = {tf: {"key": None, "date": None, "bar": None, "state": IndicatorState(TF_STYLE)}
+                        for tf in timeframes}
+
+    def update(self, date, bar):
+        o, h, l, c, v = (float(bar[f]) for f in FIELDS)
+        prev_close, prev_high, prev_low = self.prev_bar or (NAN, NAN, NAN)
+        row = {"Open": o, "High": h, "Low": l, "Close": c, "Volume": v}
+
+        row['SMA_200'] = self.sma_200.push(c)
+        row['EMA_20'] = self.ema_20.push(c)
+        row['52W_High'] = self.high_252.push(c)
+        row['VOL_20'] = self.vol_20.push(v)
+
+        delta = c - prev_close
+        gain = self.gain_14.push(delta if delta > 0 else 0.0)
+        loss = self.loss_14.push(-delta if delta < 0 else -0.0)
+        row['RSI'] = 100 - (100 / (1 + _div(gain, loss)))
+
+        high_low, high_close = h - l, abs(h - prev_close)
+        if self.style == "app":
+            true_range = NAN if high_close != high_close else max(high_low, high_close)
+            row['ATR'] = self.atr_14.push(true_range)
+            row['ADX'] = self.adx_14.push(row['ATR'])
+        else:
+            true_range = max(x for x in (high_low, high_close, abs(l - prev_close), -math.inf) if x == x)
+            atr = row['ATR'] = self.atr_14.push(true_range)
+            plus_dm, minus_dm = h - prev_high, l - prev_low
+            plus_di = 100 * _div(self.plus_dm.push(0.0 if plus_dm < 0 else plus_dm), atr)
+            minus_di = 100 * _div(self.minus_dm.push(abs(0.0 if minus_dm > 0 else minus_dm)), atr)
+            row['ADX'] = self.adx_14.push(_div(abs(plus_di - minus_di), plus_di + minus_di) * 100)
+
+        date = pd.Timestamp(date)
+        for tf, period in self.periods.items(): row.update(_roll(period, tf, date, row))
+        self.prev_bar = (c, h, l)
+        self.prev_row, self.row = self.row, row
+        self.bars += 1
+        self.last_date = date.strftime("%Y-%m-%d")
+        return row
+
+    def extend(self, df):
+        for date, bar in zip(df.index, df[FIELDS].itertuples(index=False)):
+            self.update(date, bar._asdict())
+        return self
+
+    def to_dict(self):
+        out = {}
+        for name, value in vars(self).items():
+            if hasattr(value, "push"):
+                value = {k: (list(map(list, v)) if isinstance(v, deque) else v) for k, v in vars(value).items()}
+            elif name == "periods":
+                value = {tf: {**p, "state": p["state"].to_dict()} for tf, p in value.items()}
+            out[name] = value
+        return out
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["style"], tuple(data.get("periods", ())))
+        for name, value in data.items():
+            current = getattr(state, name)
+            if hasattr(current, "push"):
+                for k, v in value.items():
+                    setattr(current, k, deque(map(tuple, v)) if k == "items" else v)
+            elif name == "periods":
+                state.periods = {tf: {**p, "state": cls.from_dict(p["state"])} for tf, p in value.items()}
+            else:
+                setattr(state, name, tuple(value) if name == "prev_bar" and value else value)
+        return state
+
+def _period_key(date, tf):
+    return int(period_keys(np.array([date.to_datetime64()], dtype="datetime64[ns]"), tf)[0])
+
+# Folds a daily bar into its period (first open, max high, min low, last
+# close, summed volume, like timeframes.resample_panel). A bar from a new
+# period completes the previous one. Returns the completed period's values.
+def _roll(period, tf, date, row):
+    key, bar = _period_key(date, tf), period["bar"]
+    if key != period["key"]:
+        if bar is not None: period["state"].update(period["date"], bar)
+        period["key"], period["bar"] = key, {f: row[f] for f in FIELDS}
+    else:
+        bar["High"], bar["Low"] = max(bar["High"], row["High"]), min(bar["Low"], row["Low"])
+        bar["Close"], bar["Volume"] = row["Close"], bar["Volume"] + row["Volume"]
+    period["date"] = date.strftime("%Y-%m-%d")
+    done = period["state"].row or {}
+    return {f"{tf}_{col}": done.get(col, NAN) for col in TF_COLUMNS}
+
+# -----------------------------------------------------------------------------
+# 3. SEEDING FROM A PACKED PANEL
+# -----------------------------------------------------------------------------
+# Replaying a long history through update() costs a Python call per bar, so
+# new states are built from one indicators.compute_indicators pass instead:
+# each window gets its last inputs, each average its final value (and for
+# adjust=True the weight of the observations so far), each period state the
+# completed periods of timeframes.resample_panel. The states then continue
+# like replayed ones, up to rounding.
+
+def _seed_mean(block, values):
+    block.buf, block.pos, block.comp = values[-block.window:].tolist(), 0, 0.0
+    finite = [x for x in block.buf if x == x]
+    block.total, block.nobs = math.fsum(finite), len(finite)
+
+def _seed_ewm(block, values, last):
+    n = int((values == values).sum())
+    block.value = float(last) if n else NAN
+    block.old_wt = (1 - (1 - block.alpha) ** n) / block.alpha if block.adjust and n else 1.0
+
+# The deque keeps the bars no later bar in the window reaches
+def _seed_max(block, values, count):
+    tail = values[-block.window:]
+    later = np.append(np.maximum.accumulate(tail[::-1])[::-1][1:], -np.inf)
+    block.count = int(count)
+    block.items = deque((block.count - len(tail) + int(i), float(tail[i])) for i in np.flatnonzero(tail > later))
+
+# Completed periods (all but each ticker's newest) as seeded states, and the
+# newest period's bar and last date per ticker
+def _seed_periods(panel, tf):
+    tf_panel = resample_panel(panel, tf)
+    done = {k: v.iloc[:-1] if isinstance(v, pd.DataFrame) else (v - 1).clip(lower=0) for k, v in tf_panel.items()}
+    last = {k: tf_panel[k].iloc[-1] if len(tf_panel['Close']) else None for k in FIELDS + ['Date']}
+    return seed_states(done, TF_STYLE), last
+
+def seed_states(panel, style="app", timeframes=()):
+    parts = {}
+    computed = compute_indicators(panel, style, min_bars=0, parts=parts)
+    arrays = {k: v.to_numpy(dtype=float) for k, v in {**computed, **parts}.items()
+              if isinstance(v, pd.DataFrame) and k != 'Date'}
+    dates = panel['Date'].to_numpy(dtype="datetime64[ns]")
+    periods = {tf: _seed_periods(panel, tf) for tf in timeframes}
+    states = {}
+    for j, (ticker, bars) in enumerate(panel['Bars'].items()):
+        state = states[ticker] = IndicatorState(style, timeframes)
+        if not bars: continue
+        col = {k: v[len(v) - bars:, j] for k, v in arrays.items()}
+        close = col['Close']
+        _seed_mean(state.sma_200, close)
+        _seed_ewm(state.ema_20, close, col['EMA_20'][-1])
+        _seed_max(state.high_252, close, bars)
+        _seed_mean(state.vol_20, col['Volume'])
+        _seed_mean(state.gain_14, col['gains'])
+        _seed_mean(state.loss_14, col['losses'])
+        _seed_mean(state.atr_14, col['true_range'])
+        if style == "app":
+            _seed_mean(state.adx_14, col['ATR'])
+        else:
+            _seed_mean(state.adx_14, col['dx'])
+            _seed_ewm(state.plus_dm, col['plus_dm'], col['plus_ewm'][-1])
+            _seed_ewm(state.minus_dm, col['minus_dm'], col['minus_ewm'][-1])
+
+        row = {c: float(col[c][-1]) for c in COLUMNS}
+        prev = {c: float(col[c][-2]) for c in COLUMNS} if bars > 1 else None
+        day = pd.Timestamp(dates[-1, j])
+        for tf, (done, last) in periods.items():
+            period = state.periods[tf]
+            period.update(state=done[ticker], key=_period_key(day, tf), date=day.strftime("%Y-%m-%d"),
+                          bar={f: float(last[f][ticker]) for f in FIELDS})
+            names = [f"{tf}_{c}" for c in TF_COLUMNS]
+            row.update(zip(names, ((done[ticker].row or {}).get(c, NAN) for c in TF_COLUMNS)))
+            if prev is None: continue
+            same = _period_key(pd.Timestamp(dates[-2, j]), tf) == period["key"]
+            source = done[ticker].row if same else done[ticker].prev_row
+            prev.update(zip(names, ((source or {}).get(c, NAN) for c in TF_COLUMNS)))
+
+        state.bars, state.last_date = int(bars), day.strftime("%Y-%m-%d")
+        state.prev_bar = (row['Close'], row['High'], row['Low'])
+        state.row, state.prev_row = row, prev
+    return states
+
+# -----------------------------------------------------------------------------
+# 4. UNIVERSE HELPERS
+# -----------------------------------------------------------------------------
+
+# Brings states[ticker] up to date with a packed panel (indicators.build_panel
+# layout). A ticker whose last folded bar is among its newest FOLD_ROWS bars,
+# unchanged, only gets the bars after it, at O(1) each. New tickers, revised
+# bars, another style or timeframe set and states further behind are seeded
+# from the panel. Returns the tickers whose state changed.
+def update_states(states, panel, tickers=None, style="app", timeframes=()):
+    columns = panel['Close'].columns
+    tickers = [t for t in dict.fromkeys(columns if tickers is None else tickers) if t in columns]
+    idx = columns.get_indexer(tickers)
+    dates = panel['Date'].to_numpy(dtype="datetime64[ns]")[-FOLD_ROWS:, idx]
+    values = {f: panel[f].to_numpy(dtype=float)[-FOLD_ROWS:, idx] for f in FIELDS}
+    days, bars = dates.astype("datetime64[D]"), panel['Bars'].to_numpy()[idx]
+    stale, changed = [], []
+    for j, ticker in enumerate(tickers):
+        state = states.get(ticker)
+        if not bars[j]:
+            if state is None or state.bars: states[ticker] = IndicatorState(style, timeframes)
+            continue
+        if state is None or state.style != style or tuple(state.periods) != tuple(timeframes) or not state.bars:
+            stale.append(ticker)
+            continue
+        at = np.flatnonzero(days[:, j] == np.datetime64(state.last_date))
+        if not len(at) or any(values[f][at[0], j] != state.row[f] for f in FIELDS):
+            stale.append(ticker)
+            continue
+        for k in range(at[0] + 1, len(days)):
+            state.update(dates[k, j], {f: values[f][k, j] for f in FIELDS})
+        if at[0] + 1 < len(days): changed.append(ticker)
+    if stale: states.update(seed_states(subset_panel(panel, stale), style, timeframes))
+    return changed + stale
+
+def save_states(states, path):
+    with open(path + ".tmp", "w") as fh:
+        json.dump({ticker: state.to_dict() for ticker, state in states.items()}, fh)
+    os.replace(path + ".tmp", path)
+
+def load_states(path):
+    with open(path) as fh:
+        return {ticker: IndicatorState.from_dict(data) for ticker, data in json.load(fh).items()}
+
+# Two-row (previous bar, latest bar) panel so strategies.scan_* run unchanged.
+# States shorter than min_bars get NaN indicators like compute_indicators
+# gives them; the "<tf>_" columns are not gated, as in timeframes.py.
+def states_panel(states, min_bars=0):
+    tickers = list(states)
+    periods = dict.fromkeys(tf for s in states.values() for tf in s.periods)
+    short = np.array([s.bars < min_bars for s in states.values()], dtype=bool)
+    panel = {}
+    for col in COLUMNS + timeframe_columns(periods):
+        rows = [[(s.prev_row or {}).get(col, NAN) for s in states.values()],
+                [(s.row or {}).get(col, NAN) for s in states.values()]]
+        panel[col] = pd.DataFrame(rows, columns=tickers, dtype=float)
+        if col in INDICATORS and short.any(): panel[col].loc[:, short] = NAN
+    dates = [pd.Timestamp(s.last_date) if s.last_date else pd.NaT for s in states.values()]
+    panel['Date'] = pd.DataFrame([[pd.NaT] * len(tickers), dates], columns=tickers)
+    panel['Bars'] = pd.Series([s.bars for s in states.values()], index=tickers)
+    return panel
@@ -0,0 +1,155 @@
+import pandas as pd
+import numpy as np
+
+from kernels import ewm_mean, rolling_mean
+
+MIN_BARS = 205
+STYLES = ("app", "backtest")
+
+# -----------------------------------------------------------------------------
+# 1. PER-TICKER REFERENCE (ONE DATAFRAME AT A TIME)
+# -----------------------------------------------------------------------------
+# style="app" is the scanner flavour (2-leg true range, ADX = smoothed ATR),
+# style="backtest" the backtester flavour (3-leg true range, DMI based ADX).
+def calculate_indicators(df, style="app"):
+    if df.empty or len(df) < MIN_BARS: return df
+    df = df.copy()
+
+    # Moving Averages
+    df['SMA_200'] = df['Close'].rolling(window=200).mean()
+    df['EMA_20'] = df['Close'].ewm(span=20, adjust=False).mean()
+
+    # 52 Week High (For Deep Value Logic)
+    df['52W_High'] = df['Close'].rolling(window=252).max()
+
+    # RSI
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    if style == "app":
+        # ATR & ADX
+        high_low = df['High'] - df['Low']
+        true_range = np.maximum(high_low, np.abs(df['High'] - df['Close'].shift()))
+        df['ATR'] = true_range.rolling(window=14).mean()
+        df['ADX'] = df['ATR'].rolling(14).mean()
+        return df
+
+    # Risk Mgmt: ATR 14
+    high_low = df['High'] - df['Low']
+    high_close = np.abs(df['High'] - df['Close'].shift())
+    low_close = np.abs(df['Low'] - df['Close'].shift())
+    ranges = pd.concat([high_low, high_close, low_close], axis=1)
+    true_range = np.max(ranges, axis=1)
+    df['ATR'] = true_range.rolling(window=14).mean()
+
+    # Trend Strength: ADX 14
+    plus_dm = df['High'].diff()
+    minus_dm = df['Low'].diff()
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+    plus_di = 100 * (plus_dm.ewm(alpha=1/14).mean() / df['ATR'])
+    minus_di = 100 * (np.abs(minus_dm).ewm(alpha=1/14).mean() / df['ATR'])
+    dx = (np.abs(plus_di - minus_di) / (plus_di + minus_di)) * 100
+    df['ADX'] = dx.rolling(window=14).mean()
+    return df
+
+# -----------------------------------------------------------------------------
+# 2. PANEL LAYOUT (WHOLE UNIVERSE AS WIDE BARS x TICKERS FRAMES)
+# -----------------------------------------------------------------------------
+# Each ticker's valid bars (exactly the rows data[ticker].dropna() keeps) are
+# packed to the bottom of its column, so row -1 is every ticker's latest bar and
+# rolling windows never straddle the other exchange's holidays. Rows above a
+# ticker's history are NaN padding; "Date" is NaT there and "Bars" holds the
+# per-ticker history length.
+def build_panel(data, tickers):
+    tickers = list(dict.fromkeys(tickers))
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({tickers[0]: data}, axis=1)
+    present = set(data.columns.get_level_values(0))
+    tickers = [t for t in tickers if t in present]
+    fields = list(dict.fromkeys(data.columns.get_level_values(1)))
+
+    raw = {f: data.xs(f, axis=1, level=1).reindex(columns=tickers).to_numpy(dtype=float) for f in fields}
+    valid = np.ones((len(data), len(tickers)), dtype=bool)
+    for values in raw.values():
+        valid &= ~np.isnan(values)
+
+    counts = valid.sum(axis=0)
+    n = int(counts.max()) if len(tickers) else 0
+    rows, cols = np.nonzero(valid)
+    dest = n - counts[cols] + np.cumsum(valid, axis=0)[rows, cols] - 1
+
+    panel = {}
+    for f, values in raw.items():
+        packed = np.full((n, len(tickers)), np.nan)
+        packed[dest, cols] = values[rows, cols]
+        panel[f] = pd.DataFrame(packed, columns=tickers)
+    dates = np.full((n, len(tickers)), np.datetime64("NaT"), dtype="datetime64[ns]")
+    dates[dest, cols] = data.index.values[rows]
+    panel["Date"] = pd.DataFrame(dates, columns=tickers)
+    panel["Bars"] = pd.Series(counts, index=tickers)
+    return panel
+
+# Columns `tickers` of a packed panel, trimmed to their longest history
+def subset_panel(panel, tickers):
+    n = int(panel['Bars'][tickers].max()) if len(tickers) else 0
+    return {k: v[tickers].iloc[len(v) - n:].reset_index(drop=True) if isinstance(v, pd.DataFrame) else v[tickers]
+            for k, v in panel.items()}
+
+# Same numbers as calculate_indicators(df, style) for every ticker, computed
+# column-wise in one pass. Tickers shorter than min_bars get all-NaN columns,
+# matching the per-ticker early return (min_bars=0 keeps every value). The
+# rolling means and EWMs go through kernels.py (compiled loops when Numba is
+# available, pandas otherwise).
+def compute_indicators(panel, style="app", min_bars=MIN_BARS, parts=None):
+    if style not in STYLES: raise ValueError(f"Unknown indicator style: {style}")
+    close, high, low = panel['Close'], panel['High'], panel['Low']
+    valid = panel['Date'].notna()
+    out = {}
+
+    out['SMA_200'] = rolling_mean(close, 200)
+    out['EMA_20'] = ewm_mean(close, 2 / (20 + 1), adjust=False)
+    out['52W_High'] = close.rolling(window=252).max()
+    out['VOL_20'] = rolling_mean(panel['Volume'], 20)
+
+    # RSI (padding stays NaN so early windows match a ticker's own history)
+    delta = close.diff()
+    gains = delta.where(delta > 0, 0).where(valid)
+    losses = (-delta.where(delta < 0, 0)).where(valid)
+    out['RSI'] = 100 - (100 / (1 + rolling_mean(gains, 14) / rolling_mean(losses, 14)))
+
+    prev_close = close.shift()
+    high_low = high - low
+    high_close = (high - prev_close).abs()
+    if style == "app":
+        true_range = np.maximum(high_low, high_close)
+        out['ATR'] = rolling_mean(true_range, 14)
+        out['ADX'] = rolling_mean(out['ATR'], 14)
+    else:
+        # fmax skips NaN like the row-wise max over the concatenated ranges
+        true_range = np.fmax(np.fmax(high_low, high_close), (low - prev_close).abs())
+        out['ATR'] = rolling_mean(true_range, 14)
+        plus_dm = high.diff()
+        minus_dm = low.diff()
+        plus_dm = plus_dm.mask(plus_dm < 0, 0)
+        minus_dm = minus_dm.mask(minus_dm > 0, 0)
+        plus_ewm, minus_ewm = ewm_mean(plus_dm, 1/14), ewm_mean(minus_dm.abs(), 1/14)
+        plus_di = 100 * (plus_ewm / out['ATR'])
+        minus_di = 100 * (minus_ewm / out['ATR'])
+        dx = ((plus_di - minus_di).abs() / (plus_di + minus_di)) * 100
+        out['ADX'] = rolling_mean(dx, 14)
+        if parts is not None:
+            parts.update(plus_dm=plus_dm, minus_dm=minus_dm.abs(), plus_ewm=plus_ewm, minus_ewm=minus_ewm, dx=dx)
+
+    # Inputs of every window and average, before the min_bars gate, for
+    # incremental.seed_states
+    if parts is not None: parts.update(gains=gains, losses=losses, true_range=true_range)
+
+    short = panel['Bars'] < min_bars
+    if short.any():
+        for frame in out.values():
+            frame.loc[:, short.to_numpy()] = np.nan
+    return {**panel, **out}
@@ -0,0 +1,174 @@
+import os
+import warnings
+
+import pandas as pd
+import numpy as np
+
+# auto = Numba when installed, numpy = always the pandas/NumPy reference paths
+BACKEND = os.environ.get("UNIALGO_KERNELS", "auto")
+TOLERANCE = 1e-9
+
+# -----------------------------------------------------------------------------
+# 1. LOOP KERNELS (PLAIN PYTHON, COMPILED WITH NUMBA WHEN AVAILABLE)
+# -----------------------------------------------------------------------------
+# Column-wise over bars x tickers arrays from the packed panel. Each loop is a
+# transcription of the pandas window kernel it replaces (same update order,
+# same compensated sums), so results agree to rounding.
+
+# ewm(alpha=..., adjust=...).mean() with pandas' defaults (min_periods=0,
+# ignore_na=False: weights keep decaying across NaNs)
+def _ewm_loop(values, alpha, adjust):
+    n, m = values.shape
+    out = np.empty((n, m))
+    if n == 0: return out
+    for j in range(m):
+        weighted = values[0, j]
+        old_wt = 1.0
+        out[0, j] = weighted
+        for i in range(1, n):
+            cur = values[i, j]
+            if weighted == weighted:
+                old_wt *= 1.0 - alpha
+                if cur == cur:
+                    if weighted != cur:
+                        new_wt = 1.0 if adjust else alpha
+                        weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                    if adjust: old_wt += 1.0
+                    else: old_wt = 1.0
+            elif cur == cur:
+                weighted = cur
+            out[i, j] = weighted
+    return out
+
+# rolling(window).mean() with min_periods=window: Kahan-compensated running sum,
+# separate compensation for removals, pandas' sign and constant-run fixes
+def _rolling_mean_loop(values, window):
+    n, m = values.shape
+    out = np.full((n, m), np.nan)
+    for j in range(m):
+        nobs, neg_ct, same = 0, 0, 0
+        total, comp_add, comp_remove, prev = 0.0, 0.0, 0.0, np.nan
+        for i in range(n):
+            if i >= window:
+                val = values[i - window, j]
+                if val == val:
+                    nobs -= 1
+                    y = -val - comp_remove
+                    t = total + y
+                    comp_remove = t - total - y
+                    total = t
+                    if np.signbit(val): neg_ct -= 1
+            val = values[i, j]
+            if val == val:
+                nobs += 1
+                y = val - comp_add
+                t = total + y
+                comp_add = t - total - y
+                total = t
+                if np.signbit(val): neg_ct += 1
+                same = same + 1 if val == prev else 1
+                prev = val
+            if nobs >= window:
+                result = total / nobs
+                if same >= nobs: result = prev
+                elif neg_ct == 0 and result < 0: result = 0.0
+                elif neg_ct == nobs and result > 0: result = 0.0
+                out[i, j] = result
+    return out
+
+# Bar-by-bar stop/target walk; 1 = stopped, 2 = target (trades.STOPPED/TARGET),
+# the stop wins a same-bar tie
+def _first_touch_loop(low, high, rows, cols, stop, target):
+    n = low.shape[0]
+    outcome = np.zeros(len(rows), dtype=np.int8)
+    exit_row = np.full(len(rows), n - 1, dtype=np.int64)
+    for k in range(len(rows)):
+        c = cols[k]
+        for i in range(rows[k] + 1, n):
+            if low[i, c] < stop[k]:
+                outcome[k] = 1
+                exit_row[k] = i
+                break
+            if high[i, c] > target[k]:
+                outcome[k] = 2
+                exit_row[k] = i
+                break
+    return outcome, exit_row
+
+LOOPS = {"ewm": _ewm_loop, "rolling_mean": _rolling_mean_loop, "first_touch": _first_touch_loop}
+
+# -----------------------------------------------------------------------------
+# 2. BACKEND SELECTION, WARM-UP AND VERIFICATION
+# -----------------------------------------------------------------------------
+# warm_up() compiles every loop (cache=True keeps the machine code on disk, so
+# later processes just load it) and checks it against the reference code on a
+# small random panel. The kernels are only used if every check passes within
+# TOLERANCE; otherwise, or without Numba, callers keep the pandas/NumPy path.
+# It runs on first use if nobody called it at startup.
+
+_KERNELS = {}
+_STATE = {"checked": False}
+
+def verify(funcs, seed=0):
+    from trades import resolve_exits
+    rng = np.random.default_rng(seed)
+    values = rng.normal(100, 5, (400, 6))
+    values[:rng.integers(0, 300), 0] = np.nan
+    values[:50, 3] = np.nan
+    values[-30:, 4] = 7.0
+    frame = pd.DataFrame(values)
+    delta = frame.diff()
+
+    checks = [
+        (funcs["ewm"](values, 2 / 21, False), frame.ewm(span=20, adjust=False).mean()),
+        (funcs["ewm"](delta.to_numpy(), 1 / 14, True), delta.ewm(alpha=1/14).mean()),
+        (funcs["rolling_mean"](values, 200), frame.rolling(200).mean()),
+        (funcs["rolling_mean"](delta.clip(upper=0).to_numpy(), 14), delta.clip(upper=0).rolling(14).mean()),
+    ]
+    low, high = values - rng.uniform(0, 3, values.shape), values + rng.uniform(0, 3, values.shape)
+    rows, cols = rng.integers(0, 399, 200), rng.integers(0, 6, 200)
+    stop, target = values[rows, cols] - 8, values[rows, cols] + 8
+    checks += list(zip(funcs["first_touch"](low, high, rows, cols, stop, target),
+                       resolve_exits(low, high, rows, cols, stop, target)))
+    return all(np.allclose(np.asarray(a, dtype=float), np.asarray(b, dtype=float),
+                           rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True) for a, b in checks)
+
+# Numba is only imported here (it takes longer to import than pandas)
+def warm_up():
+    _STATE["checked"] = True
+    if BACKEND == "numpy": return False
+    try:
+        import numba
+    except ImportError:
+        return False
+    jitted = {name: numba.njit(cache=True)(fn) for name, fn in LOOPS.items()}
+    if not verify(jitted):
+        warnings.warn("Compiled kernels disagree with the reference implementation; using NumPy")
+        return False
+    _KERNELS.update(jitted)
+    return True
+
+def active():
+    if not _STATE["checked"]: warm_up()
+    return bool(_KERNELS)
+
+def backend():
+    return "numba" if active() else "numpy"
+
+# -----------------------------------------------------------------------------
+# 3. FRAME WRAPPERS
+# -----------------------------------------------------------------------------
+
+def _wrap(values, like):
+    return pd.DataFrame(values, index=like.index, columns=like.columns)
+
+def rolling_mean(frame, window):
+    if not active(): return frame.rolling(window=window).mean()
+    return _wrap(_KERNELS["rolling_mean"](frame.to_numpy(dtype=float), window), frame)
+
+def ewm_mean(frame, alpha, adjust=True):
+    if not active(): return frame.ewm(alpha=alpha, adjust=adjust).mean()
+    return _wrap(_KERNELS["ewm"](frame.to_numpy(dtype=float), alpha, adjust), frame)
+
+def first_touch(low, high, rows, cols, stop, target):
+    return _KERNELS["first_touch"](low, high, rows, cols, stop, target)
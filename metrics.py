@@ -0,0 +1,143 @@
+import io
+import json
+import bisect
+import time
+import pstats
+import cProfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+HISTOGRAM_BUCKETS = [0.0001, 0.001, 0.01, 0.1, 1.0, 10.0]
+PROFILE_LINES = 25
+# observe() calls per histogram kept for the percentiles
+MAX_SAMPLES = 1000
+
+# -----------------------------------------------------------------------------
+# 1. RUN METRICS (STAGE TIMERS, COUNTERS, TIMING HISTOGRAMS)
+# -----------------------------------------------------------------------------
+# Process-wide registry filled by the fetch layer, the store, the scanner and
+# the backtest. Stages nest freely ("fetch" inside "load_universe") and keep
+# calls / total / last / max seconds. Counters record tickers that were skipped
+# or failed instead of silently dropping them. Histograms collect per-ticker
+# (or per-chunk) durations: count, mean, max and the buckets cover every
+# observation, the percentiles the last MAX_SAMPLES observe() calls, so a
+# long-running server keeps a fixed amount per histogram. Thread-safe, since
+# fetch chunks run on a pool.
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.counters = {}
+            self.samples = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self.lock:
+            s = self.stages.setdefault(name, {"calls": 0, "total": 0.0, "last": 0.0, "max": 0.0})
+            s["calls"] += 1
+            s["total"] += seconds
+            s["last"] = seconds
+            s["max"] = max(s["max"], seconds)
+
+    def count(self, name, n=1):
+        with self.lock: self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    # `n` observations of `seconds` each (a chunk's per-ticker average)
+    def observe(self, name, seconds, n=1):
+        with self.lock:
+            h = self.samples.get(name)
+            if h is None:
+                h = self.samples[name] = {"count": 0, "total": 0.0, "max": 0.0,
+                                          "buckets": [0] * (len(HISTOGRAM_BUCKETS) + 1),
+                                          "recent": deque(maxlen=MAX_SAMPLES)}
+            h["count"] += n
+            h["total"] += seconds * n
+            h["max"] = max(h["max"], seconds)
+            h["buckets"][bisect.bisect_right(HISTOGRAM_BUCKETS, seconds)] += n
+            h["recent"].append((seconds, n))
+
+    def histogram(self, name):
+        with self.lock:
+            h = self.samples.get(name)
+            if not h or not h["count"]: return {"count": 0}
+            h = {**h, "buckets": list(h["buckets"]), "recent": list(h["recent"])}
+        values, weights = (np.array(x, dtype=float) for x in zip(*h["recent"]))
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], np.cumsum(weights[order])
+        pct = lambda q: float(values[min(np.searchsorted(weights, q / 100 * weights[-1]), len(values) - 1)])
+        return {
+            "count": h["count"], "mean": h["total"] / h["count"],
+            "p50": pct(50), "p90": pct(90), "p99": pct(99), "max": h["max"],
+            "buckets": {f"<{hi:g}s": c for hi, c in zip(HISTOGRAM_BUCKETS + [np.inf], h["buckets"])},
+        }
+
+    def to_dict(self):
+        with self.lock:
+            stages = {k: dict(v) for k, v in self.stages.items()}
+            counters = dict(self.counters)
+            names = list(self.samples)
+        return {"stages": stages, "counters": counters, "histograms": {n: self.histogram(n) for n in names}}
+
+    def to_json(self, path=None):
+        text = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, "w") as fh: fh.write(text)
+        return text
+
+    def report(self):
+        data = self.to_dict()
+        lines = [f"{'Stage':<28}{'Calls':>6}{'Last s':>10}{'Total s':>10}"]
+        for name, s in data["stages"].items():
+            lines.append(f"{name:<28}{s['calls']:>6}{s['last']:>10.3f}{s['total']:>10.3f}")
+        if data["counters"]:
+            lines.append("Counters: " + ", ".join(f"{k} {v}" for k, v in sorted(data["counters"].items())))
+        for name, h in data["histograms"].items():
+            if h["count"]:
+                lines.append(f"{name}: n={h['count']} p50={h['p50'] * 1000:.2f}ms "
+                             f"p90={h['p90'] * 1000:.2f}ms max={h['max'] * 1000:.2f}ms")
+        return "\n".join(lines)
+
+METRICS = Metrics()
+stage, count, observe = METRICS.stage, METRICS.count, METRICS.observe
+
+# -----------------------------------------------------------------------------
+# 2. OPTIONAL PROFILER HOOK
+# -----------------------------------------------------------------------------
+# cProfile around a single run. The top PROFILE_LINES functions by cumulative
+# time end up in profile.text; `path` also dumps the raw stats for snakeviz or
+# pstats.
+
+class Profile:
+    text = ""
+
+@contextmanager
+def profiled(enabled=True, path=None, lines=PROFILE_LINES):
+    result = Profile()
+    if not enabled:
+        yield result
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        if path: profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(lines)
+        result.text = out.getvalue()
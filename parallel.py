@@ -0,0 +1,127 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+import pandas as pd
+import numpy as np
+
+from datastore import FIELDS
+from indicators import compute_indicators
+from metrics import observe
+from ranking import rank_panel, top_k_mask
+from strategies import run_analyzers, scan_daily_original, scan_deep_value, strong_buy_mask
+from timeframes import add_timeframes
+from trades import backtest_trades
+
+DEFAULT_WORKERS = int(os.environ.get("UNIALGO_WORKERS", "1"))
+CHUNKS_PER_WORKER = 4
+
+# -----------------------------------------------------------------------------
+# 1. JOBS (RUN ON A COLUMN SLICE OF THE PACKED PANEL)
+# -----------------------------------------------------------------------------
+
+def _daily_job(panel):
+    return scan_daily_original(compute_indicators(panel))
+
+def _value_job(panel):
+    return scan_deep_value(compute_indicators(panel))
+
+# confirm: timeframes whose trend must agree with the entry (see strategies),
+# top_k: only each date's k best signals by ranking score (ranks are
+# cross-sectional, so this needs the whole universe in one job)
+def _backtest_job(panel, first_row=0, confirm=(), top_k=0):
+    panel = compute_indicators(panel, style="backtest")
+    if confirm: panel = add_timeframes(panel, confirm)
+    signals = strong_buy_mask(panel, confirm=confirm)
+    if top_k: signals = top_k_mask(panel, signals, rank_panel(panel)["Score"], top_k)
+    return backtest_trades(panel, signals, first_row)
+
+# Every registered analyzer from one indicator pass -> {name: results}
+def _scan_job(panel, names=None):
+    return run_analyzers(panel, names)
+
+JOBS = {"daily": _daily_job, "value": _value_job, "scan": _scan_job, "backtest": _backtest_job}
+
+# -----------------------------------------------------------------------------
+# 2. SHARED-MEMORY PANEL
+# -----------------------------------------------------------------------------
+# One float64 block of shape (fields + 1, tickers, bars): each ticker's history
+# is contiguous so a worker's slice of tickers is a plain view. The last plane
+# carries the dates as int64 nanoseconds (NaT for padding). Workers are kept
+# alive between calls and re-attach only when a new block is published.
+
+_SHARED = {}
+_POOLS = {}
+
+def _attach(name, shape):
+    if _SHARED.get("name") != name:
+        # Drop the old block view first: a mapping with exported buffers can't close
+        old = _SHARED.pop("shm", None)
+        _SHARED.clear()
+        if old is not None: old.close()
+        shm = SharedMemory(name=name)
+        _SHARED.update(name=name, shm=shm, block=np.ndarray(shape, dtype=np.float64, buffer=shm.buf))
+    return _SHARED["block"]
+
+def _chunk_panel(block, names, lo, hi):
+    panel = {f: pd.DataFrame(block[k, lo:hi].T, columns=names, copy=False) for k, f in enumerate(FIELDS)}
+    dates = block[-1, lo:hi].view("datetime64[ns]").T
+    panel['Date'] = pd.DataFrame(dates, columns=names, copy=False)
+    panel['Bars'] = pd.Series((~np.isnat(dates)).sum(axis=0), index=names)
+    return panel
+
+# Returns (seconds, result) so the parent can keep per-ticker timings
+def _run_chunk(job, name, shape, names, lo, hi, kwargs):
+    start = time.perf_counter()
+    result = JOBS[job](_chunk_panel(_attach(name, shape), names, lo, hi), **kwargs)
+    return time.perf_counter() - start, result
+
+def _merge(parts):
+    if parts and isinstance(parts[0], dict):
+        return {k: _merge([p[k] for p in parts]) for k in parts[0]}
+    frames = [p for p in parts if isinstance(p, pd.DataFrame)]
+    # Empty chunks would turn string columns into object ones
+    if frames: return pd.concat([f for f in frames if len(f)] or frames[:1], ignore_index=True)
+    return [row for part in parts for row in part]
+
+def _pool(workers):
+    if workers not in _POOLS: _POOLS[workers] = ProcessPoolExecutor(workers)
+    return _POOLS[workers]
+
+# -----------------------------------------------------------------------------
+# 3. ENTRY POINT
+# -----------------------------------------------------------------------------
+# Runs JOBS[job] over the panel from indicators.build_panel, split by ticker
+# across a process pool. Chunks are merged in ticker order, so the output is
+# identical to a single-process run.
+def run_parallel(panel, job, workers=None, **kwargs):
+    workers = DEFAULT_WORKERS if workers is None else workers
+    tickers = list(panel['Close'].columns)
+    if workers <= 1 or len(tickers) < 2:
+        return _merge([JOBS[job](panel, **kwargs)])
+
+    shape = (len(FIELDS) + 1, len(tickers), len(panel['Close']))
+    shm = SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for k, f in enumerate(FIELDS):
+            block[k] = panel[f].to_numpy(dtype=float).T
+        block[-1].view("int64")[:] = panel['Date'].to_numpy(dtype="datetime64[ns]").view("int64").T
+        del block
+
+        bounds = np.array_split(np.arange(len(tickers)), min(len(tickers), workers * CHUNKS_PER_WORKER))
+        futures = [_pool(workers).submit(_run_chunk, job, shm.name, shape, tickers[b[0]:b[-1] + 1],
+                                         int(b[0]), int(b[-1]) + 1, kwargs) for b in bounds]
+        try:
+            timed = [f.result() for f in futures]
+        except BrokenProcessPool:
+            _POOLS.pop(workers, None)
+            raise
+    finally:
+        shm.close()
+        shm.unlink()
+    for b, (seconds, _) in zip(bounds, timed):
+        observe(f"{job}.per_ticker", seconds / len(b), n=len(b))
+    return _merge([part for _, part in timed])
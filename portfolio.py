@@ -0,0 +1,142 @@
+import heapq
+
+import pandas as pd
+import numpy as np
+
+from trades import OUTCOMES, trade_arrays
+
+DEFAULT_CAPITAL = 100000.0
+MAX_POSITIONS = 10
+RISK_PER_TRADE = 0.01      # fraction of equity lost if the stop is hit
+MAX_POSITION_PCT = 0.20    # cap on one position's cost as a fraction of equity
+FEE_BPS = 0.0              # per side, on traded value
+
+EXIT, ENTRY = 0, 1
+
+# -----------------------------------------------------------------------------
+# 1. EVENT-DRIVEN SIMULATION
+# -----------------------------------------------------------------------------
+# Candidate trades come from trades.trade_arrays, so they have the same entries,
+# stops and first-touch exits as the per-signal backtest. One heap holds every
+# entry and, once a trade is taken, its exit, ordered by date. On the same date
+# exits come first, so their cash and slots are free for that day's entries.
+# Same-day entries go by descending `priority` (ADX by default). A candidate is
+# skipped when:
+#   - max_positions are open or the ticker is already held;
+#   - the ATR stop gives no positive risk;
+#   - the cash left cannot buy one share.
+# Shares = equity x risk_per_trade / (entry - stop), capped at
+# max_position_pct of equity and at the available cash. Equity here is cash
+# plus the cost of open positions.
+
+def simulate(panel, signals, first_row=0, capital=DEFAULT_CAPITAL, max_positions=MAX_POSITIONS,
+             risk_per_trade=RISK_PER_TRADE, max_position_pct=MAX_POSITION_PCT, fee_bps=FEE_BPS,
+             stop_atr=2, target_atr=3, stop_from="Close", priority="ADX"):
+    t = trade_arrays(panel, signals, first_row, stop_atr, target_atr, stop_from)
+    rows, cols, entry, stop = t["rows"], t["cols"], t["entry_price"], t["stop"]
+    dates = panel['Date'].to_numpy().view("int64")
+    entry_time, exit_time = dates[rows, cols], dates[t["exit_row"], cols]
+    score = panel[priority].to_numpy()[rows, cols] if priority else np.zeros(len(rows))
+    score = np.nan_to_num(score, nan=-np.inf)
+    fee = fee_bps / 10000
+
+    events = [(int(entry_time[k]), ENTRY, -float(score[k]), k) for k in range(len(rows))]
+    heapq.heapify(events)
+    cash, open_cost = float(capital), 0.0
+    held, shares = set(), np.zeros(len(rows))
+    skipped = {"max_positions": 0, "held": 0, "no_risk": 0, "cash": 0}
+
+    while events:
+        _, kind, _, k = heapq.heappop(events)
+        if kind == EXIT:
+            cash += shares[k] * t["exit_price"][k] * (1 - fee)
+            open_cost -= shares[k] * entry[k]
+            held.discard(cols[k])
+            continue
+        if len(held) >= max_positions: skipped["max_positions"] += 1; continue
+        if cols[k] in held: skipped["held"] += 1; continue
+        risk = entry[k] - stop[k]
+        if not risk > 0: skipped["no_risk"] += 1; continue
+
+        equity = cash + open_cost
+        n = min(np.floor(equity * risk_per_trade / risk), np.floor(equity * max_position_pct / entry[k]),
+                np.floor(cash / (entry[k] * (1 + fee))))
+        if not n >= 1: skipped["cash"] += 1; continue
+        shares[k] = n
+        cash -= n * entry[k] * (1 + fee)
+        open_cost += n * entry[k]
+        held.add(cols[k])
+        heapq.heappush(events, (int(exit_time[k]), EXIT, 0.0, k))
+
+    taken = np.flatnonzero(shares)
+    trades = _trade_table(panel, t, taken, shares, fee)
+    equity = _equity_curve(panel, t, taken, shares, capital, fee, first_row)
+    return {"trades": trades, "equity": equity, "stats": _stats(trades, equity, capital, skipped, len(rows))}
+
+# -----------------------------------------------------------------------------
+# 2. RESULTS: TRADE LIST, DAILY EQUITY CURVE, SUMMARY
+# -----------------------------------------------------------------------------
+
+def _trade_table(panel, t, taken, shares, fee):
+    rows, cols, exit_row = t["rows"][taken], t["cols"][taken], t["exit_row"][taken]
+    dates = panel['Date'].to_numpy()
+    n, entry, exit_price = shares[taken], t["entry_price"][taken], t["exit_price"][taken]
+    pnl = n * (exit_price * (1 - fee) - entry * (1 + fee))
+    return pd.DataFrame({
+        "Ticker": panel['Close'].columns.to_numpy()[cols],
+        "Entry Date": pd.DatetimeIndex(dates[rows, cols]).date,
+        "Exit Date": pd.DatetimeIndex(dates[exit_row, cols]).date,
+        "Shares": n.astype(int),
+        "Entry Price": np.round(entry, 2),
+        "Exit Price": np.round(exit_price, 2),
+        "Outcome": OUTCOMES[t["outcome"][taken]],
+        "P&L $": np.round(pnl, 2),
+        "P&L %": np.round(pnl / (n * entry) * 100, 2),
+    }).sort_values(["Entry Date", "Ticker"], kind="stable").reset_index(drop=True)
+
+# Marks every open position at each of its ticker's closes and carries the mark
+# over days that ticker did not trade, from the first date entries may happen.
+# Built from per-date deltas (np.add.at + cumsum), so the cost grows with bars
+# held, not with dates x tickers. Open trades close at the last bar.
+def _equity_curve(panel, t, taken, shares, capital, fee, first_row=0):
+    date_grid = panel['Date'].to_numpy()
+    calendar = np.unique(date_grid[~np.isnat(date_grid)])
+    if 0 < first_row < len(date_grid):
+        start = date_grid[first_row]
+        calendar = calendar[calendar >= start[~np.isnat(start)].min()]
+    cash_delta = np.zeros(len(calendar))
+    mark_delta = np.zeros(len(calendar))
+    close = panel['Close'].to_numpy()
+
+    for k in taken:
+        r0, r1, c, n = t["rows"][k], t["exit_row"][k], t["cols"][k], shares[k]
+        held_rows = np.arange(r0, r1)
+        idx = np.searchsorted(calendar, date_grid[held_rows, c])
+        marks = n * close[held_rows, c]
+        exit_idx = np.searchsorted(calendar, date_grid[r1, c])
+        np.add.at(mark_delta, idx, np.diff(marks, prepend=0.0))
+        mark_delta[exit_idx] -= marks[-1]
+        cash_delta[idx[0]] -= n * t["entry_price"][k] * (1 + fee)
+        cash_delta[exit_idx] += n * t["exit_price"][k] * (1 - fee)
+
+    cash = capital + np.cumsum(cash_delta)
+    positions = np.cumsum(mark_delta)
+    equity = cash + positions
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    return pd.DataFrame({"Cash": cash, "Positions": positions, "Equity": equity, "Drawdown %": (equity / peak - 1) * 100},
+                        index=pd.DatetimeIndex(calendar, name="Date"))
+
+def _stats(trades, equity, capital, skipped, candidates):
+    final = equity['Equity'].iloc[-1] if len(equity) else capital
+    years = (equity.index[-1] - equity.index[0]).days / 365.25 if len(equity) > 1 else 0
+    return {
+        "Candidates": candidates,
+        "Trades": len(trades),
+        "Skipped": skipped,
+        "Final Equity": round(float(final), 2),
+        "Total Return %": round(float(final / capital - 1) * 100, 2),
+        "CAGR %": round(float((final / capital) ** (1 / years) - 1) * 100, 2) if years > 0 and final > 0 else float("nan"),
+        "Max Drawdown %": round(float(equity['Drawdown %'].min()), 2) if len(equity) else 0.0,
+        "Win Rate %": round(float((trades['P&L $'] > 0).mean() * 100), 1) if len(trades) else float("nan"),
+        "Exposure %": round(float((equity['Positions'] > 0).mean() * 100), 1) if len(equity) else 0.0,
+    }
@@ -0,0 +1,121 @@
+import pandas as pd
+import numpy as np
+
+# Bars for the relative-strength return (~3 months)
+RS_BARS = 63
+# Composite score weights per analyzer (factor -> weight); analyzers not
+# listed use the daily weights
+WEIGHTS = {
+    "daily": {"RS": 1.0, "Pullback": 1.0, "Volume": 1.0},
+    "value": {"Discount": 1.0, "Volume": 1.0},
+}
+DEFAULT_WEIGHTS = WEIGHTS["daily"]
+FACTORS = ["RS", "Pullback", "Volume", "Discount"]
+
+# -----------------------------------------------------------------------------
+# 1. FACTORS (HIGHER = BETTER)
+# -----------------------------------------------------------------------------
+# On any indicator panel from indicators.compute_indicators (bars x tickers):
+#   RS        RS_BARS-bar return; its rank is the strength versus the universe
+#   Pullback  minus the distance from EMA_20 in ATR units (tight pullbacks rank high)
+#   Volume    volume surge, Volume / VOL_20
+#   Discount  discount to the 52-week high
+
+def factor_values(panel):
+    close = panel['Close']
+    return {
+        "RS": close / close.shift(RS_BARS) - 1,
+        "Pullback": -((close - panel['EMA_20']) / panel['ATR']).abs(),
+        "Volume": panel['Volume'] / panel['VOL_20'].where(panel['VOL_20'] > 0),
+        "Discount": (panel['52W_High'] - close) / panel['52W_High'],
+    }
+
+# Tickers x factors on each ticker's latest bar (the bar the analyzers look at)
+def latest_factors(panel):
+    return pd.DataFrame({name: frame.iloc[-1] for name, frame in factor_values(panel).items()})
+
+# -----------------------------------------------------------------------------
+# 2. CROSS-SECTIONAL PERCENTILE RANKS
+# -----------------------------------------------------------------------------
+# Percentile 0-100 within each row (a date, or the latest bars), ties averaged,
+# NaN left out of the ranking. The score is the weighted mean of the factor
+# ranks a ticker has. Histories are ranked per calendar date: the packed panel
+# is scattered onto a dates x tickers grid, every factor is ranked along the
+# rows in one pass and the ranks are gathered back into the packed layout.
+
+def percentile_ranks(values):
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    ranks = pd.DataFrame(values).rank(axis=1, method="average", na_option="keep").to_numpy()
+    valid = (~np.isnan(values)).sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(valid > 1, (ranks - 1) / (valid - 1) * 100, np.where(valid == 1, 100.0, np.nan))
+
+def _score(ranks, weights):
+    total = sum(np.nan_to_num(ranks[name]) * w for name, w in weights.items())
+    norm = sum(~np.isnan(ranks[name]) * w for name, w in weights.items())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(norm > 0, total / norm, np.nan)
+
+# Latest-bar cross-section: tickers x (<factor>_Rank..., Score)
+def rank_latest(factors, weights=DEFAULT_WEIGHTS):
+    ranks = {name: percentile_ranks(factors[name].to_numpy())[0] for name in weights}
+    out = pd.DataFrame({f"{name}_Rank": r for name, r in ranks.items()}, index=factors.index)
+    out["Score"] = _score(ranks, weights)
+    return out
+
+def _grid(panel):
+    dates = panel['Date'].to_numpy(dtype="datetime64[ns]")
+    rows, cols = np.nonzero(~np.isnat(dates))
+    axis, day = np.unique(dates[rows, cols], return_inverse=True)
+    return rows, cols, day, (len(axis), dates.shape[1])
+
+# Per-date ranks over a whole history: {"<factor>_Rank": frame, "Score": frame}
+# in the packed layout of `panel`
+def rank_panel(panel, weights=DEFAULT_WEIGHTS):
+    rows, cols, day, shape = _grid(panel)
+    factors = factor_values(panel)
+    ranks = {}
+    for name in weights:
+        grid = np.full(shape, np.nan)
+        grid[day, cols] = factors[name].to_numpy(dtype=float)[rows, cols]
+        ranked = percentile_ranks(grid)
+        packed = np.full(panel['Close'].shape, np.nan)
+        packed[rows, cols] = ranked[day, cols]
+        ranks[name] = packed
+    tickers = panel['Close'].columns
+    out = {f"{name}_Rank": pd.DataFrame(r, columns=tickers) for name, r in ranks.items()}
+    out["Score"] = pd.DataFrame(_score(ranks, weights), columns=tickers)
+    return out
+
+# -----------------------------------------------------------------------------
+# 3. TOP-K SELECTION
+# -----------------------------------------------------------------------------
+# np.argpartition finds the k best in linear time; only those k are sorted.
+# top_k() drops NaN scores, top_k_mask() ranks unscored signals last.
+
+# Indices of the k highest scores, best first
+def top_k(scores, k):
+    scores = np.where(np.isnan(np.asarray(scores, dtype=float)), -np.inf, scores)
+    if k <= 0: return np.array([], dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    best = best[np.isfinite(scores[best])]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+# signals (packed bars x tickers bools) thinned to the k best-scoring signals
+# of each date
+def top_k_mask(panel, signals, score, k):
+    signals = np.asarray(signals, dtype=bool)
+    rows, cols, day, shape = _grid(panel)
+    grid = np.full(shape, -np.inf)
+    hit = signals[rows, cols]
+    grid[day[hit], cols[hit]] = np.nan_to_num(np.asarray(score, dtype=float)[rows[hit], cols[hit]], nan=-1.0)
+    keep = np.zeros(shape, dtype=bool)
+    if k < shape[1]:
+        best = np.argpartition(-grid, k - 1, axis=1)[:, :k]
+        np.put_along_axis(keep, best, True, axis=1)
+    else:
+        keep[:] = True
+    keep &= np.isfinite(grid)
+    out = np.zeros(signals.shape, dtype=bool)
+    out[rows, cols] = keep[day, cols]
+    return out
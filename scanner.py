@@ -0,0 +1,262 @@
+import os
+import hashlib
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+from clustering import CORR_BARS, CorrelationCache, signal_clusters
+from compact import CompactPanel
+from datacache import SharedPanel
+from datastore import DATA_DIR, FIELDS
+from incremental import load_states, save_states, states_panel, update_states
+from indicators import MIN_BARS, build_panel, compute_indicators, subset_panel
+from metrics import count, stage
+from parallel import run_parallel
+from ranking import DEFAULT_WEIGHTS, FACTORS, RS_BARS, WEIGHTS, latest_factors, rank_latest
+from strategies import ANALYZER_TIMEFRAMES, ANALYZERS, run_analyzers
+
+CACHE_SIZE = 2
+TAIL_ROWS = 5
+
+# -----------------------------------------------------------------------------
+# 1. DATA FINGERPRINT
+# -----------------------------------------------------------------------------
+# New bars, a revised last bar, a backfill or a different ticker set all change
+# the shape, the column list or the last few rows, so hashing those identifies
+# a data version without touching the full history.
+def data_fingerprint(data):
+    digest = hashlib.sha1()
+    digest.update(repr((data.shape, tuple(data.columns), data.index[:1].tolist(), data.index[-TAIL_ROWS:].tolist())).encode())
+    digest.update(np.ascontiguousarray(data.iloc[-TAIL_ROWS:].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+# -----------------------------------------------------------------------------
+# 2. SINGLE-PASS SCAN WITH A PER-VERSION CACHE
+# -----------------------------------------------------------------------------
+# Module state survives Streamlit reruns, so switching tabs or re-clicking a
+# scan for the same data version returns the cached results immediately. Keeps
+# the last CACHE_SIZE versions: packed panel, indicator panels per style and
+# results per analyzer. `data` may also be a compact.CompactPanel, which keeps
+# its own float32 indicator buffers and is scanned block by block, or a
+# datacache.SharedPanel, whose memory-mapped panel and indicators are used
+# as they are (subset when `tickers` differs from the published universe).
+
+_CACHE = OrderedDict()
+
+def _entry(data, tickers):
+    compact, shared = isinstance(data, CompactPanel), isinstance(data, SharedPanel)
+    version = data.fingerprint() if compact else data.version if shared else data_fingerprint(data)
+    key = (version, tuple(dict.fromkeys(tickers)))
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    indicators = {}
+    with stage("build_panel"):
+        if compact: panel = data.select(tickers)
+        elif shared:
+            names = [t for t in dict.fromkeys(tickers) if t in data.ids]
+            panel = data.panel if names == data.tickers else subset_panel(data.panel, names)
+            indicators = {s: ind if names == data.tickers else subset_panel(ind, names) for s, ind in data.indicators.items()}
+        else: panel = build_panel(data, tickers)
+    entry = _CACHE[key] = {"panel": panel, "indicators": indicators, "results": {}}
+    while len(_CACHE) > CACHE_SIZE: _CACHE.popitem(last=False)
+    return entry
+
+# Indicator panel for `style`, computed at most once per data version
+def indicator_panel(data, tickers, style="app"):
+    entry = _entry(data, tickers)
+    if isinstance(entry["panel"], CompactPanel): return entry["panel"].tail_panel(style)
+    if style not in entry["indicators"]:
+        with stage(f"indicators[{style}]"):
+            entry["indicators"][style] = compute_indicators(entry["panel"], style)
+    return entry["indicators"][style]
+
+# {analyzer name: results} for every registered analyzer (or `names`). All
+# missing analyzers run in one pass over the tickers whose data changed since
+# the previous scan (section 3); with workers > 1 that pass is split across
+# processes and only the results are kept (compact panels always run in-process).
+def scan_all(data, tickers, workers=1, names=None):
+    entry = _entry(data, tickers)
+    names = list(names or ANALYZERS)
+    missing = [n for n in names if n not in entry["results"]]
+    if missing:
+        with stage("scan"): entry["results"].update(_rescan(entry, missing, workers))
+    return {n: entry["results"][n] for n in names}
+
+def clear_cache():
+    _CACHE.clear()
+    _TRACKED.clear()
+    _FACTORS.clear()
+    _CORRELATIONS.__init__()
+    _STATES.clear()
+    _UNSAVED.clear()
+
+# -----------------------------------------------------------------------------
+# 3. PER-TICKER DIRTY TRACKING AND SIGNAL DIFFS
+# -----------------------------------------------------------------------------
+# A new data version only re-scans the tickers whose fingerprint moved (last
+# TAIL_ROWS bars, their dates, long enough to scan or not); the rest keep their
+# previous rows, so halted symbols, stale feeds and weekend refreshes cost
+# nothing. A change further back in a ticker's history (backfill, the period
+# window rolling forward) is picked up with its next bar, or after
+# clear_cache(). Each analyzer also keeps the diff between its last two
+# result sets.
+# Every result row gets a "Score": its cross-sectional rank against the whole
+# universe (ranking.py). Ranks move whenever any ticker moves, so they are
+# recomputed on every scan, but the per-ticker factor inputs are cached under
+# the same fingerprints and only recomputed for changed tickers.
+# Rows are also grouped into clusters of correlated signals (clustering.py):
+# "Cluster" names the cluster's representative, the best-scored member, and
+# "Representative" marks it. The universe correlation matrix behind this is
+# kept between scans and moved forward incrementally.
+
+STATUS_RANK = {"WATCH": 0, "BUY": 1, "STRONG BUY": 2, "REVERSAL": 1, "ROCKET REVERSAL": 2}
+
+# analyzer name -> {"fingerprints", "rows", "results", "changes"}
+_TRACKED = {}
+# ticker -> (fingerprint, latest factor values)
+_FACTORS = {}
+_CORRELATIONS = CorrelationCache()
+
+def ticker_fingerprints(panel, rows=TAIL_ROWS):
+    if isinstance(panel, CompactPanel): panel = panel.tail_panel(rows=rows)
+    parts = [panel[f].to_numpy(dtype=float)[-rows:] for f in FIELDS]
+    parts.append(panel['Date'].to_numpy(dtype="datetime64[ns]")[-rows:].view("int64").astype(float))
+    parts.append((panel['Bars'].to_numpy() >= MIN_BARS)[None].astype(float))
+    block = np.ascontiguousarray(np.vstack(parts).T)
+    return {t: hashlib.sha1(row.tobytes()).hexdigest() for t, row in zip(panel['Close'].columns, block)}
+
+def _scan_subset(entry, tickers, names, workers):
+    panel = entry["panel"]
+    if isinstance(panel, CompactPanel): return panel.select(tickers).scan(names)
+    results = {}
+    # Analyzers of the state style read the latest rows of the folded states
+    # (section 4); any other style takes a full indicator pass
+    folded = [n for n in names if ANALYZERS[n][1] == STATE_STYLE] if workers == 1 and _use_states(entry) else []
+    if folded:
+        states = _ticker_states(panel, tickers)
+        results = run_analyzers(states, folded, {STATE_STYLE: states})
+        names = [n for n in names if n not in folded]
+        if not names: return results
+    if len(tickers) < len(panel['Bars']): panel = subset_panel(panel, tickers)
+    if workers > 1: return run_parallel(panel, "scan", workers, names=names)
+    # Indicators already in the entry (stored ones for shared panels) are
+    # reused, cut to the same tickers; the cache itself is only filled when
+    # the whole panel is scanned
+    computed = entry["indicators"] if panel is entry["panel"] else \
+        {s: subset_panel(ind, tickers) for s, ind in entry["indicators"].items()}
+    return {**results, **run_analyzers(panel, names, computed)}
+
+def _rescan(entry, names, workers=1):
+    fingerprints = ticker_fingerprints(entry["panel"])
+    dirty = [t for t, fp in fingerprints.items()
+             if any(_TRACKED.get(n, {}).get("fingerprints", {}).get(t) != fp for n in names)]
+    count("tickers.rescanned", len(dirty))
+    count("tickers.reused", len(fingerprints) - len(dirty))
+    fresh = _scan_subset(entry, dirty, names, workers) if dirty else {n: [] for n in names}
+
+    factors = universe_factors(entry, fingerprints)
+    panel = entry["panel"]
+    _CORRELATIONS.update(panel.tail_panel(rows=CORR_BARS + 1) if isinstance(panel, CompactPanel) else panel)
+    out, dirty = {}, set(dirty)
+    for name in names:
+        old = _TRACKED.get(name)
+        rows = {t: r for t, r in (old or {}).get("rows", {}).items() if t in fingerprints and t not in dirty}
+        rows.update({r["Ticker"]: r for r in fresh[name]})
+        score = rank_latest(factors, WEIGHTS.get(name, DEFAULT_WEIGHTS))["Score"].round(1)
+        hits = [t for t in fingerprints if t in rows]
+        clusters = signal_clusters(_CORRELATIONS, hits, score[hits].to_numpy())
+        results = [{**rows[t], "Score": float(score[t]), "Cluster": clusters[t][0], "Representative": clusters[t][1]}
+                   for t in hits]
+        _TRACKED[name] = {"fingerprints": fingerprints, "rows": rows, "results": results,
+                          "changes": signal_diff(old["results"], results) if old else []}
+        out[name] = results
+    return out
+
+# Latest factor values (tickers x factors) for every ticker in `fingerprints`,
+# recomputed only for tickers whose fingerprint moved
+def universe_factors(entry, fingerprints):
+    stale = [t for t, fp in fingerprints.items() if _FACTORS.get(t, (None,))[0] != fp]
+    if stale:
+        with stage("ranking.factors"):
+            values = _latest_factors(entry, stale)
+            for t, row in zip(values.index, values[FACTORS].to_numpy()): _FACTORS[t] = (fingerprints[t], row)
+    values = np.array([_FACTORS[t][1] for t in fingerprints]).reshape(len(fingerprints), len(FACTORS))
+    return pd.DataFrame(values, index=list(fingerprints), columns=FACTORS)
+
+def _latest_factors(entry, tickers):
+    panel = entry["panel"]
+    if isinstance(panel, CompactPanel): return latest_factors(panel.select(tickers).tail_panel("app", RS_BARS + 1))
+    if _use_states(entry):
+        factors = latest_factors(_ticker_states(panel, tickers))
+        close = panel['Close'][tickers].to_numpy(dtype=float)
+        factors["RS"] = close[-1] / close[-1 - RS_BARS] - 1 if len(close) > RS_BARS else np.nan
+        return factors
+    if "app" not in entry["indicators"]:
+        with stage("indicators[app]"): entry["indicators"]["app"] = compute_indicators(panel, "app")
+    app = entry["indicators"]["app"]
+    return latest_factors(app if len(tickers) == len(panel['Bars']) else subset_panel(app, tickers))
+
+# Rows {Ticker, Change, From, To}: NEW and DROPPED signals, UPGRADE/DOWNGRADE
+# when the status moved (BUY -> STRONG BUY, REVERSAL -> ROCKET REVERSAL, ...)
+def signal_diff(before, after):
+    before = {r["Ticker"]: r["Status"] for r in before or []}
+    after = {r["Ticker"]: r["Status"] for r in after or []}
+    changes = []
+    for ticker, status in after.items():
+        old = before.get(ticker)
+        if old is None: change = "NEW"
+        elif old == status: continue
+        else: change = "UPGRADE" if STATUS_RANK.get(status, 0) > STATUS_RANK.get(old, 0) else "DOWNGRADE"
+        changes.append({"Ticker": ticker, "Change": change, "From": old, "To": status})
+    changes += [{"Ticker": t, "Change": "DROPPED", "From": s, "To": None} for t, s in before.items() if t not in after]
+    return changes
+
+# Diff of the last scan of `name` against the one before it
+def last_changes(name):
+    return _TRACKED.get(name, {}).get("changes", [])
+
+# -----------------------------------------------------------------------------
+# 4. INCREMENTAL INDICATOR STATES
+# -----------------------------------------------------------------------------
+# Per-ticker incremental.IndicatorState objects carry the STATE_STYLE
+# indicators (and the timeframes its analyzers ask for) from one data version
+# to the next: a ticker with new bars folds in just those bars, so a rescan
+# never recomputes full-history indicators, and only new or revised tickers
+# are seeded from the panel. Used for built panels scanned in-process; compact
+# panels keep their block buffers and shared panels bring their indicators.
+# restore_states()/persist_states() carry them across restarts (api.py).
+
+STATE_STYLE = "app"
+STATE_FILE = os.path.join(DATA_DIR, "indicator_states.json")
+
+_STATES = {}
+_UNSAVED = set()
+
+def _use_states(entry):
+    return STATE_STYLE not in entry["indicators"]
+
+def _state_timeframes():
+    return tuple(dict.fromkeys(tf for name, (fn, style) in ANALYZERS.items() if style == STATE_STYLE
+                               for tf in ANALYZER_TIMEFRAMES.get(name, ())))
+
+# Two-row indicator panel (incremental.states_panel) of `tickers`, after
+# folding their new bars into _STATES
+def _ticker_states(panel, tickers):
+    with stage("incremental.update"):
+        _UNSAVED.update(update_states(_STATES, panel, tickers, STATE_STYLE, _state_timeframes()))
+    return states_panel({t: _STATES[t] for t in tickers}, MIN_BARS)
+
+def restore_states(path=STATE_FILE):
+    if not os.path.exists(path): return 0
+    _STATES.update(load_states(path))
+    return len(_STATES)
+
+# Writes _STATES when any state moved since the last restore/persist
+def persist_states(path=STATE_FILE):
+    if not _UNSAVED: return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    save_states(_STATES, path)
+    _UNSAVED.clear()
+    return True
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import numpy as np
+
+import datacache
+import kernels
+from datastore import PriceStore
+from metrics import METRICS, stage
+from parallel import DEFAULT_WORKERS
+from scanner import indicator_panel, scan_all, signal_diff
+from universe import ALL_TICKERS, load_universe
+
+SNAPSHOT_DIR = os.environ.get("UNIALGO_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_FORMAT = 1
+KEEP_SNAPSHOTS = 30
+LATEST = "LATEST"
+SUMMARY_COLUMNS = ["Close", "SMA_200", "EMA_20", "52W_High", "VOL_20", "RSI", "ATR", "ADX"]
+MARKET_TZ = ZoneInfo("America/Toronto")
+
+# -----------------------------------------------------------------------------
+# 1. SNAPSHOTS
+# -----------------------------------------------------------------------------
+# One JSON file per run, named scan_<UTC timestamp>.json: the signals of every
+# registered analyzer, the last-bar indicator summary per ticker, the date of
+# the newest bar, the data fingerprint, the symbols that failed to download and
+# the signal changes against the previous snapshot. LATEST names the newest
+# complete snapshot; it is replaced only after the snapshot itself is on disk,
+# so readers never see a partial file.
+
+def _summary(panel):
+    last = {c: panel[c].iloc[-1] for c in SUMMARY_COLUMNS}
+    frame = pd.DataFrame(last).round(4)
+    frame["Date"] = panel['Date'].iloc[-1].dt.strftime("%Y-%m-%d")
+    frame["Bars"] = panel['Bars']
+    return {t: row for t, row in zip(frame.index, frame.to_dict("records"))}
+
+def take_snapshot(symbols=ALL_TICKERS, period="2y", workers=DEFAULT_WORKERS, root=SNAPSHOT_DIR, store=None):
+    store = store or PriceStore()
+    previous = load_latest(root)
+    with stage("snapshot"):
+        data = load_universe(symbols, period=period, store=store)
+        shared = datacache.publish(data, symbols, failed=store.failed)
+        results = scan_all(shared, symbols, workers)
+        panel = indicator_panel(shared, symbols, "app")
+        created = datetime.datetime.now(datetime.timezone.utc)
+        snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "created": created.isoformat(timespec="seconds"),
+            "data_as_of": data.index[-1].strftime("%Y-%m-%d") if len(data) else None,
+            "data_version": shared.version,
+            "tickers": len(panel['Close'].columns),
+            "failed": store.failed,
+            "results": results,
+            "changes": {n: signal_diff(previous["results"].get(n), rows) for n, rows in results.items()} if previous else {},
+            "summary": _summary(panel) if len(panel['Close'].columns) else {},
+            "metrics": METRICS.to_dict(),
+        }
+        os.makedirs(root, exist_ok=True)
+        name = f"scan_{created:%Y%m%d_%H%M%S}.json"
+        path = os.path.join(root, name)
+        with open(path + ".tmp", "w") as fh: json.dump(snapshot, fh, default=_json_default)
+        os.replace(path + ".tmp", path)
+        with open(os.path.join(root, LATEST + ".tmp"), "w") as fh: fh.write(name)
+        os.replace(os.path.join(root, LATEST + ".tmp"), os.path.join(root, LATEST))
+        prune(root)
+    snapshot["path"] = path
+    return snapshot
+
+def _json_default(value):
+    if isinstance(value, np.generic): return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def latest_path(root=SNAPSHOT_DIR):
+    pointer = os.path.join(root, LATEST)
+    if not os.path.exists(pointer): return None
+    with open(pointer) as fh: path = os.path.join(root, fh.read().strip())
+    return path if os.path.exists(path) else None
+
+def load_snapshot(path):
+    with open(path) as fh: snapshot = json.load(fh)
+    if snapshot.get("format") != SNAPSHOT_FORMAT: return None
+    snapshot["path"] = path
+    return snapshot
+
+def load_latest(root=SNAPSHOT_DIR):
+    path = latest_path(root)
+    return load_snapshot(path) if path else None
+
+def prune(root=SNAPSHOT_DIR, keep=KEEP_SNAPSHOTS):
+    names = sorted(n for n in os.listdir(root) if n.startswith("scan_") and n.endswith(".json"))
+    for name in names[:-keep]: os.remove(os.path.join(root, name))
+
+# -----------------------------------------------------------------------------
+# 2. HEADLESS SCHEDULER
+# -----------------------------------------------------------------------------
+# Daily mode runs on weekdays at --at (market time, after the close); --every
+# adds runs on a fixed interval in between. A failed run is logged and the
+# scheduler keeps going.
+
+def next_daily_run(at, now=None):
+    now = now or datetime.datetime.now(MARKET_TZ)
+    hour, minute = (int(x) for x in at.split(":"))
+    run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if run <= now: run += datetime.timedelta(days=1)
+    while run.weekday() >= 5: run += datetime.timedelta(days=1)
+    return run
+
+def _run_once(args):
+    METRICS.reset()
+    try:
+        snapshot = take_snapshot(period=args.period, workers=args.workers, root=args.root)
+    except Exception as e:
+        print(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} snapshot failed: {e}", flush=True)
+        return False
+    counts = ", ".join(f"{k} {len(v)}" for k, v in snapshot["results"].items())
+    print(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} {os.path.basename(snapshot['path'])} "
+          f"(data as of {snapshot['data_as_of']}): {counts}", flush=True)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every scanner headless and write result snapshots.")
+    parser.add_argument("--once", action="store_true", help="take one snapshot and exit")
+    parser.add_argument("--at", default="16:30", help="daily run time (HH:MM, Toronto/New York time)")
+    parser.add_argument("--every", type=int, default=0, metavar="MINUTES", help="also run every N minutes")
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args()
+
+    kernels.warm_up()
+    if args.once: sys.exit(0 if _run_once(args) else 1)
+    while True:
+        now = datetime.datetime.now(MARKET_TZ)
+        run = next_daily_run(args.at, now)
+        if args.every: run = min(run, now + datetime.timedelta(minutes=args.every))
+        print(f"Next snapshot at {run:%Y-%m-%d %H:%M %Z}", flush=True)
+        time.sleep(max((run - datetime.datetime.now(MARKET_TZ)).total_seconds(), 0))
+        _run_once(args)
@@ -0,0 +1,248 @@
+import inspect
+
+import pandas as pd
+import numpy as np
+
+from indicators import MIN_BARS, compute_indicators
+from metrics import count, stage
+from timeframes import add_timeframes
+
+BACKTEST_MIN_BARS = 220
+
+# -----------------------------------------------------------------------------
+# 1. PER-TICKER LOGIC ENGINES (REFERENCE)
+# -----------------------------------------------------------------------------
+
+# DAILY SWING LOGIC (ORIGINAL 50% / HIGH FREQUENCY MODE)
+def analyze_daily_original(ticker, df):
+    if df.empty or len(df) < MIN_BARS: return None
+    curr = df.iloc[-1]
+    prev = df.iloc[-2]
+
+    # 1. Trend Filter
+    is_uptrend = (curr['Close'] > curr['SMA_200']) and (curr['ADX'] > 15)
+
+    # 2. Pullback Filter
+    dist = (curr['Close'] - curr['EMA_20']) / curr['EMA_20']
+    is_pullback = (abs(dist) < 0.03) and (curr['RSI'] < 60)
+
+    if not (is_uptrend and is_pullback): return None
+
+    # 3. Trigger
+    avg_vol = df['Volume'].rolling(20).mean().iloc[-1]
+    if pd.isna(avg_vol) or avg_vol == 0: avg_vol = 1
+
+    is_trigger = (curr['Close'] > prev['High']) or (curr['Close'] > curr['Open'])
+    vol_ok = curr['Volume'] > (avg_vol * 0.7)
+    vol_strong = curr['Volume'] > avg_vol
+
+    status = "WATCH"
+    reason = "Setup Valid"
+
+    if is_trigger and vol_ok:
+        status = "BUY"
+        reason = "Standard Swing Setup"
+        if (curr['ADX'] > 20) and vol_strong and (curr['Close'] > prev['High']):
+            status = "STRONG BUY"
+            reason = "🔥 High Conviction"
+
+    if status != "WATCH":
+        stop = curr['Close'] - (2 * curr['ATR'])
+        target = curr['Close'] + (3 * curr['ATR'])
+        return {
+            "Ticker": ticker, "Status": status, "Price": curr['Close'],
+            "Stop": stop, "Target": target, "RSI": curr['RSI'], "Reason": reason
+        }
+    return None
+
+# DEEP VALUE / BOTTOM FISHING LOGIC
+def analyze_deep_value(ticker, df):
+    if df.empty or len(df) < MIN_BARS: return None
+    curr = df.iloc[-1]
+
+    # 1. OVERALL WEAKNESS: RSI < 45
+    if curr['RSI'] >= 45: return None
+
+    # 2. LIQUIDITY (Approx > $500k volume traded today)
+    # Important for TSX.V to avoid 0 volume stocks
+    if (curr['Close'] * curr['Volume']) < 500000: return None
+
+    # 3. MOMENTUM
+    avg_vol = df['Volume'].rolling(20).mean().iloc[-1]
+    is_green = curr['Close'] > curr['Open']
+    has_momentum = (curr['Volume'] > avg_vol) and is_green
+
+    if not has_momentum: return None
+
+    # 4. ROCKET FLAG (>30% discount from 52W High)
+    high_52 = curr['52W_High']
+    discount = (high_52 - curr['Close']) / high_52
+    is_deep_value = discount >= 0.30
+
+    status = "REVERSAL"
+    reason = "RSI < 45 + Vol Buy"
+
+    if is_deep_value:
+        status = "ROCKET REVERSAL"
+        reason = "🚀 Deep Discount (>30% off High)"
+
+    stop = curr['Low'] - (1 * curr['ATR'])
+    target = curr['Close'] + (3 * curr['ATR'])
+
+    return {
+        "Ticker": ticker, "Status": status, "Price": curr['Close'],
+        "Stop": stop, "Target": target, "RSI": curr['RSI'], "Reason": reason,
+        "Discount": discount * 100
+    }
+
+# -----------------------------------------------------------------------------
+# 2. WHOLE-UNIVERSE MASKS (PANEL FROM indicators.compute_indicators)
+# -----------------------------------------------------------------------------
+# Same decisions as the per-ticker engines, evaluated on the last row of every
+# column at once. NaN handling mirrors the scalar code: a failed comparison is
+# False, so "return None if x >= 45" becomes "keep ~(x >= 45)".
+
+# Registered analyzers: name -> (panel scanner, indicator style). Every analyzer
+# registered here is fed by run_analyzers() from one indicator pass per style.
+# `timeframes` (e.g. ("W",)) adds the weekly/monthly columns of timeframes.py
+# ("W_Close", "W_EMA_20", "W_ADX", ...) to the panel it receives.
+ANALYZERS = {}
+ANALYZER_TIMEFRAMES = {}
+
+def register_analyzer(name, style="app", timeframes=()):
+    def wrap(fn):
+        ANALYZERS[name] = (fn, style)
+        ANALYZER_TIMEFRAMES[name] = tuple(timeframes)
+        return fn
+    return wrap
+
+def _avg_volume(avg_vol):
+    return avg_vol.where(avg_vol.notna() & (avg_vol != 0), 1)
+
+def _signal_rows(mask, columns):
+    frame = pd.DataFrame(columns)[mask]
+    return [{"Ticker": ticker, **row} for ticker, row in zip(frame.index, frame.to_dict("records"))]
+
+@register_analyzer("daily")
+def scan_daily_original(panel):
+    if panel['Close'].empty: return []
+    curr = {k: v.iloc[-1] for k, v in panel.items() if isinstance(v, pd.DataFrame)}
+    prev_high = panel['High'].shift().iloc[-1]
+    close = curr['Close']
+
+    is_uptrend = (close > curr['SMA_200']) & (curr['ADX'] > 15)
+    dist = (close - curr['EMA_20']) / curr['EMA_20']
+    is_pullback = (dist.abs() < 0.03) & (curr['RSI'] < 60)
+
+    avg_vol = _avg_volume(curr['VOL_20'])
+    is_trigger = (close > prev_high) | (close > curr['Open'])
+    vol_ok = curr['Volume'] > (avg_vol * 0.7)
+    vol_strong = curr['Volume'] > avg_vol
+
+    buy = (panel['Bars'] >= MIN_BARS) & is_uptrend & is_pullback & is_trigger & vol_ok
+    strong = buy & (curr['ADX'] > 20) & vol_strong & (close > prev_high)
+
+    return _signal_rows(buy, {
+        "Status": np.where(strong, "STRONG BUY", "BUY"), "Price": close,
+        "Stop": close - (2 * curr['ATR']), "Target": close + (3 * curr['ATR']),
+        "RSI": curr['RSI'], "Reason": np.where(strong, "🔥 High Conviction", "Standard Swing Setup")
+    })
+
+@register_analyzer("value")
+def scan_deep_value(panel):
+    if panel['Close'].empty: return []
+    curr = {k: v.iloc[-1] for k, v in panel.items() if isinstance(v, pd.DataFrame)}
+    close = curr['Close']
+
+    weak = ~(curr['RSI'] >= 45)
+    liquid = ~((close * curr['Volume']) < 500000)
+    has_momentum = (curr['Volume'] > curr['VOL_20']) & (close > curr['Open'])
+    hit = (panel['Bars'] >= MIN_BARS) & weak & liquid & has_momentum
+
+    discount = (curr['52W_High'] - close) / curr['52W_High']
+    rocket = discount >= 0.30
+    reason = np.where(rocket, "🚀 Deep Discount (>30% off High)", "RSI < 45 + Vol Buy")
+    return _signal_rows(hit, {
+        "Status": np.where(rocket, "ROCKET REVERSAL", "REVERSAL"), "Price": close,
+        "Stop": curr['Low'] - (1 * curr['ATR']), "Target": close + (3 * curr['ATR']),
+        "RSI": curr['RSI'], "Reason": reason, "Discount": discount * 100
+    })
+
+# Higher-timeframe trend confirmation: the last completed weekly (or monthly)
+# bar closed above its EMA_20 with a DMI ADX above adx_min
+def timeframe_uptrend(panel, tf="W", adx_min=20):
+    return (panel[f'{tf}_Close'] > panel[f'{tf}_EMA_20']) & (panel[f'{tf}_ADX'] > adx_min)
+
+# Daily swing setups the weekly trend agrees with
+@register_analyzer("daily_weekly", timeframes=("W",))
+def scan_daily_weekly(panel):
+    rows = scan_daily_original(panel)
+    if not rows: return []
+    confirmed = timeframe_uptrend(panel, "W").iloc[-1]
+    weekly_adx = panel['W_ADX'].iloc[-1]
+    return [{**r, "W ADX": float(weekly_adx[r["Ticker"]])} for r in rows if confirmed[r["Ticker"]]]
+
+# panel: packed OHLCV from indicators.build_panel. `computed` maps style ->
+# indicator panel and is filled in place, so callers can keep it as a cache.
+def run_analyzers(panel, names=None, computed=None):
+    computed = {} if computed is None else computed
+    results = {}
+    count("tickers.short_history", int((panel['Bars'] < MIN_BARS).sum()))
+    for name in names or ANALYZERS:
+        fn, style = ANALYZERS[name]
+        if style not in computed:
+            with stage(f"indicators[{style}]"): computed[style] = compute_indicators(panel, style)
+        timeframes = ANALYZER_TIMEFRAMES.get(name, ())
+        if timeframes:
+            with stage(f"timeframes[{''.join(timeframes)}]"):
+                computed[style] = add_timeframes(computed[style], timeframes)
+        with stage(f"analyzer[{name}]"): results[name] = fn(computed[style])
+    return results
+
+# -----------------------------------------------------------------------------
+# 3. FULL-HISTORY RULES (EVERY BAR OF EVERY TICKER, BARS x TICKERS BOOLS)
+# -----------------------------------------------------------------------------
+# Defaults are the live thresholds; sweep.py varies them.
+
+# BACKTEST RULES: STRONG BUY (`confirm` = timeframes whose trend must agree,
+# the panel needs their columns from timeframes.add_timeframes)
+def strong_buy_mask(panel, adx_min=15, ema_band=0.03, rsi_max=60, vol_basic=0.7, adx_strong=25, vol_strong=1.0,
+                    confirm=()):
+    close = panel['Close']
+    prev_high = panel['High'].shift()
+
+    # 1. Base Gates
+    is_uptrend = (close > panel['SMA_200']) & (panel['ADX'] > adx_min)
+    dist_to_ema = (close - panel['EMA_20']) / panel['EMA_20']
+    is_pullback = (dist_to_ema.abs() < ema_band) & (panel['RSI'] < rsi_max)
+
+    # 2. Trigger Logic
+    avg_vol = _avg_volume(panel['VOL_20'])
+    basic_trigger = (close > panel['Open']) | (close > prev_high)
+    basic_vol = panel['Volume'] > (avg_vol * vol_basic)
+    strong_trend = panel['ADX'] > adx_strong
+    strong_trigger = close > prev_high
+    strong_vol = panel['Volume'] > (avg_vol * vol_strong)
+
+    mask = is_uptrend & is_pullback & basic_trigger & basic_vol & strong_trend & strong_trigger & strong_vol
+    for tf in confirm: mask &= timeframe_uptrend(panel, tf)
+    return mask & (panel['Bars'] >= BACKTEST_MIN_BARS).to_numpy()
+
+# DEEP VALUE REVERSALS (min_discount > 0 keeps only the deeper "rocket" setups)
+def deep_value_mask(panel, rsi_max=45, min_dollar_volume=500000, min_discount=0.0):
+    close = panel['Close']
+    weak = ~(panel['RSI'] >= rsi_max)
+    liquid = ~((close * panel['Volume']) < min_dollar_volume)
+    has_momentum = (panel['Volume'] > panel['VOL_20']) & (close > panel['Open'])
+    discount = ((panel['52W_High'] - close) / panel['52W_High']).fillna(0)
+    mask = weak & liquid & has_momentum & (discount >= min_discount)
+    return mask & (panel['Bars'] >= MIN_BARS).to_numpy()
+
+# Sweep defaults: each mask's keyword defaults plus the ATR exit multiples of
+# its live scan (Stop/Target above)
+def _mask_defaults(mask, **exits):
+    params = inspect.signature(mask).parameters.values()
+    return {**{p.name: p.default for p in params if isinstance(p.default, (int, float))}, **exits}
+
+STRONG_BUY_PARAMS = _mask_defaults(strong_buy_mask, stop_atr=2, target_atr=3)
+DEEP_VALUE_PARAMS = _mask_defaults(deep_value_mask, stop_atr=1, target_atr=3)
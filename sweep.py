@@ -0,0 +1,175 @@
+import os
+import argparse
+import itertools
+import datetime
+
+import pandas as pd
+import numpy as np
+
+from datastore import PriceStore
+from indicators import build_panel, compute_indicators
+from strategies import BACKTEST_MIN_BARS, MIN_BARS, STRONG_BUY_PARAMS, DEEP_VALUE_PARAMS
+from trades import STOPPED, TARGET, resolve_exits
+from universe import UNIVERSE, load_universe
+
+RESULTS_DIR = os.environ.get("UNIALGO_RESULTS_DIR", "results")
+BATCH_SIZE = 256
+
+# -----------------------------------------------------------------------------
+# 1. STRATEGY SPECS
+# -----------------------------------------------------------------------------
+# Each rule is (feature, op, param[, scale feature]): the bar passes when
+# op(feature, param * scale) holds. Every op is monotonic in the parameter, so
+# the loosest value in the grid gives a candidate set that every combination
+# filters further. Same NaN semantics as strategies.strong_buy_mask and
+# strategies.deep_value_mask ("!>=" is "not >=", which lets NaN through).
+
+OPS = {
+    ">": np.greater, ">=": np.greater_equal, "<": np.less,
+    "!>=": lambda a, b: ~(a >= b), "!<": lambda a, b: ~(a < b),
+}
+LOOSEST = {">": min, ">=": min, "!<": min, "<": max, "!>=": max}
+
+def _strong_buy_features(panel):
+    close = panel['Close']
+    avg_vol = panel['VOL_20'].where(panel['VOL_20'].notna() & (panel['VOL_20'] != 0), 1)
+    fixed = (close > panel['SMA_200']) & (close > panel['High'].shift())
+    fixed &= (panel['Bars'] >= BACKTEST_MIN_BARS).to_numpy()
+    return fixed, {
+        "ADX": panel['ADX'], "RSI": panel['RSI'], "Volume": panel['Volume'], "AVG_VOL": avg_vol,
+        "DIST": ((close - panel['EMA_20']) / panel['EMA_20']).abs(),
+    }
+
+def _deep_value_features(panel):
+    close = panel['Close']
+    fixed = (panel['Volume'] > panel['VOL_20']) & (close > panel['Open'])
+    fixed &= (panel['Bars'] >= MIN_BARS).to_numpy()
+    return fixed, {
+        "RSI": panel['RSI'], "DOLLAR_VOL": close * panel['Volume'],
+        "DISCOUNT": ((panel['52W_High'] - close) / panel['52W_High']).fillna(0),
+    }
+
+STRATEGIES = {
+    "strong_buy": {
+        "style": "backtest", "stop_from": "Close", "features": _strong_buy_features,
+        "defaults": STRONG_BUY_PARAMS,
+        "rules": [("ADX", ">", "adx_min"), ("DIST", "<", "ema_band"), ("RSI", "<", "rsi_max"),
+                  ("Volume", ">", "vol_basic", "AVG_VOL"), ("ADX", ">", "adx_strong"),
+                  ("Volume", ">", "vol_strong", "AVG_VOL")],
+        "grid": {"adx_min": [15, 20], "ema_band": [0.02, 0.03, 0.05], "rsi_max": [50, 60, 70],
+                 "vol_basic": [0.7], "adx_strong": [20, 25, 30], "vol_strong": [1.0, 1.5],
+                 "stop_atr": [1.5, 2, 3], "target_atr": [2, 3, 4]},
+    },
+    "deep_value": {
+        "style": "app", "stop_from": "Low", "features": _deep_value_features,
+        "defaults": DEEP_VALUE_PARAMS,
+        "rules": [("RSI", "!>=", "rsi_max"), ("DOLLAR_VOL", "!<", "min_dollar_volume"),
+                  ("DISCOUNT", ">=", "min_discount")],
+        "grid": {"rsi_max": [30, 35, 40, 45, 50], "min_dollar_volume": [250000, 500000, 1000000],
+                 "min_discount": [0.0, 0.2, 0.3, 0.4], "stop_atr": [1, 1.5, 2], "target_atr": [2, 3, 4]},
+    },
+}
+
+# -----------------------------------------------------------------------------
+# 2. SWEEP ENGINE
+# -----------------------------------------------------------------------------
+
+def _combinations(spec, grid):
+    grid = {**{k: [v] for k, v in spec["defaults"].items()}, **(grid or spec["grid"])}
+    names = list(grid)
+    return pd.DataFrame(list(itertools.product(*grid.values())), columns=names)
+
+# panel: packed OHLCV from indicators.build_panel. Indicators are computed once;
+# every combination is then scored on the same candidate-bar vectors, BATCH_SIZE
+# combinations at a time. Stats match run_backtest (P&L % rounded to 2dp).
+def run_sweep(panel, strategy="strong_buy", grid=None, first_row=0):
+    spec = STRATEGIES[strategy]
+    combos = _combinations(spec, grid)
+    panel = compute_indicators(panel, style=spec["style"])
+    fixed, features = spec["features"](panel)
+
+    # Candidate bars: pass the fixed gates and every rule at its loosest setting
+    candidates = fixed.to_numpy().copy()
+    candidates[:max(first_row, 0)] = False
+    candidates[-1] = False
+    for feature, op, param, *scale in spec["rules"]:
+        loosest = LOOSEST[op](combos[param])
+        bound = loosest * features[scale[0]].to_numpy() if scale else loosest
+        candidates &= OPS[op](features[feature].to_numpy(), bound)
+    cols, rows = np.nonzero(candidates.T)
+    vectors = {k: v.to_numpy()[rows, cols] for k, v in features.items()}
+
+    # One exit resolution per (stop, target) pair, shared by all combinations
+    close, high, low = (panel[f].to_numpy() for f in ("Close", "High", "Low"))
+    entry, atr = close[rows, cols], panel['ATR'].to_numpy()[rows, cols]
+    base = panel[spec["stop_from"]].to_numpy()[rows, cols]
+    pairs = combos[["stop_atr", "target_atr"]].drop_duplicates().reset_index(drop=True)
+    pnl = np.empty((len(pairs), len(rows)))
+    for k, (stop_atr, target_atr) in enumerate(pairs.itertuples(index=False)):
+        stop, target = base - stop_atr * atr, entry + target_atr * atr
+        outcome, _ = resolve_exits(low, high, rows, cols, stop, target)
+        exit_price = np.select([outcome == STOPPED, outcome == TARGET], [stop, target], close[-1, cols])
+        pnl[k] = np.round((exit_price - entry) / entry * 100, 2)
+    pair_index = combos.merge(pairs.reset_index(), on=["stop_atr", "target_atr"], how="left")["index"].to_numpy()
+
+    trades = np.zeros(len(combos), dtype=int)
+    total = np.zeros(len(combos))
+    wins = np.zeros(len(combos), dtype=int)
+    for lo in range(0, len(combos), BATCH_SIZE):
+        batch = combos.iloc[lo:lo + BATCH_SIZE]
+        mask = np.ones((len(batch), len(rows)), dtype=bool)
+        for feature, op, param, *scale in spec["rules"]:
+            bound = batch[param].to_numpy()[:, None]
+            if scale: bound = bound * vectors[scale[0]][None, :]
+            mask &= OPS[op](vectors[feature][None, :], bound)
+        returns = pnl[pair_index[lo:lo + BATCH_SIZE]]
+        trades[lo:lo + BATCH_SIZE] = mask.sum(axis=1)
+        total[lo:lo + BATCH_SIZE] = np.where(mask, returns, 0).sum(axis=1)
+        wins[lo:lo + BATCH_SIZE] = (mask & (returns > 0)).sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        combos["Trades"] = trades
+        combos["Win Rate %"] = np.round(wins / trades * 100, 1)
+        combos["Avg Return %"] = np.round(total / trades, 3)
+    return combos
+
+def rank_results(results, min_trades=30, by="Avg Return %"):
+    eligible = results["Trades"] >= min_trades
+    ranked = results.assign(_eligible=eligible).sort_values(
+        ["_eligible", by, "Win Rate %", "Trades"], ascending=False, kind="stable")
+    return ranked.drop(columns="_eligible").reset_index(drop=True)
+
+# -----------------------------------------------------------------------------
+# 3. CLI
+# -----------------------------------------------------------------------------
+
+def _parse_grid(items):
+    grid = {}
+    for item in items or []:
+        name, values = item.split("=", 1)
+        grid[name] = [float(v) for v in values.split(",")]
+    return grid
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid-search strategy thresholds over one indicator pass.")
+    parser.add_argument("--strategy", choices=list(STRATEGIES), default="strong_buy")
+    parser.add_argument("--period", default="5y", help="history to load, e.g. 2y or 10y")
+    parser.add_argument("--lookback", type=int, default=0, help="recent bars to enter on, 0 = full history")
+    parser.add_argument("--grid", nargs="*", metavar="PARAM=V1,V2", help="override grid values (others use the default grid)")
+    parser.add_argument("--min-trades", type=int, default=30, help="combinations with fewer trades rank last")
+    parser.add_argument("--out", help="CSV path (default results/sweep_<strategy>_<timestamp>.csv)")
+    args = parser.parse_args()
+
+    store = PriceStore()
+    panel = build_panel(load_universe(UNIVERSE, period=args.period, store=store), UNIVERSE)
+    if store.failed: print(f"Failed to download {len(store.failed)} symbols: {', '.join(sorted(store.failed))}")
+
+    grid = {**STRATEGIES[args.strategy]["grid"], **_parse_grid(args.grid)}
+    first_row = len(panel['Close']) - args.lookback if args.lookback else 0
+    ranked = rank_results(run_sweep(panel, args.strategy, grid, first_row), args.min_trades)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"sweep_{args.strategy}_{datetime.datetime.now():%Y%m%d_%H%M%S}.csv")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    ranked.to_csv(out, index=False)
+    print(ranked.head(20).to_string(index=False))
+    print(f"{len(ranked)} combinations written to {out}")
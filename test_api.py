@@ -0,0 +1,56 @@
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from api import MAX_BARS, Handler, ScanService, history_rows, serve
+from indicators import build_panel
+from scanner import clear_cache, data_fingerprint
+
+@pytest.fixture
+def service(data, tickers):
+    clear_cache()
+    svc = ScanService(tickers, refresh=3600)
+    svc.data, svc.version, svc.loaded = data, data_fingerprint(data), time.time()
+    svc.rows = history_rows(data)
+    yield svc
+    clear_cache()
+
+def _get(service, path, **query):
+    handler = Handler.__new__(Handler)
+    handler.service = service
+    route, fn = handler._route([p for p in path.split("/") if p], {k: str(v) for k, v in query.items()})
+    return json.loads(service.get(route, fn)[1])
+
+@pytest.mark.parametrize("query", [{"bars": 0}, {"bars": -1}, {"bars": MAX_BARS + 1}, {"bars": "x"}])
+def test_ticker_rejects_bad_bars(service, tickers, query):
+    with pytest.raises(ValueError): _get(service, f"ticker/{tickers[0]}", **query)
+
+def test_backtest_lookback_range(service, data, tickers):
+    rows = len(build_panel(data, tickers)['Close'])
+    for lookback in (-1, rows + 1):
+        with pytest.raises(ValueError): _get(service, "backtest", lookback=lookback)
+    assert len(service.cache) == 0
+    full = _get(service, "backtest", lookback=0)
+    assert _get(service, "backtest", lookback=rows)["summary"] == full["summary"]
+    assert _get(service, "ticker/" + tickers[0], bars=MAX_BARS)["rows"]
+
+# Errors inside a route's computation come back as 500 JSON, not a dropped
+# connection
+def test_server_errors_are_json(service, monkeypatch):
+    def broken(data, lookback, trades): raise RuntimeError("boom")
+    monkeypatch.setattr(service, "backtest", broken)
+    server = serve(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        for path, status in [("/backtest?lookback=5", 500), ("/backtest?lookback=-1", 400)]:
+            with pytest.raises(urllib.error.HTTPError) as e: urllib.request.urlopen(base + path)
+            assert e.value.code == status
+            assert "error" in json.loads(e.value.read())
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from clustering import CORR_THRESHOLD, CorrelationCache, cluster_trades, leader_clusters, return_window
+from indicators import build_panel, compute_indicators
+from strategies import deep_value_mask
+from trades import backtest_trades
+
+def _assert_corr(cache, panel, tickers):
+    rebuilt = CorrelationCache()
+    rebuilt.update(panel)
+    got = cache.correlation(tickers)
+    np.testing.assert_allclose(got, rebuilt.correlation(tickers), rtol=0, atol=1e-9, equal_nan=True)
+    ref = pd.DataFrame(return_window(panel)[1]).corr().to_numpy()
+    np.testing.assert_allclose(got, ref, rtol=0, atol=1e-9, equal_nan=True)
+
+# Moved forward one bar at a time (and with the last bar revised), the cached
+# matrix equals a rebuild and pandas on the same returns window
+def test_cache_updates_match_rebuild(data, tickers):
+    cache, updated = CorrelationCache(), 0
+    for cut in range(300, len(data) + 1):
+        panel = build_panel(data.iloc[:cut], tickers)
+        cache.update(panel)
+        updated += cache.updates > 0
+        _assert_corr(cache, panel, tickers)
+    assert updated
+    revised = data.copy()
+    revised.loc[data.index[-1], (tickers[0], "Close")] *= 1.05
+    panel = build_panel(revised, tickers)
+    updates = cache.updates
+    cache.update(panel)
+    assert cache.updates == updates + 1
+    _assert_corr(cache, panel, tickers)
+
+# Exactly one representative per cluster: the member with the best priority,
+# correlated with every other member at the threshold or more
+@pytest.mark.parametrize("threshold", [0.0, 0.3, CORR_THRESHOLD])
+def test_leader_clusters(data, tickers, threshold):
+    corr = pd.DataFrame(return_window(build_panel(data, tickers))[1]).corr().to_numpy()
+    rng = np.random.default_rng(2)
+    priority = rng.normal(size=len(tickers))
+    priority[rng.choice(len(tickers), 5, replace=False)] = np.nan
+    labels = leader_clusters(corr, priority, threshold)
+    ranked = np.nan_to_num(priority, nan=-np.inf)
+    for lead in np.unique(labels):
+        members = np.flatnonzero(labels == lead)
+        assert [k for k in members if labels[k] == k] == [lead]
+        assert ranked[lead] == ranked[members].max()
+        assert (corr[lead, members[members != lead]] >= threshold).all()
+    if threshold > 0.0: assert len(np.unique(labels)) > 1
+
+# Same per entry date in the backtest's trade list
+@pytest.mark.parametrize("threshold", [0.0, 0.3])
+def test_cluster_trades(data, tickers, threshold):
+    panel = compute_indicators(build_panel(data, tickers), "backtest")
+    table = cluster_trades(panel, backtest_trades(panel, deep_value_mask(panel), stop_atr=1, stop_from="Low"),
+                           threshold=threshold)
+    assert (~table["Representative"]).any()
+    for _, day in table.groupby(["Entry Date", "Cluster"]):
+        assert day["Representative"].sum() == 1
+        assert day.loc[day["Representative"], "Ticker"].item() == day["Cluster"].iloc[0]
@@ -0,0 +1,50 @@
+import numpy as np
+
+from compact import INDICATORS, CompactPanel
+from datastore import split_download
+from indicators import build_panel, compute_indicators
+from strategies import run_analyzers
+
+# float32 prices keep ~7 significant digits
+RTOL = 1e-4
+
+def test_frame_round_trip(data, tickers):
+    compact = CompactPanel.from_frame(data, tickers)
+    for ticker, df in split_download(data, tickers).items():
+        np.testing.assert_allclose(compact.frame(ticker).to_numpy(), df.to_numpy(), rtol=1e-6)
+        assert (compact.frame(ticker).index == df.index).all()
+
+def test_tail_panel_matches_float64(data, tickers):
+    compact = CompactPanel.from_frame(data, tickers)
+    for style in ["app", "backtest"]:
+        ref = compute_indicators(build_panel(data, tickers), style)
+        tail = compact.tail_panel(style, rows=3)
+        assert (tail['Bars'] == ref['Bars']).all()
+        for col in ["Close", "Date"] + INDICATORS:
+            got, want = tail[col].to_numpy(), ref[col].to_numpy()[-3:]
+            if col == "Date": assert (got == want).all()
+            else: np.testing.assert_allclose(got, want, rtol=RTOL, atol=1e-3, equal_nan=True, err_msg=col)
+
+def test_scan_matches_float64(data, tickers):
+    found = 0
+    for cut in range(300, len(data) + 1, 25):
+        window = data.iloc[:cut]
+        got = CompactPanel.from_frame(window, tickers).scan()
+        ref = run_analyzers(build_panel(window, tickers))
+        for name, rows in ref.items():
+            assert [(r["Ticker"], r["Status"]) for r in got[name]] == [(r["Ticker"], r["Status"]) for r in rows]
+            for a, b in zip(got[name], rows):
+                np.testing.assert_allclose(a["Price"], b["Price"], rtol=RTOL)
+                np.testing.assert_allclose(a["RSI"], b["RSI"], rtol=RTOL, atol=1e-3)
+            found += len(rows)
+    assert found
+
+# Timeframe buffers from one call survive a later call without them, and the
+# other way round
+def test_compute_in_either_order(data, tickers):
+    ref = CompactPanel.from_frame(data, tickers).compute("backtest", ("W",))
+    for calls in [[(), ("W",)], [("W",), ()], [("W",), ("M",), ()]]:
+        compact = CompactPanel.from_frame(data, tickers)
+        for timeframes in calls: buffers = compact.compute("backtest", timeframes)
+        for name, buf in ref.items():
+            np.testing.assert_array_equal(buffers[name], buf, err_msg=name)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datastore import FIELDS, ChunkedFetcher, FixtureProvider, PriceStore, period_start, split_download
+
+# The conftest universe moved to end today, a few of its symbols as fixture CSVs
+@pytest.fixture
+def frames(data, tickers):
+    shifted = data.set_axis(pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=len(data), name="Date"))
+    return split_download(shifted, tickers[:6])
+
+def _write(root, frames, end=None):
+    for ticker, df in frames.items():
+        df = df if end is None else df[df.index <= end]
+        df.to_csv(root / f"{ticker}.csv")
+
+def _store(tmp_path, retries=2):
+    fetcher = ChunkedFetcher(FixtureProvider(str(tmp_path / "fixtures")), chunk_size=4, rate=0,
+                             retries=retries, backoff=0)
+    return PriceStore(str(tmp_path / "store"), fetcher), fetcher
+
+def _stored(store, ticker):
+    records = store.read(ticker)
+    return pd.DataFrame({f: records[f] for f in FIELDS}, index=pd.DatetimeIndex(records["Date"]))
+
+# A second update re-fetches from the last stored bar: the revised bar is
+# overwritten, new bars are appended, nothing is doubled or lost
+def test_delta_update(tmp_path, frames):
+    (tmp_path / "fixtures").mkdir()
+    cut = next(iter(frames.values())).index[-20]
+    _write(tmp_path / "fixtures", frames, cut)
+    store, _ = _store(tmp_path)
+    assert sorted(store.update(list(frames), "2y")) == sorted(frames)
+
+    revised = {t: df.assign(Close=df['Close'].where(df.index != cut, df['Close'] * 1.01)) for t, df in frames.items()}
+    _write(tmp_path / "fixtures", revised)
+    store.update(list(frames), "2y")
+    for ticker, df in revised.items():
+        got = _stored(store, ticker)
+        assert got.index.is_unique and got.index.is_monotonic_increasing
+        pd.testing.assert_frame_equal(got, df.astype(float).set_axis(df.index.as_unit("ns")), check_names=False,
+                                      check_freq=False)
+
+# A longer period than the one on record re-fetches the whole history
+def test_backfill(tmp_path, frames):
+    (tmp_path / "fixtures").mkdir()
+    _write(tmp_path / "fixtures", frames)
+    store, _ = _store(tmp_path)
+    ticker, df = next(iter(frames.items()))
+    store.update([ticker], "3mo")
+    short = len(_stored(store, ticker))
+    assert 0 < short < len(df)
+    store.update([ticker], "5y")
+    assert len(_stored(store, ticker)) == len(df)
+    assert PriceStore(str(tmp_path / "store"), store.provider).meta[ticker] == period_start("5y").strftime("%Y-%m-%d")
+
+def test_missing_symbol_fails_after_retries(tmp_path, frames):
+    (tmp_path / "fixtures").mkdir()
+    _write(tmp_path / "fixtures", frames)
+    store, fetcher = _store(tmp_path, retries=3)
+    store.update(list(frames) + ["NOPE"], "2y")
+    assert list(store.failed) == ["NOPE"]
+    assert store.failed["NOPE"] == "no data returned"
+    assert fetcher.stats["retries"] == 3
+    assert store.read("NOPE") is None
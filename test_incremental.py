@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import scanner
+from datastore import split_download
+from incremental import (COLUMNS, IndicatorState, load_states, save_states, seed_states, states_panel,
+                         update_states)
+from indicators import MIN_BARS, build_panel, compute_indicators
+from strategies import run_analyzers
+from timeframes import add_timeframes, timeframe_columns
+
+TIMEFRAMES = ("W",)
+CHECKED = COLUMNS + timeframe_columns(TIMEFRAMES)
+
+def _assert_panels(got, ref):
+    for col in CHECKED:
+        frame = ref[col][got[col].columns]
+        np.testing.assert_allclose(got[col].to_numpy(), frame.to_numpy()[-2:], rtol=1e-8, atol=1e-8,
+                                   equal_nan=True, err_msg=col)
+
+# Latest two rows of the batch indicators with the weekly columns, per ticker
+def _reference(data, tickers, style):
+    panel = build_panel(data, tickers)
+    return add_timeframes(compute_indicators(panel, style, min_bars=0), TIMEFRAMES)
+
+@pytest.mark.parametrize("style", ["app", "backtest"])
+def test_replay_and_seed_match_batch(data, tickers, style):
+    ref = _reference(data, tickers, style)
+    replayed = {t: IndicatorState(style, TIMEFRAMES).extend(df) for t, df in split_download(data, tickers).items()}
+    _assert_panels(states_panel(replayed), ref)
+    _assert_panels(states_panel(seed_states(build_panel(data, tickers), style, TIMEFRAMES)), ref)
+
+@pytest.mark.parametrize("style", ["app", "backtest"])
+def test_fold_new_bars(data, tickers, style):
+    states = seed_states(build_panel(data.iloc[:-7], tickers), style, TIMEFRAMES)
+    changed = update_states(states, build_panel(data, tickers), style=style, timeframes=TIMEFRAMES)
+    assert changed
+    _assert_panels(states_panel(states), _reference(data, tickers, style))
+    assert not update_states(states, build_panel(data, tickers), style=style, timeframes=TIMEFRAMES)
+
+def test_min_bars_gate(data, tickers):
+    states = seed_states(build_panel(data, tickers))
+    got, ref = states_panel(states, MIN_BARS), compute_indicators(build_panel(data, tickers))
+    for col in COLUMNS:
+        np.testing.assert_allclose(got[col].to_numpy()[-1], ref[col][got[col].columns].to_numpy()[-1],
+                                   rtol=1e-8, atol=1e-8, equal_nan=True, err_msg=col)
+
+def test_json_round_trip(data, tickers, tmp_path):
+    states = seed_states(build_panel(data.iloc[:-3], tickers), "backtest", TIMEFRAMES)
+    save_states(states, str(tmp_path / "states.json"))
+    loaded = load_states(str(tmp_path / "states.json"))
+    panel = build_panel(data, tickers)
+    update_states(states, panel, style="backtest", timeframes=TIMEFRAMES)
+    update_states(loaded, panel, style="backtest", timeframes=TIMEFRAMES)
+    a, b = states_panel(states), states_panel(loaded)
+    for col in CHECKED: np.testing.assert_array_equal(a[col].to_numpy(), b[col].to_numpy(), err_msg=col)
+
+def _rows(results):
+    return {n: [{k: v if isinstance(v, str) else round(float(v), 6) for k, v in r.items()} for r in rows]
+            for n, rows in results.items()}
+
+# The scanner's app-style analyzers run on folded states; results match a
+# batch pass over every cut of the data
+def test_scan_from_states_matches_batch(data, tickers):
+    scanner.clear_cache()
+    names = ["daily", "value", "daily_weekly"]
+    found = 0
+    for cut in range(330, len(data) + 1, 7):
+        window = data.iloc[:cut]
+        got = scanner.scan_all(window, tickers, names=names)
+        ref = run_analyzers(build_panel(window, tickers), names)
+        strip = {n: [{k: v for k, v in r.items() if k not in ("Score", "Cluster", "Representative")} for r in rows]
+                 for n, rows in got.items()}
+        assert _rows(strip) == _rows(ref)
+        found += sum(map(len, ref.values()))
+    assert found
+    scanner.clear_cache()
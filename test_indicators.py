@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from datastore import split_download
+from indicators import MIN_BARS, build_panel, calculate_indicators, compute_indicators
+from strategies import analyze_daily_original, analyze_deep_value, scan_daily_original, scan_deep_value
+
+COLUMNS = ["SMA_200", "EMA_20", "52W_High", "RSI", "ATR", "ADX"]
+
+@pytest.mark.parametrize("style", ["app", "backtest"])
+def test_panel_matches_per_ticker(data, tickers, style):
+    panel = compute_indicators(build_panel(data, tickers), style)
+    for ticker, df in split_download(data, tickers).items():
+        ref = calculate_indicators(df, style)
+        n = len(df)
+        assert (panel['Date'][ticker].to_numpy()[-n:] == df.index.values).all()
+        for col in COLUMNS:
+            got = panel[col][ticker].to_numpy()[-n:]
+            if n < MIN_BARS: assert np.isnan(got).all()
+            else: np.testing.assert_allclose(got, ref[col].to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def _rows(results):
+    return [{k: v if isinstance(v, str) else round(float(v), 9) for k, v in r.items()} for r in results]
+
+def test_analyzers_match_reference(data, tickers):
+    found = 0
+    for cut in range(300, len(data) + 1, 5):
+        window = data.iloc[:cut]
+        panel = compute_indicators(build_panel(window, tickers))
+        frames = {t: calculate_indicators(df) for t, df in split_download(window, tickers).items()}
+        daily = [r for t, df in frames.items() if (r := analyze_daily_original(t, df))]
+        value = [r for t, df in frames.items() if (r := analyze_deep_value(t, df))]
+        assert _rows(scan_daily_original(panel)) == _rows(daily)
+        assert _rows(scan_deep_value(panel)) == _rows(value)
+        found += len(daily) + len(value)
+    assert found
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+import kernels
+from indicators import build_panel, compute_indicators
+from strategies import strong_buy_mask
+from trades import backtest_trades
+
+# Plain-Python loops (what Numba compiles) against the pandas/NumPy reference
+def test_loops_match_reference():
+    assert kernels.verify(kernels.LOOPS)
+    assert kernels.verify(kernels.LOOPS, seed=7)
+
+def test_verify_rejects_a_wrong_kernel():
+    assert not kernels.verify({**kernels.LOOPS, "ewm": lambda values, alpha, adjust: values})
+
+# The frame wrappers with the loops swapped in, end to end
+@pytest.fixture
+def loops(monkeypatch):
+    for name, fn in kernels.LOOPS.items(): monkeypatch.setitem(kernels._KERNELS, name, fn)
+    monkeypatch.setitem(kernels._STATE, "checked", True)
+
+@pytest.fixture(scope="module")
+def reference(data, tickers):
+    panel = compute_indicators(build_panel(data, tickers), "backtest")
+    return panel, backtest_trades(panel, strong_buy_mask(panel))
+
+def test_wrappers_match_pandas(data, tickers, reference, loops):
+    assert kernels.backend() == "numba"
+    ref, ref_trades = reference
+    panel = compute_indicators(build_panel(data, tickers), "backtest")
+    for col in ["EMA_20", "SMA_200", "RSI", "ATR", "ADX"]:
+        np.testing.assert_allclose(panel[col].to_numpy(), ref[col].to_numpy(), rtol=kernels.TOLERANCE,
+                                   atol=kernels.TOLERANCE, equal_nan=True, err_msg=col)
+    assert backtest_trades(ref, strong_buy_mask(ref)).equals(ref_trades)
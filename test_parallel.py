@@ -0,0 +1,13 @@
+import pandas as pd
+
+from indicators import build_panel
+from parallel import run_parallel
+
+# Each call publishes a new block, so the second one also re-attaches the
+# workers (and closes their previous mapping)
+def test_parallel_matches_serial(data, tickers):
+    panel = build_panel(data, tickers)
+    for _ in range(2):
+        assert run_parallel(panel, "scan", 2) == run_parallel(panel, "scan", 1)
+        pd.testing.assert_frame_equal(run_parallel(panel, "backtest", 2, first_row=250),
+                                      run_parallel(panel, "backtest", 1, first_row=250))
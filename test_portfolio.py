@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio import simulate
+
+# Three flat tickers (close 100, high 101, low 99, ATR 1: stop 98, target 103).
+# A touches its target on day 3; B and C stay open to the last bar.
+# Signals: A, B, C on day 1 (ADX 30, 20, 10), C again on day 3, B on day 4.
+@pytest.fixture
+def book():
+    n, tickers = 8, ["A", "B", "C"]
+    frame = lambda value: pd.DataFrame(np.full((n, 3), value, dtype=float), columns=tickers)
+    panel = {"Close": frame(100), "High": frame(101), "Low": frame(99), "ATR": frame(1),
+             "ADX": pd.DataFrame(np.tile([30.0, 20.0, 10.0], (n, 1)), columns=tickers)}
+    panel["High"].loc[3, "A"] = 104
+    panel["Date"] = pd.DataFrame(np.repeat(pd.bdate_range("2024-01-01", periods=n).values[:, None], 3, axis=1),
+                                 columns=tickers)
+    signals = pd.DataFrame(False, index=range(n), columns=tickers)
+    signals.loc[1, ["A", "B", "C"]] = True
+    signals.loc[3, "C"] = True
+    signals.loc[4, "B"] = True
+    return panel, signals
+
+def test_slots_priority_and_same_day_exit(book):
+    panel, signals = book
+    result = simulate(panel, signals, max_positions=2, fee_bps=10)
+    trades = result["trades"]
+    # A and B win day 1 on ADX; A's day-3 exit frees the slot C takes that day
+    assert list(zip(trades["Ticker"], trades["Entry Date"].astype(str))) == [
+        ("A", "2024-01-02"), ("B", "2024-01-02"), ("C", "2024-01-04")]
+    assert list(trades["Outcome"]) == ["TARGET", "OPEN", "OPEN"]
+    assert result["stats"]["Candidates"] == 5
+    # C on day 1 and B on day 4 find both slots taken
+    assert result["stats"]["Skipped"] == {"max_positions": 2, "held": 0, "no_risk": 0, "cash": 0}
+
+    # Capped at 20% of equity (cash + cost of open positions, after fees)
+    assert list(trades["Shares"]) == [200, 199, 201]
+    equity = result["equity"]
+    cash = [100000, 60060.1, 60060.1, 60519.4, 60519.4, 60519.4, 60519.4, 100479.4]
+    np.testing.assert_allclose(equity["Cash"], cash)
+    np.testing.assert_allclose(equity["Positions"], [0, 39900, 39900, 40000, 40000, 40000, 40000, 0])
+    assert result["stats"]["Final Equity"] == 100479.4
+    np.testing.assert_allclose(trades["P&L $"], [200 * (103 * 0.999 - 100 * 1.001), -39.8, -40.2])
+
+# Without the cap, shares = equity x risk / (entry - stop): A and B leave no
+# cash for C on day 1; C gets in with A's proceeds on day 3, B stays held
+def test_atr_risk_sizing(book):
+    panel, signals = book
+    result = simulate(panel, signals, max_positions=3, max_position_pct=1.0, fee_bps=10)
+    assert list(result["trades"]["Shares"]) == [500, 499, 506]
+    assert result["stats"]["Skipped"] == {"max_positions": 0, "held": 1, "no_risk": 0, "cash": 1}
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import build_panel, compute_indicators
+from ranking import DEFAULT_WEIGHTS, factor_values, percentile_ranks, rank_panel, top_k, top_k_mask
+
+@pytest.fixture(scope="module")
+def panel(data, tickers):
+    return compute_indicators(build_panel(data, tickers), "app")
+
+# The reference: pandas' rank(pct=True) per row, rescaled so the lowest of n
+# values is 0 and the highest 100
+def _pct(frame):
+    n = frame.notna().sum(axis=1).to_numpy()[:, None]
+    ranks = frame.rank(axis=1, pct=True).to_numpy() * n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 1, (ranks - 1) / (n - 1) * 100, np.where(n == 1, 100.0, np.nan))
+
+def test_percentile_ranks():
+    values = np.array([[3.0, 1.0, np.nan, 3.0, 2.0], [np.nan, 5.0, np.nan, np.nan, np.nan], [np.nan] * 5])
+    np.testing.assert_allclose(percentile_ranks(values), _pct(pd.DataFrame(values)), equal_nan=True)
+    np.testing.assert_allclose(percentile_ranks(values[0]), [[83.333333, 0, np.nan, 83.333333, 33.333333]],
+                               rtol=1e-6, equal_nan=True)
+
+# Per calendar date across tickers, whatever row each ticker's bar sits on in
+# the packed panel
+def test_rank_panel_matches_per_date_rank(panel):
+    ranks = rank_panel(panel)
+    factors = factor_values(panel)
+    valid = panel['Date'].notna()
+    for name in DEFAULT_WEIGHTS:
+        wide = pd.DataFrame({t: pd.Series(factors[name][t][valid[t]].to_numpy(), index=panel['Date'][t][valid[t]])
+                             for t in panel['Close'].columns})
+        ref = pd.DataFrame(_pct(wide), index=wide.index, columns=wide.columns)
+        for t in wide.columns:
+            np.testing.assert_allclose(ranks[f"{name}_Rank"][t][valid[t]].to_numpy(),
+                                       ref[t][panel['Date'][t][valid[t]]].to_numpy(), equal_nan=True,
+                                       err_msg=f"{name} {t}")
+    assert np.isnan(ranks["Score"].to_numpy()[~valid.to_numpy()]).all()
+
+def _scores(ties, seed=3):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 6, 60).astype(float) if ties else rng.normal(size=60)
+    scores[rng.choice(60, 15, replace=False)] = np.nan
+    return scores
+
+# Same picks as a full sort; with ties at the cut any of the tied tickers may
+# fill the last places, so only the scores are compared there
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("k", [0, 1, 5, 45, 60, 100])
+def test_top_k_matches_full_sort(ties, k):
+    scores = _scores(ties)
+    ref = pd.Series(scores).sort_values(ascending=False, kind="stable").head(k).dropna()
+    got = top_k(scores, k)
+    np.testing.assert_array_equal(scores[got], ref.to_numpy())
+    assert len(set(got)) == len(got)
+    if not ties: np.testing.assert_array_equal(got, ref.index)
+    elif len(ref): assert set(np.nonzero(scores > ref.iloc[-1])[0]) <= set(got)
+
+# Every date keeps its k best signals (unscored ones last) and nothing else
+@pytest.mark.parametrize("k", [1, 3, 100])
+def test_top_k_mask(panel, k):
+    signals = np.random.default_rng(5).random(panel['Close'].shape) < 0.3
+    signals &= panel['Date'].notna().to_numpy()
+    score = rank_panel(panel)["Score"].to_numpy()
+    kept = top_k_mask(panel, signals, score, k)
+    assert not (kept & ~signals).any()
+    dates = panel['Date'].to_numpy()
+    for day in np.unique(dates[signals]):
+        on_day = signals & (dates == day)
+        values, keep = np.nan_to_num(score[on_day], nan=-1.0), kept[on_day]
+        assert keep.sum() == min(k, on_day.sum())
+        if not keep.all(): assert values[keep].min() >= values[~keep].max()
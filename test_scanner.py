@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import datacache
+from metrics import METRICS
+from scanner import clear_cache, last_changes, scan_all, signal_diff
+
+@pytest.fixture
+def fresh():
+    clear_cache()
+    yield
+    clear_cache()
+
+def _same(a, b):
+    assert a.keys() == b.keys()
+    for name in a:
+        assert [r["Ticker"] for r in a[name]] == [r["Ticker"] for r in b[name]], name
+        for x, y in zip(a[name], b[name]):
+            assert x.keys() == y.keys()
+            for k in x:
+                if isinstance(x[k], str) or x[k] is None: assert x[k] == y[k], (name, k)
+                else: np.testing.assert_allclose(x[k], y[k], rtol=1e-9, atol=1e-9, err_msg=f"{name} {k}")
+
+# Scans that reuse the previous version's rows, factors, states and
+# correlation matrix equal scans from scratch
+def test_incremental_rescan_matches_fresh_scan(data, tickers, fresh):
+    cuts = range(320, len(data) + 1, 6)
+    incremental = []
+    for cut in cuts:
+        results = scan_all(data.iloc[:cut], tickers)
+        incremental.append((results, {n: last_changes(n) for n in results}))
+    for k, cut in enumerate(cuts):
+        clear_cache()
+        got, changes = incremental[k]
+        _same(got, scan_all(data.iloc[:cut], tickers))
+        if k: assert changes == {n: signal_diff(incremental[k - 1][0][n], got[n]) for n in got}
+    assert any(any(changes.values()) for _, changes in incremental[1:])
+
+def test_same_version_is_cached(data, tickers, fresh):
+    first = scan_all(data, tickers)
+    assert all(scan_all(data, tickers)[n] is first[n] for n in first)
+
+# A new published version whose tickers only partly moved rescans the moved
+# ones from the stored indicators, with the results of a scan from scratch
+def test_shared_panel_rescan_uses_stored_indicators(data, tickers, fresh, tmp_path):
+    older = data.copy()
+    older.loc[data.index[-5]:, tickers[:8]] = np.nan
+    scan_all(datacache.publish(older, tickers, root=str(tmp_path)), tickers)
+    shared = datacache.publish(data, tickers, root=str(tmp_path))
+    METRICS.reset()
+    got = scan_all(shared, tickers)
+    assert METRICS.counters["tickers.rescanned"] == 8
+    assert not [s for s in METRICS.stages if s.startswith("indicators[")]
+    clear_cache()
+    _same(got, scan_all(data, tickers))
+
+def test_signal_diff():
+    before = [{"Ticker": "A", "Status": "BUY"}, {"Ticker": "B", "Status": "STRONG BUY"}, {"Ticker": "C", "Status": "BUY"}]
+    after = [{"Ticker": "A", "Status": "STRONG BUY"}, {"Ticker": "B", "Status": "BUY"}, {"Ticker": "D", "Status": "BUY"}]
+    assert signal_diff(before, after) == [
+        {"Ticker": "A", "Change": "UPGRADE", "From": "BUY", "To": "STRONG BUY"},
+        {"Ticker": "B", "Change": "DOWNGRADE", "From": "STRONG BUY", "To": "BUY"},
+        {"Ticker": "D", "Change": "NEW", "From": None, "To": "BUY"},
+        {"Ticker": "C", "Change": "DROPPED", "From": "BUY", "To": None},
+    ]
+    assert signal_diff(None, before)[0]["Change"] == "NEW"
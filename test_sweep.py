@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from indicators import build_panel, compute_indicators
+from strategies import deep_value_mask, strong_buy_mask
+from sweep import STRATEGIES, run_sweep
+from trades import backtest_trades
+
+CASES = {
+    "strong_buy": (strong_buy_mask, {"adx_min": [10, 15], "rsi_max": [60, 70], "stop_atr": [1.5, 2]}),
+    "deep_value": (deep_value_mask, {"rsi_max": [45, 50], "min_discount": [0.0, 0.2], "target_atr": [2, 3]}),
+}
+
+# Every combination scores like a backtest_trades run of the mask with those
+# parameters (the average can differ by one rounding step: summation order)
+@pytest.mark.parametrize("strategy", list(CASES))
+@pytest.mark.parametrize("first_row", [0, 300])
+def test_sweep_matches_backtest(data, tickers, strategy, first_row):
+    mask, grid = CASES[strategy]
+    spec = STRATEGIES[strategy]
+    raw = build_panel(data, tickers)
+    panel = compute_indicators(raw, spec["style"])
+    results = run_sweep(raw, strategy, grid, first_row)
+    assert len(results) == 8
+    for combo in results.to_dict("records"):
+        params = {k: combo[k] for k in spec["defaults"]}
+        exits = {k: params.pop(k) for k in ("stop_atr", "target_atr")}
+        table = backtest_trades(panel, mask(panel, **params), first_row, stop_from=spec["stop_from"], **exits)
+        assert combo["Trades"] == len(table)
+        if not len(table): continue
+        assert combo["Win Rate %"] == round(float((table['P&L %'] > 0).mean() * 100), 1)
+        np.testing.assert_allclose(combo["Avg Return %"], round(float(table['P&L %'].mean()), 3), atol=1e-3 + 1e-9)
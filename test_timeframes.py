@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datastore import FIELDS, split_download
+from indicators import build_panel, compute_indicators
+from timeframes import COLUMNS, add_timeframes, resample_panel
+
+RULES = {"W": "W-SUN", "M": "ME"}
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum", "Date": "last"}
+
+def _pandas_resample(df, tf):
+    return df.assign(Date=df.index).resample(RULES[tf]).agg(AGG).dropna(subset=["Date"])
+
+@pytest.mark.parametrize("tf", list(RULES))
+def test_resample_matches_pandas(data, tickers, tf):
+    out = resample_panel(build_panel(data, tickers), tf)
+    for ticker, df in split_download(data, tickers).items():
+        ref = _pandas_resample(df, tf)
+        assert out['Bars'][ticker] == len(ref)
+        for f in FIELDS:
+            np.testing.assert_allclose(out[f][ticker].to_numpy()[len(out[f]) - len(ref):], ref[f].to_numpy(), err_msg=f)
+        assert (out['Date'][ticker].to_numpy()[len(out['Date']) - len(ref):] == ref['Date'].to_numpy()).all()
+
+# Every daily bar sees the close of the last period completed before its own
+@pytest.mark.parametrize("tf", list(RULES))
+def test_align_uses_last_completed_period(data, tickers, tf):
+    panel = build_panel(data, tickers)
+    aligned = add_timeframes(compute_indicators(panel, "backtest"), (tf,))
+    for ticker, df in split_download(data, tickers).items():
+        ref = _pandas_resample(df, tf)
+        period = df.index.to_period(RULES[tf][0])
+        prev = pd.Series(ref['Close'].to_numpy(), index=ref.index.to_period(RULES[tf][0])).shift()
+        expected = prev.reindex(period).to_numpy()
+        got = aligned[f"{tf}_Close"][ticker].to_numpy()[len(panel['Close']) - len(df):]
+        np.testing.assert_allclose(got, expected, equal_nan=True)
+
+# Bars after a cut never change what the bars before it see
+def test_no_look_ahead(data, tickers):
+    full = add_timeframes(compute_indicators(build_panel(data, tickers), "backtest"))
+    cut = data.iloc[:len(data) - 37]
+    part = add_timeframes(compute_indicators(build_panel(cut, tickers), "backtest"))
+    for tf in RULES:
+        for col in COLUMNS:
+            name = f"{tf}_{col}"
+            for ticker in tickers:
+                a = part[name][ticker].to_numpy()[part['Date'][ticker].notna().to_numpy()]
+                b = full[name][ticker].to_numpy()[full['Date'][ticker].notna().to_numpy()][:len(a)]
+                np.testing.assert_allclose(a, b, rtol=1e-9, equal_nan=True, err_msg=f"{ticker} {name}")
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from indicators import build_panel, compute_indicators
+from strategies import deep_value_mask, strong_buy_mask
+from trades import OUTCOMES, backtest_trades, resolve_exits
+
+@pytest.fixture(scope="module")
+def panel(data, tickers):
+    return compute_indicators(build_panel(data, tickers), "backtest")
+
+# The original backtest: walk every trade bar by bar until the stop or target
+def _walk(panel, signals, first_row, stop_atr, target_atr, stop_from):
+    close, high, low, base, atr = (panel[f].to_numpy() for f in ("Close", "High", "Low", stop_from, "ATR"))
+    cols, rows = np.nonzero(np.asarray(signals)[:-1].T)
+    out = []
+    for r, c in zip(rows, cols):
+        if r < first_row: continue
+        entry, stop, target = close[r, c], base[r, c] - stop_atr * atr[r, c], close[r, c] + target_atr * atr[r, c]
+        outcome, price = "OPEN", close[-1, c]
+        for j in range(r + 1, len(close)):
+            if low[j, c] < stop: outcome, price = "STOPPED", stop; break
+            if high[j, c] > target: outcome, price = "TARGET", target; break
+        out.append((panel['Close'].columns[c], outcome, round(price, 2), round((price - entry) / entry * 100, 2)))
+    return out
+
+@pytest.mark.parametrize("rule, stop_atr, stop_from", [(strong_buy_mask, 2, "Close"), (deep_value_mask, 1, "Low")])
+@pytest.mark.parametrize("first_row", [0, 300])
+def test_trades_match_bar_by_bar_walk(panel, rule, stop_atr, stop_from, first_row):
+    signals = rule(panel)
+    table = backtest_trades(panel, signals, first_row, stop_atr, 3, stop_from)
+    ref = _walk(panel, signals, first_row, stop_atr, 3, stop_from)
+    assert ref
+    assert list(zip(table['Ticker'], table['Outcome'], table['Exit Price'], table['P&L %'])) == ref
+
+def test_window_size_does_not_change_exits(panel):
+    cols, rows = np.nonzero(strong_buy_mask(panel).to_numpy()[:-1].T)
+    close, high, low, atr = (panel[f].to_numpy() for f in ("Close", "High", "Low", "ATR"))
+    stop, target = close[rows, cols] - 2 * atr[rows, cols], close[rows, cols] + 3 * atr[rows, cols]
+    outcome, exit_row = resolve_exits(low, high, rows, cols, stop, target)
+    for block in (1, 3, 1000):
+        got = resolve_exits(low, high, rows, cols, stop, target, block)
+        np.testing.assert_array_equal(got[0], outcome)
+        np.testing.assert_array_equal(got[1], exit_row)
+    assert {"STOPPED", "TARGET"} <= set(OUTCOMES[outcome])
@@ -0,0 +1,105 @@
+import pandas as pd
+import numpy as np
+
+from datastore import FIELDS
+from indicators import compute_indicators
+
+TIMEFRAMES = ("W", "M")
+# Indicator columns copied onto the daily panel as "<tf>_<column>"
+COLUMNS = ["Close", "EMA_20", "SMA_200", "RSI", "ADX"]
+# Trend confirmation wants the DMI ADX; the app style's ADX is a smoothed ATR
+STYLE = "backtest"
+
+# -----------------------------------------------------------------------------
+# 1. VECTORIZED RESAMPLING OF THE PACKED DAILY PANEL
+# -----------------------------------------------------------------------------
+# Weeks run Monday-Friday, months are calendar months. Each ticker's bars are
+# contiguous and date-sorted in the packed panel, so a period is a run of equal
+# keys inside a column: walk the valid cells column by column, mark where the
+# key or the column changes, and reduce each run with ufunc.reduceat (first
+# open, max high, min low, last close, summed volume, last date). The result
+# is packed the same way as indicators.build_panel. The newest period may be
+# incomplete (the current week so far).
+
+def period_keys(dates, tf):
+    if tf == "W": return (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    if tf == "M": return dates.astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown timeframe: {tf}")
+
+# Valid daily cells in column order, the first cell of every period run, and
+# each run's column and index within its column
+def _runs(dates, tf):
+    cols, rows = np.nonzero(~np.isnat(dates).T)
+    keys = period_keys(dates[rows, cols], tf)
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (keys[1:] != keys[:-1]) | (cols[1:] != cols[:-1])
+    starts = np.flatnonzero(first)
+    run_cols = cols[starts]
+    counts = np.bincount(run_cols, minlength=dates.shape[1])
+    index = np.arange(len(starts)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, cols, first, starts, run_cols, index, counts
+
+def resample_panel(panel, tf):
+    dates = panel['Date'].to_numpy(dtype="datetime64[ns]")
+    tickers = panel['Close'].columns
+    rows, cols, _, starts, run_cols, index, counts = _runs(dates, tf)
+    ends = np.append(starts[1:], len(rows)) - 1
+    n = int(counts.max()) if len(counts) else 0
+    dest = n - counts[run_cols] + index
+
+    values = {f: panel[f].to_numpy(dtype=float) for f in FIELDS}
+    reduced = {
+        "Open": values["Open"][rows[starts], cols[starts]],
+        "High": np.maximum.reduceat(values["High"][rows, cols], starts) if len(starts) else np.array([]),
+        "Low": np.minimum.reduceat(values["Low"][rows, cols], starts) if len(starts) else np.array([]),
+        "Close": values["Close"][rows[ends], cols[ends]],
+        "Volume": np.add.reduceat(values["Volume"][rows, cols], starts) if len(starts) else np.array([]),
+    }
+    out = {}
+    for f, v in reduced.items():
+        packed = np.full((n, len(tickers)), np.nan)
+        packed[dest, run_cols] = v
+        out[f] = pd.DataFrame(packed, columns=tickers)
+    packed_dates = np.full((n, len(tickers)), np.datetime64("NaT"), dtype="datetime64[ns]")
+    packed_dates[dest, run_cols] = dates[rows[ends], cols[ends]]
+    out['Date'] = pd.DataFrame(packed_dates, columns=tickers)
+    out['Bars'] = pd.Series(counts, index=tickers)
+    return out
+
+# Indicators on the resampled panel; no MIN_BARS gate (a 2y history has ~100
+# weekly bars), windows longer than the history just stay NaN
+def timeframe_indicators(panel, tf, style=STYLE):
+    return compute_indicators(resample_panel(panel, tf), style, min_bars=0)
+
+# -----------------------------------------------------------------------------
+# 2. ALIGNMENT BACK ONTO THE DAILY PANEL
+# -----------------------------------------------------------------------------
+# Every daily bar sees the last *completed* period before its own (last week's
+# weekly bar on any day of this week), so full-history backtests have no
+# look-ahead and a live scan uses the same rule.
+
+def align(panel, tf_panel, tf, columns=COLUMNS):
+    dates = panel['Date'].to_numpy(dtype="datetime64[ns]")
+    rows, cols, first, starts, run_cols, index, counts = _runs(dates, tf)
+    run = np.cumsum(first) - 1
+    prev = index[run] - 1
+    ok = prev >= 0
+    n = len(tf_panel['Close'])
+    src = n - counts[cols[ok]] + prev[ok]
+    out = {}
+    for col in columns:
+        values = np.full(dates.shape, np.nan)
+        values[rows[ok], cols[ok]] = tf_panel[col].to_numpy(dtype=float)[src, cols[ok]]
+        out[f"{tf}_{col}"] = pd.DataFrame(values, columns=panel['Close'].columns)
+    return out
+
+# Daily indicator panel plus "<tf>_<column>" frames for each timeframe
+def add_timeframes(panel, timeframes=TIMEFRAMES, columns=COLUMNS):
+    extra = {}
+    for tf in timeframes:
+        if f"{tf}_{columns[0]}" in panel: continue
+        extra.update(align(panel, timeframe_indicators(panel, tf), tf, columns))
+    return {**panel, **extra} if extra else panel
+
+def timeframe_columns(timeframes=TIMEFRAMES, columns=COLUMNS):
+    return [f"{tf}_{col}" for tf in timeframes for col in columns]
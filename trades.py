@@ -0,0 +1,90 @@
+import pandas as pd
+import numpy as np
+
+import kernels
+
+OPEN, STOPPED, TARGET = 0, 1, 2
+OUTCOMES = np.array(["OPEN", "STOPPED", "TARGET"])
+
+# -----------------------------------------------------------------------------
+# 1. FIRST-TOUCH EXIT RESOLUTION
+# -----------------------------------------------------------------------------
+# For every trade (entry row, ticker column) find the first later bar with
+# Low < stop or High > target; the stop wins when both happen on the same bar,
+# like the original bar-by-bar walk. Look-ahead windows double each round, so
+# the many trades that exit within a few weeks never scan the whole history.
+# With compiled kernels active the plain per-trade walk is used instead.
+def resolve_exits(low, high, rows, cols, stop, target, block=32):
+    if kernels.active(): return kernels.first_touch(low, high, rows, cols, stop, target)
+    n = len(low)
+    outcome = np.full(len(rows), OPEN, dtype=np.int8)
+    exit_row = np.full(len(rows), n - 1)
+    pending = np.arange(len(rows))
+    offset = 1
+    while len(pending):
+        pending = pending[rows[pending] + offset < n]
+        if not len(pending): break
+        idx = rows[pending, None] + offset + np.arange(block)
+        valid = idx < n
+        idx = np.minimum(idx, n - 1)
+        col = cols[pending, None]
+        stop_hit = (low[idx, col] < stop[pending, None]) & valid
+        hit = stop_hit | ((high[idx, col] > target[pending, None]) & valid)
+
+        done = np.flatnonzero(hit.any(axis=1))
+        first = hit[done].argmax(axis=1)
+        outcome[pending[done]] = np.where(stop_hit[done, first], STOPPED, TARGET)
+        exit_row[pending[done]] = rows[pending[done]] + offset + first
+
+        keep = np.ones(len(pending), dtype=bool)
+        keep[done] = False
+        pending = pending[keep]
+        offset += block
+        block *= 2
+    return outcome, exit_row
+
+# -----------------------------------------------------------------------------
+# 2. TRADE LIST FROM A SIGNAL MASK
+# -----------------------------------------------------------------------------
+# signals: bars x tickers bools on a packed panel. Entries on rows first_row..-2
+# (the last bar has no future to resolve against); open trades are marked to the
+# last close. Rows come out ticker by ticker, then by entry date. Stops sit
+# stop_atr x ATR below `stop_from` (Close for swing entries, Low for reversals).
+def trade_arrays(panel, signals, first_row=0, stop_atr=2, target_atr=3, stop_from="Close"):
+    close, high, low = (panel[f].to_numpy() for f in ("Close", "High", "Low"))
+    first_row = max(first_row, 0)
+    cols, rows = np.nonzero(np.asarray(signals)[first_row:-1].T)
+    rows = rows + first_row
+
+    entry_price = close[rows, cols]
+    atr = panel['ATR'].to_numpy()[rows, cols]
+    stop_loss = panel[stop_from].to_numpy()[rows, cols] - (stop_atr * atr)
+    target = entry_price + (target_atr * atr)
+
+    outcome, exit_row = resolve_exits(low, high, rows, cols, stop_loss, target)
+    exit_price = np.select([outcome == STOPPED, outcome == TARGET], [stop_loss, target], close[-1, cols])
+    return {"rows": rows, "cols": cols, "entry_price": entry_price, "stop": stop_loss, "target": target,
+            "outcome": outcome, "exit_row": exit_row, "exit_price": exit_price}
+
+def backtest_trades(panel, signals, first_row=0, stop_atr=2, target_atr=3, stop_from="Close"):
+    t = trade_arrays(panel, signals, first_row, stop_atr, target_atr, stop_from)
+    pnl_pct = (t["exit_price"] - t["entry_price"]) / t["entry_price"]
+
+    return pd.DataFrame({
+        "Ticker": panel['Close'].columns.to_numpy()[t["cols"]],
+        "Entry Date": pd.DatetimeIndex(panel['Date'].to_numpy()[t["rows"], t["cols"]]).date,
+        "Entry Price": np.round(t["entry_price"], 2),
+        "Exit Price": np.round(t["exit_price"], 2),
+        "Outcome": OUTCOMES[t["outcome"]],
+        "P&L %": np.round(pnl_pct * 100, 2)
+    })
+
+# Headline numbers of a backtest_trades table, as backtest.py reports them
+def trade_summary(trades):
+    if trades.empty: return {"Total Signals": 0}
+    return {
+        "Total Signals": len(trades),
+        "Outcomes": {k: int(v) for k, v in trades['Outcome'].value_counts().items()},
+        "Average Return %": round(float(trades['P&L %'].mean()), 2),
+        "Win Rate %": round(float((trades['P&L %'] > 0).mean() * 100), 1),
+    }
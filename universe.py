@@ -0,0 +1,177 @@
+import os
+import json
+import datetime
+
+import numpy as np
+
+from compact import CompactPanel
+from datastore import PriceStore
+from metrics import count, stage
+
+# -----------------------------------------------------------------------------
+# 1. TICKER UNIVERSE (S&P 500 + TSX 60 + EXPANDED TSX VENTURE)
+# -----------------------------------------------------------------------------
+# Single source for app.py and backtest.py. Keep each symbol once; delisted
+# names (ATVI, SIVB, FRC, TWTR, ABMD) were dropped, anything that dies later is
+# caught by the pre-filter below.
+
+TSX_TICKERS = [
+    "RY.TO", "TD.TO", "CNR.TO", "CP.TO", "ENB.TO", "BNS.TO", "CNQ.TO", "BMO.TO",
+    "ATD.TO", "TRI.TO", "CSU.TO", "TRP.TO", "SHOP.TO", "BCE.TO", "CM.TO", "NTR.TO",
+    "SU.TO", "MG.TO", "MFC.TO", "WCN.TO", "QSR.TO", "IMO.TO", "FNV.TO", "POW.TO",
+    "DOL.TO", "T.TO", "RCI-B.TO", "GIB-A.TO", "WCP.TO", "SLF.TO", "AEM.TO", "NA.TO",
+    "FM.TO", "FTS.TO", "CVE.TO", "K.TO", "WPM.TO", "MRU.TO", "OTEX.TO", "EMA.TO",
+    "PPL.TO", "TECK-B.TO", "CAR-UN.TO", "CCO.TO", "SAP.TO", "WN.TO", "CL.TO",
+    "IFC.TO", "CTC-A.TO", "AQN.TO", "GRT-UN.TO", "KEY.TO", "CAE.TO", "GIL.TO",
+    "L.TO", "BIP-UN.TO", "BEP-UN.TO", "H.TO", "FSV.TO"
+]
+
+# EXPANDED TSX VENTURE LIST (Liquid Junior Miners, Tech, Energy)
+TSXV_TICKERS = [
+    # Tech / Crypto / Growth
+    "TOI.V", "HIVE.V", "BITF.V", "DMGI.V", "VPT.V", "FD.V", "QYOU.V", "DOC.V",
+    "CTS.V", "PYR.V", "FLT.V", "XBC.V", "GRN.V", "HITI.V", "BABY.V",
+
+    # Mining & Critical Minerals (The bulk of TSX.V)
+    "NFG.V", "PMET.V", "VZLA.V", "ISO.V", "LI.V", "EU.V", "RECO.V", "DSV.V",
+    "GMIN.V", "SKE.V", "FOM.V", "GLA.V", "VGCX.V", "PGM.V", "SGD.V", "NVO.V",
+    "ABRA.V", "ARTG.V", "KNT.V", "LIO.V", "AMX.V", "MAI.V", "ORE.V", "PRYM.V",
+    "SCOT.V", "TIG.V", "WM.V", "UGD.V", "RCK.V", "GBR.V", "DEF.V", "CRE.V",
+    "BTR.V", "CNC.V", "EPL.V", "GWO.V", "III.V", "KNB.V", "MKO.V", "NOB.V",
+
+    # Energy / Uranium / Lithium
+    "CVV.V", "SYH.V", "FCU.V", "GLO.V", "GXU.V", "LAM.V", "CUR.V", "FUU.V",
+    "UEX.V", "PTU.V", "AZM.V", "BRW.V", "DME.V", "ELBM.V", "LKE.V", "NILI.V"
+]
+
+US_TICKERS = [
+    "AAPL", "MSFT", "AMZN", "NVDA", "GOOGL", "META", "GOOG", "TSLA", "BRK-B", "UNH",
+    "JNJ", "XOM", "V", "PG", "MA", "JPM", "HD", "CVX", "MRK", "ABBV",
+    "PEP", "KO", "LLY", "BAC", "AVGO", "COST", "TMO", "MCD", "CSCO", "CRM",
+    "PFE", "ACN", "DHR", "LIN", "NFLX", "ABT", "AMD", "DIS", "WMT", "TXN",
+    "NEE", "PM", "BMY", "ADBE", "CMCSA", "NKE", "VZ", "RTX", "UPS", "MS",
+    "HON", "AMGN", "INTC", "UNP", "LOW", "QCOM", "IBM", "SPGI", "INTU", "CAT",
+    "GS", "DE", "GE", "LMT", "PLD", "BLK", "EL", "SCHW", "BKNG", "AMAT",
+    "ADI", "MDLZ", "TJX", "ADP", "MMC", "GILD", "C", "ISRG", "SYK", "VRTX",
+    "TMUS", "NOW", "ZTS", "BA", "PGR", "T", "CB", "REGN", "SO", "MO",
+    "CI", "BDX", "LRCX", "FISV", "EOG", "BSX", "SLB", "ITW", "CL", "APD",
+    "CSX", "CCI", "ETN", "HUM", "WM", "NOC", "TGT", "FDX", "NSC", "GD",
+    "ICE", "SHW", "MCO", "USB", "GM", "KLAC", "MCK", "PNC", "EMR", "ORCL",
+    "F", "AON", "ECL", "MDT", "HCA", "FCX", "NXPI", "MAR", "ROP", "PSX",
+    "APH", "PCAR", "COF", "VLO", "MNST", "SNPS", "MSI", "AIG", "OXY", "ROST",
+    "DXCM", "AZO", "MET", "AEP", "TRV", "SRE", "TEL", "D", "PSA", "IDXX",
+    "PH", "KMB", "JCI", "CHTR", "ALL", "CTAS", "WMB", "AFL", "ADSK", "PAYX",
+    "EXC", "DLR", "BIIB", "O", "STZ", "FIS", "EW", "EA", "GPN", "HLT",
+    "CMG", "XEL", "ELV", "CTVA", "KR", "YUM", "KMI", "WBA", "PRU", "SYY",
+    "DVN", "LHX", "CNC", "NEM", "CMI", "OTIS", "VRSK", "DD", "HPQ", "FAST",
+    "CSGP", "WEC", "SBAC", "HES", "ANET", "KEYS", "DLTR", "CPRT", "ROK", "PEG",
+    "AMP", "BKR", "PPG", "ES", "ED", "AWK", "APTV", "GLW", "MTD", "ULTA",
+    "EFX", "TROW", "HSY", "EIX", "CBRE", "ARE", "VRSN", "EBAY", "ZBH", "ALB",
+    "TSCO", "DFS", "HIG", "WBD", "FE", "AME", "MTB", "OKE", "IFF", "WY",
+    "KHC", "RMD", "BAX", "STT", "CDW", "HAL", "ETR", "GWW", "AJG", "RJF",
+    "DAL", "IR", "FANG", "ON", "MCHP", "LYB", "VTR", "LUV", "NVR", "WTW",
+    "IT", "DHI", "TSN", "HBAN", "XYL", "FSLR", "GPC", "VICI", "WAB", "CINF",
+    "DOV", "MLM", "GRMN", "EXR", "OMC", "BBY", "HPE", "TTWO", "CNP", "VMC",
+    "CAG", "TER", "INGR", "KEY", "RF", "CMS", "PFG", "STE", "WAT", "CF",
+    "NTAP", "AES", "FMC", "TYL", "DGX", "PKI", "EXPD", "IEX", "AVY", "CBOE",
+    "DRI", "MKC", "ATO", "TXT", "SJM", "BWA", "HOLX", "COO", "JBHT", "ESS",
+    "WST", "LNT", "MAA", "NDSN", "AKAM", "DG", "POOL", "TRMB", "ALGN", "CE",
+    "MAS", "SNA", "SWK", "UDR", "HST", "K", "INCY", "MGM", "PHM", "PKG",
+    "RL", "ROL", "SWKS", "UHS", "URI", "VFC", "WHR", "WRB", "XRAY", "ZION",
+    "A", "AAL", "AAP", "ALK", "APA", "BXP", "CPB", "CRL", "DISH", "DVA",
+    "EMN", "EVRG", "FFIV", "FRT", "GNRC", "HAS", "HSIC", "IP", "IPG", "IVZ",
+    "JNPR", "KMX", "LKQ", "LNC", "LVS", "MHK", "MOH", "MOS", "NCLH", "NI",
+    "NRG", "NWS", "NWSA", "OGN", "PARA", "PEAK", "PNR", "PNW", "PVH", "QRVO",
+    "RCL", "REG", "RHI", "SEE", "SPG", "TPR", "UAA", "UA", "UAL", "UNM",
+    "VNO", "VTRS", "WDC", "WELL", "WFC", "WRK", "WYNN", "ZBRA", "MMM", "AOS",
+    "ADM", "ALLE", "AMCR", "AEE", "AXP", "AMT", "ABC", "ANSS", "ACGL", "AIZ",
+    "AVB", "BALL", "BBWI", "BIO", "TECH", "BK", "BR", "BRO", "BF-B", "CHRW",
+    "CDNS", "CZR", "CPT", "CAH", "CCL", "CARR", "CTLT", "CDAY", "CHD", "CFG",
+    "CLX", "CME", "CTSH", "CMA", "COP", "CTRA", "CVS", "DPZ", "DOW", "DTE",
+    "DUK", "DXC", "ENPH", "EPAM", "EQT", "EQIX", "EQR", "ETSY", "EG", "EXPE",
+    "FDS", "FITB", "FLT", "FTNT", "FTV", "FBHS", "FOXA", "FOX", "BEN", "GEHC",
+    "GEN", "GIS", "GL", "HRL", "HWM", "HII", "ILMN", "INVH", "IQV", "IRM",
+    "JKHY", "J", "KDP", "KIM", "LH", "LW", "LDOS", "LEN", "LYV", "L",
+    "LUMN", "MRO", "MPC", "MKTX", "MTCH", "MU", "MRNA", "TAP", "MPWR", "MSCI",
+    "NDAQ", "NWL", "NTRS", "NUE", "ORLY", "ODFL", "PAYC", "PYPL", "PCG", "PXD",
+    "PPL", "PTC", "PWR", "RSG", "STX", "SEDG", "SBUX", "SYF", "TRGP", "TDY",
+    "TFX", "TT", "TDG", "TFC"
+]
+
+def _unique(symbols):
+    return list(dict.fromkeys(symbols))
+
+ALL_TICKERS = _unique(TSX_TICKERS + TSXV_TICKERS + US_TICKERS)  # scanner
+UNIVERSE = _unique(TSX_TICKERS + US_TICKERS)                    # backtest
+
+def exchange(symbol):
+    if symbol.endswith(".V"): return "TSXV"
+    if symbol.endswith(".TO"): return "TSX"
+    return "US"
+
+# -----------------------------------------------------------------------------
+# 2. SYMBOL METADATA + LIQUIDITY PRE-FILTER
+# -----------------------------------------------------------------------------
+# Per-symbol facts read from the tail of the stored history (no indicator work):
+# exchange, bars, first/last date, last close, 20-day average dollar volume.
+# Symbols with no data, a last bar more than MAX_STALE_DAYS behind the freshest
+# symbol, or too little dollar volume are dropped before the panel is built.
+# Symbols that returned no data are not re-requested for DEAD_RECHECK_DAYS.
+
+META_FILE = "symbol_meta.json"
+MIN_DOLLAR_VOLUME = 100000
+MAX_STALE_DAYS = 10
+DEAD_RECHECK_DAYS = 7
+
+def load_metadata(store):
+    path = os.path.join(store.root, META_FILE)
+    if not os.path.exists(path): return {}
+    with open(path) as fh: return json.load(fh)
+
+def refresh_metadata(store, symbols):
+    meta = load_metadata(store)
+    today = datetime.date.today().isoformat()
+    for s in _unique(symbols):
+        records = store.read(s)
+        info = {"exchange": exchange(s), "bars": 0, "checked": today}
+        if records is not None and len(records):
+            tail = records[-20:]
+            info.update(bars=len(records), first_date=str(records["Date"][0])[:10],
+                        last_date=str(records["Date"][-1])[:10], last_close=float(tail["Close"][-1]),
+                        avg_dollar_volume=float(np.mean(tail["Close"] * tail["Volume"])))
+        meta[s] = info
+    path = os.path.join(store.root, META_FILE)
+    with open(path + ".tmp", "w") as fh: json.dump(meta, fh)
+    os.replace(path + ".tmp", path)
+    return meta
+
+def fetchable(symbols, meta):
+    cutoff = (datetime.date.today() - datetime.timedelta(days=DEAD_RECHECK_DAYS)).isoformat()
+    return [s for s in _unique(symbols)
+            if not (meta.get(s, {}).get("bars") == 0 and meta[s]["checked"] > cutoff)]
+
+def prefilter(symbols, meta, min_dollar_volume=MIN_DOLLAR_VOLUME, max_stale_days=MAX_STALE_DAYS):
+    known = [meta[s] for s in symbols if meta.get(s, {}).get("bars")]
+    if not known: return []
+    freshest = max(np.datetime64(m["last_date"]) for m in known)
+    stale_before = freshest - np.timedelta64(max_stale_days, "D")
+    return [s for s in _unique(symbols)
+            if meta.get(s, {}).get("bars")
+            and np.datetime64(meta[s]["last_date"]) >= stale_before
+            and meta[s]["avg_dollar_volume"] >= min_dollar_volume]
+
+# Shared by the scanner and the backtester: update the store (skipping symbols
+# known to be dead), refresh metadata, drop dead/illiquid names, load the rest
+# (as a float32 compact.CompactPanel with compact=True).
+def load_universe(symbols, period="2y", store=None, min_dollar_volume=MIN_DOLLAR_VOLUME, compact=False):
+    store = store or PriceStore()
+    with stage("load_universe"):
+        wanted = fetchable(symbols, load_metadata(store))
+        count("tickers.dead_skipped", len(_unique(symbols)) - len(wanted))
+        store.update(wanted, period=period)
+        with stage("metadata"): meta = refresh_metadata(store, symbols)
+        kept = prefilter(symbols, meta, min_dollar_volume)
+        count("tickers.filtered", len(_unique(symbols)) - len(kept))
+        with stage("store.load"):
+            if compact: return CompactPanel.from_store(store, kept, period)
+            return store.load(kept, period=period)